@@ -8,12 +8,8 @@ from sqlalchemy.engine import Engine
 
 from benchmark.implementations.skeleton.utilities import (
     cast_date_columns_to_datetime,
-    correct_ordering_of_filelist,
     create_database_table,
-    extract_xml_table_name,
     extract_sql_table_name,
-    is_first_file,
-    is_table_relevant,
     preprocess_table_for_writing_to_database,
 )
 from open_mastr.utils.helpers import data_to_include_tables
@@ -21,6 +17,8 @@ from open_mastr.utils.config import (
     get_output_dir
 )
 from open_mastr.utils.helpers import create_database_engine
+from open_mastr.utils.metrics import get_metrics
+from open_mastr.xml_download.utils_write_to_database import build_member_index
 from open_mastr.xml_download.utils_cleansing_bulk import cleanse_bulk_data
 
 
@@ -43,32 +41,35 @@ class ParserSkeleton(ABC):
         include_tables = data_to_include_tables(data, mapping="write_xml")
 
         with ZipFile(zip_file_path, "r") as f:
-            files_list = f.namelist()
-            files_list = correct_ordering_of_filelist(files_list)
-
-            for file_name in files_list:
-                xml_table_name = extract_xml_table_name(file_name)
-
-                if not is_table_relevant(xml_table_name, include_tables):
-                    continue
+            previous_xml_table_name = None
 
+            for member in build_member_index(f, include_tables):
+                file_name = member.info.filename
+                xml_table_name = member.xml_tablename
                 sql_table_name = extract_sql_table_name(xml_table_name)
 
-                if is_first_file(file_name):
+                if xml_table_name != previous_xml_table_name:
                     create_database_table(self.engine, xml_table_name)
                     print(
                         f"Table '{sql_table_name}' is filled with data '{xml_table_name}' "
                         "from the bulk download."
                     )
+                    previous_xml_table_name = xml_table_name
 
                 print(f"File '{file_name}' is parsed.")
 
-                df = self.read_xml(f, file_name)
-                df = preprocess_table_for_writing_to_database(df, xml_table_name)
-                df = cast_date_columns_to_datetime(xml_table_name, df)
-                df = cleanse_bulk_data(df, zip_file_path)
-
-                self.add_table_to_database(df, xml_table_name, sql_table_name, if_exists="append", engine=self.engine)
+                # The stages are reported to the active metrics collector or profiler
+                metrics = get_metrics()
+                with metrics.timer("parse", table=sql_table_name):
+                    df = self.read_xml(f, file_name)
+                    df = preprocess_table_for_writing_to_database(df, xml_table_name)
+                with metrics.timer("cast_dates", table=sql_table_name):
+                    df = cast_date_columns_to_datetime(xml_table_name, df)
+                with metrics.timer("cleanse", table=sql_table_name):
+                    df = cleanse_bulk_data(df, zip_file_path)
+
+                with metrics.timer("write", table=sql_table_name):
+                    self.add_table_to_database(df, xml_table_name, sql_table_name, if_exists="append", engine=self.engine)
 
         print("Bulk download and data cleansing were successful.")
 
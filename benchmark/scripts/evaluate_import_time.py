@@ -0,0 +1,43 @@
+"""
+Measure the time of `import open_mastr` and of the first access to `Mastr`.
+
+Every measurement runs in a new interpreter, so no module is cached. Run it
+from the repository root with `python -m benchmark.scripts.evaluate_import_time`.
+"""
+
+import statistics
+import subprocess
+import sys
+
+REPETITIONS = 10
+
+STATEMENTS = {
+    "import open_mastr": "import open_mastr",
+    "from open_mastr import Mastr": "from open_mastr import Mastr",
+}
+
+MEASURE = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def measure_import_time(statement, repetitions=REPETITIONS):
+    """Median duration of `statement` in a fresh interpreter in seconds."""
+    durations = []
+    for _ in range(repetitions):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE.format(statement=statement)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        durations.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(durations)
+
+
+if __name__ == "__main__":
+    for name, statement in STATEMENTS.items():
+        print(f"{name}: {measure_import_time(statement) * 1000:.1f} ms")
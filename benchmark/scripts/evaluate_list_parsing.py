@@ -0,0 +1,79 @@
+"""
+Compare the parsing time of a MaStR list response with zeep and with the raw XML
+parser used by `MaStRAPI(raw_xml=True)`.
+
+The response is built from the test WSDL with `ENTRIES` units, which is the
+maximum page size of the MaStR list functions. Run it from the repository root
+with `python -m benchmark.scripts.evaluate_list_parsing`.
+"""
+
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from lxml import etree
+from zeep.helpers import serialize_object
+
+from open_mastr.soap_api.download import (
+    BASIC_DATA_CHUNKSIZE,
+    _list_response_type,
+    _mastr_bindings,
+    _xml_response_schema,
+    flatten_dict,
+    parse_list_response,
+)
+from tests.soap_api.test_download import LIST_RESPONSE, LIST_WSDL
+
+OPERATION = "GetListeAlleEinheiten"
+ENTRIES = BASIC_DATA_CHUNKSIZE
+REPETITIONS = 5
+
+
+def build_response(entries=ENTRIES):
+    """Repeat the units of the test response until it holds `entries` units."""
+    units = re.findall(rb"<Einheiten>.*?</Einheiten>", LIST_RESPONSE, re.S)
+    body = b"".join(units[i % len(units)] for i in range(entries))
+    head, _, tail = LIST_RESPONSE.partition(units[0])
+    return head + body + tail.split(units[-1])[-1]
+
+
+def measure(func, repetitions=REPETITIONS):
+    """Median duration of `func()` in seconds."""
+    durations = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        wsdl = Path(tmp_dir) / "mastr.wsdl"
+        wsdl.write_text(LIST_WSDL)
+        client, _ = _mastr_bindings("Anlage", wsdl=str(wsdl))
+
+    operation = client.wsdl.services["Marktstammdatenregister"].ports[
+        "Anlage"
+    ].binding.get(OPERATION)
+    schema = _xml_response_schema(_list_response_type(client, "Anlage", OPERATION))
+    content = build_response()
+
+    def parse_with_zeep():
+        response = serialize_object(
+            operation.process_reply(etree.fromstring(content)), target_cls=dict
+        )
+        response["Einheiten"] = flatten_dict(response["Einheiten"])
+        return response
+
+    def parse_raw_xml():
+        return parse_list_response(content, "Einheiten", schema)
+
+    assert parse_with_zeep() == parse_raw_xml()
+    zeep_time = measure(parse_with_zeep)
+    raw_xml_time = measure(parse_raw_xml)
+    print(f"zeep: {zeep_time * 1000:.1f} ms for {ENTRIES} units")
+    print(f"raw xml: {raw_xml_time * 1000:.1f} ms for {ENTRIES} units")
+    print(f"speed-up: {zeep_time / raw_xml_time:.1f}x")
@@ -1,8 +1,12 @@
+import os
 import time
+from contextlib import nullcontext
 from benchmark.scripts.utilities import (
+    BENCHMARK_PATH,
     get_databases,
     get_implementations,
 )
+from open_mastr.utils.profiling import get_profile_dir, profile_stages
 from mdutils.mdutils import MdUtils
 
 mdFile = MdUtils(file_name='results', title='Performance results')
@@ -33,13 +37,22 @@ data_bulk = [
     "permit",
 ]
 
+# With OPEN_MASTR_PROFILE set, each table is profiled like in Mastr.download
+profile_dir = get_profile_dir(None, BENCHMARK_PATH)
+
 for implementation in implementations:
     list_of_strings.append(implementation.name)
 
     for database in databases:
-        start = time.time()
-        implementation.parser.write_zip_to_database(database.zip_file_path, data_bulk)
-        end = time.time()
+        profile_context = (
+            profile_stages(os.path.join(profile_dir, implementation.name, database.name))
+            if profile_dir
+            else nullcontext()
+        )
+        with profile_context:
+            start = time.time()
+            implementation.parser.write_zip_to_database(database.zip_file_path, data_bulk)
+            end = time.time()
 
         list_of_strings.append(f"{end - start}")
 
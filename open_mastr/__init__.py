@@ -1,6 +1,22 @@
-from open_mastr.utils.config import setup_project_home
+"""
+open-MaStR
 
-setup_project_home()
+Submodules are imported on first use, so `import open_mastr` is fast and has no
+side effects. The project home directory is created when it is used first.
+"""
 
-# This import should be called after the setup project home, since .open_mastr folder must be defined first
-from .mastr import Mastr  # noqa: E402 ignore import order warning of flake8
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from open_mastr.mastr import Mastr
+
+__all__ = ["Mastr"]
+
+
+def __getattr__(name):
+    # Import the Mastr class with its heavy dependencies on first access (PEP 562)
+    if name == "Mastr":
+        from open_mastr.mastr import Mastr
+
+        return Mastr
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,9 @@
 import os
+from contextlib import ExitStack
+import numpy as np
+import pandas as pd
 from sqlalchemy import inspect, create_engine
+from sqlalchemy.exc import SQLAlchemyError
 
 # import xml dependencies
 from open_mastr.xml_download.utils_download_bulk import download_xml_Mastr
@@ -21,8 +25,17 @@ from open_mastr.utils.helpers import (
     transform_date_parameter,
     data_to_include_tables,
     create_db_query,
+    create_select_query,
+    read_select_query,
     db_query_to_csv,
     reverse_fill_basic_units,
+    create_secondary_indexes,
+    analyze_database,
+    refresh_capacity_statistics,
+    query_capacity_statistics,
+    create_spatial_indexes,
+    create_bbox_query,
+    haversine_distance,
 )
 from open_mastr.utils.config import (
     create_data_dir,
@@ -30,7 +43,10 @@ from open_mastr.utils.config import (
     get_project_home_dir,
     get_output_dir,
     setup_logger,
+    setup_project_home,
 )
+from open_mastr.utils.metrics import MetricsCollector, get_metrics, use_metrics
+from open_mastr.utils.profiling import get_profile_dir, profile_stages
 import open_mastr.utils.orm as orm
 
 # import initialize_database dependencies
@@ -38,10 +54,17 @@ from open_mastr.utils.helpers import (
     create_database_engine,
     rename_table,
     create_translated_database_engine,
+    copy_sqlite_database,
+    create_translated_views,
+    drop_translated_views,
 )
 
 # constants
-from open_mastr.utils.constants import TECHNOLOGIES, ADDITIONAL_TABLES
+from open_mastr.utils.constants import (
+    TECHNOLOGIES,
+    ADDITIONAL_TABLES,
+    EARTH_RADIUS_KM,
+)
 
 # setup logger
 log = setup_logger()
@@ -78,6 +101,7 @@ class Mastr:
 
     def __init__(self, engine="sqlite", connect_to_translated_db=False) -> None:
         validate_parameter_format_for_mastr_init(engine)
+        setup_project_home()
 
         self.output_dir = get_output_dir()
         self.home_directory = get_project_home_dir()
@@ -107,13 +131,16 @@ class Mastr:
         data=None,
         date=None,
         bulk_cleansing=True,
+        bulk_cache=False,
         api_processes=None,
         api_limit=50,
         api_chunksize=1000,
         api_data_types=None,
         api_location_types=None,
+        metrics=None,
+        profile=None,
         **kwargs,
-    ) -> None:
+    ):
         """
         Download the MaStR either via the bulk download or via the MaStR API and write it to a
         SQLite database.
@@ -168,6 +195,11 @@ class Mastr:
             In its original format, many entries in the MaStR are encoded with IDs. Columns like
             `state` or `fueltype` do not contain entries such as "Hessen" or "Braunkohle", but instead
             only contain IDs. Cleansing replaces these IDs with their corresponding original entries.
+        bulk_cache : bool, optional
+            If set to True, the parsed and cleansed table of each xml file is stored in
+            `<output_dir>/data/xml_cache` and reused when a later bulk download contains the
+            identical file, so unchanged tables are not parsed again. Only the latest version
+            of each file is kept. Defaults to False.
         api_processes : int or None or "max", optional
             Number of parallel processes used to download additional data.
             Defaults to `None`. If set to "max", the maximum number of possible processes
@@ -193,8 +225,52 @@ class Mastr:
             Select the type of location that should be retrieved. Choose from
             "location_elec_generation", "location_elec_consumption", "location_gas_generation",
             "location_gas_consumption". Defaults to all.
+        metrics : bool or `open_mastr.utils.metrics.MetricsCollector` or None, optional
+            If True or a collector, timings of each stage, SOAP call, mirror write
+            and table as well as the number of rows, bytes, retries, skipped
+            duplicates and coerced values per table are collected during the
+            download. Defaults to None, where no metrics are collected.
+        profile : bool or str or None, optional
+            If True, each table and stage is profiled with `cProfile`. One
+            `<table>.prof` file per table is written to a new folder in
+            `<output_dir>/profiles` and the top hotspots are printed at the end.
+            A string is used as the folder for the profiles. Defaults to None,
+            where the environment variable `OPEN_MASTR_PROFILE` decides.
+
+        Returns
+        -------
+        `open_mastr.utils.metrics.RunSummary` or None
+            Summary of the collected metrics if `metrics` is given, otherwise None.
         """
 
+        profile_dir = get_profile_dir(profile, self.output_dir)
+        if metrics or profile_dir:
+            collector = MetricsCollector() if metrics is True else metrics
+            with ExitStack() as stack:
+                if collector:
+                    stack.enter_context(use_metrics(collector))
+                if profile_dir:
+                    stack.enter_context(profile_stages(profile_dir))
+                self.download(
+                    method=method,
+                    data=data,
+                    date=date,
+                    bulk_cleansing=bulk_cleansing,
+                    bulk_cache=bulk_cache,
+                    api_processes=api_processes,
+                    api_limit=api_limit,
+                    api_chunksize=api_chunksize,
+                    api_data_types=api_data_types,
+                    api_location_types=api_location_types,
+                    profile=False,
+                    **kwargs,
+                )
+            if not collector:
+                return None
+            summary = collector.summary()
+            log.info(f"Download finished: {summary}")
+            return summary
+
         if self.is_translated:
             raise TypeError(
                 "You are currently connected to a translated database.\n"
@@ -224,76 +300,366 @@ class Mastr:
 
         date = transform_date_parameter(self, method, date, **kwargs)
 
-        if method == "bulk":
-            # Find the name of the zipped xml folder
-            bulk_download_date = parse_date_string(date)
-            xml_folder_path = os.path.join(self.output_dir, "data", "xml_download")
-            os.makedirs(xml_folder_path, exist_ok=True)
-            zipped_xml_file_path = os.path.join(
-                xml_folder_path,
-                f"Gesamtdatenexport_{bulk_download_date}.zip",
-            )
-            download_xml_Mastr(zipped_xml_file_path, date, xml_folder_path)
-
-            write_mastr_xml_to_database(
-                engine=self.engine,
-                zipped_xml_file_path=zipped_xml_file_path,
-                data=data,
-                bulk_cleansing=bulk_cleansing,
-                bulk_download_date=bulk_download_date,
-            )
+        # Translated views depend on the tables, which might be replaced
+        translated_views = drop_translated_views(self.engine)
 
-        if method == "API":
-            validate_api_credentials()
+        try:
+            if method == "bulk":
+                # Find the name of the zipped xml folder
+                bulk_download_date = parse_date_string(date)
+                xml_folder_path = os.path.join(self.output_dir, "data", "xml_download")
+                os.makedirs(xml_folder_path, exist_ok=True)
+                zipped_xml_file_path = os.path.join(
+                    xml_folder_path,
+                    f"Gesamtdatenexport_{bulk_download_date}.zip",
+                )
+                download_xml_Mastr(zipped_xml_file_path, date, xml_folder_path)
+
+                write_mastr_xml_to_database(
+                    engine=self.engine,
+                    zipped_xml_file_path=zipped_xml_file_path,
+                    data=data,
+                    bulk_cleansing=bulk_cleansing,
+                    bulk_download_date=bulk_download_date,
+                    cache_dir=(
+                        os.path.join(self.output_dir, "data", "xml_cache")
+                        if bulk_cache
+                        else None
+                    ),
+                )
 
-            # Set api_processes to None in order to avoid the malfunctioning usage
-            if api_processes:
-                api_processes = None
-                print(
-                    "Warning: The implementation of parallel processes "
-                    "is currently under construction. Please let "
-                    "the argument api_processes at the default value None."
+                # Indexes are created after the tables are filled
+                self.optimize()
+
+            if method == "API":
+                validate_api_credentials()
+
+                # Set api_processes to None in order to avoid the malfunctioning usage
+                if api_processes:
+                    api_processes = None
+                    print(
+                        "Warning: The implementation of parallel processes "
+                        "is currently under construction. Please let "
+                        "the argument api_processes at the default value None."
+                    )
+
+                print_api_settings(
+                    harmonisation_log=harm_log,
+                    data=data,
+                    date=date,
+                    api_data_types=api_data_types,
+                    api_chunksize=api_chunksize,
+                    api_limit=api_limit,
+                    api_processes=api_processes,
+                    api_location_types=api_location_types,
                 )
 
-            print_api_settings(
-                harmonisation_log=harm_log,
-                data=data,
-                date=date,
-                api_data_types=api_data_types,
-                api_chunksize=api_chunksize,
-                api_limit=api_limit,
-                api_processes=api_processes,
-                api_location_types=api_location_types,
+                mastr_mirror = MaStRMirror(
+                    engine=self.engine,
+                    parallel_processes=api_processes,
+                    restore_dump=None,
+                )
+                # Download basic unit data
+                mastr_mirror.backfill_basic(data, limit=api_limit, date=date)
+
+                # Download additional unit data
+                for tech in data:
+                    # mastr_mirror.create_additional_data_requests(data)
+                    for data_type in api_data_types:
+                        mastr_mirror.retrieve_additional_data(
+                            tech, data_type, chunksize=api_chunksize, limit=api_limit
+                        )
+
+                # Download basic location data
+                mastr_mirror.backfill_locations_basic(limit=api_limit, date="latest")
+
+                # Download extended location data
+                if api_location_types:
+                    for location_type in api_location_types:
+                        mastr_mirror.retrieve_additional_location_data(
+                            location_type, limit=api_limit
+                        )
+
+            # Statistics and spatial indexes of the downloaded technologies are rebuilt
+            downloaded_technologies = [tech for tech in data if tech in TECHNOLOGIES]
+            refresh_capacity_statistics(
+                technology=downloaded_technologies, engine=self.engine
             )
+            create_spatial_indexes(self.engine, technology=downloaded_technologies)
+        finally:
+            # Recreate the translated views even if the download failed
+            if translated_views:
+                create_translated_views(self.engine)
+
+    def optimize(self) -> None:
+        """
+        Prepare the database for fast queries.
+
+        Creates missing indexes on the columns that are used to join and filter
+        tables, e.g. `EegMastrNummer` or `DatumLetzteAktualisierung`, and updates
+        the statistics of the query planner with `ANALYZE`.
+        This is done automatically after the bulk download. Indexes are not
+        created before, as they slow down writing the data.
 
-            mastr_mirror = MaStRMirror(
-                engine=self.engine,
-                parallel_processes=api_processes,
-                restore_dump=None,
+        !!! example
+
+            ```python
+            from open_mastr import Mastr
+
+            db = Mastr()
+            db.optimize()
+            ```
+        """
+        created_indexes = create_secondary_indexes(self.engine)
+        log.info(f"Created {len(created_indexes)} indexes")
+        analyze_database(self.engine)
+
+    def query(
+        self,
+        data: str,
+        columns: list = None,
+        where: dict = None,
+        since=None,
+        limit: int = None,
+        chunksize: int = None,
+        dtype_backend: str = "numpy_nullable",
+    ):
+        """
+        Read selected columns and rows of a table into a pandas.DataFrame.
+
+        Columns and conditions are translated to SQL, so only the requested
+        data is read from the database. For technologies, the extended unit
+        table is used and EEG, KWK and permit data is joined only if one of
+        its columns is requested.
+
+        Parameters
+        ----------
+        data : str
+            A technology like "solar" or an additional table like "permit",
+            see [`to_csv`][open_mastr.Mastr.to_csv].
+        columns : list or None, optional
+            Columns to read. A column of the joined EEG, KWK or permit data
+            that also exists in the unit table is selected with the suffix of
+            the csv export, e.g. "Meldedatum_eeg". Defaults to all columns of
+            the unit table.
+        where : dict or None, optional
+            Conditions keyed by column name. Values are compared for equality,
+            a list is a set of allowed values and a tuple `(operator, value)`
+            uses one of `==`, `!=`, `<`, `<=`, `>`, `>=`, `in`, `not in`, `like`.
+        since : datetime.datetime or str or None, optional
+            Only read rows updated after this date.
+        limit : int or None, optional
+            Limits the number of rows.
+        chunksize : int or None, optional
+            If given, an iterator over DataFrames with at most `chunksize`
+            rows is returned.
+        dtype_backend : {"numpy_nullable", "pyarrow"}, optional
+            Backend of the column dtypes. "pyarrow" returns Arrow-backed
+            DataFrames and requires the package `pyarrow`.
+            Defaults to "numpy_nullable".
+
+        Returns
+        -------
+        pandas.DataFrame or iterator of pandas.DataFrame
+
+        !!! example
+
+            ```python
+            from open_mastr import Mastr
+
+            db = Mastr()
+            df = db.query(
+                data="solar",
+                columns=["EinheitMastrNummer", "Bruttoleistung", "Landkreis"],
+                where={"Bundesland": "Bayern", "Bruttoleistung": (">", 100)},
+                since="2023-01-01",
             )
-            # Download basic unit data
-            mastr_mirror.backfill_basic(data, limit=api_limit, date=date)
-
-            # Download additional unit data
-            for tech in data:
-                # mastr_mirror.create_additional_data_requests(data)
-                for data_type in api_data_types:
-                    mastr_mirror.retrieve_additional_data(
-                        tech, data_type, chunksize=api_chunksize, limit=api_limit
-                    )
+            ```
+        """
+        statement = create_select_query(
+            data=data, columns=columns, where=where, since=since, limit=limit
+        )
+        return read_select_query(
+            statement, self.engine, chunksize=chunksize, dtype_backend=dtype_backend
+        )
+
+    def stats(self, data=None, by="Bundesland", where=None, refresh=False):
+        """
+        Sum up the number of units and their capacity by region, energy carrier
+        and year of commissioning.
 
-            # Download basic location data
-            mastr_mirror.backfill_locations_basic(limit=api_limit, date="latest")
+        The statistics are pre-aggregated at the end of each
+        [`download`][open_mastr.Mastr.download] for the states (`Bundesland`),
+        districts (`Landkreis`) and municipalities (`Gemeindeschluessel`), so
+        they are answered without reading the unit tables. Other dimensions,
+        e.g. `Lage` of solar units, are aggregated from the unit tables.
 
-            # Download extended location data
-            if api_location_types:
-                for location_type in api_location_types:
-                    mastr_mirror.retrieve_additional_location_data(
-                        location_type, limit=api_limit
-                    )
+        Parameters
+        ----------
+        data : str or list or None, optional
+            Technologies to include, e.g. "solar". Defaults to all technologies.
+        by : str or list, optional
+            Dimensions to group by. Pre-aggregated are "Bundesland", "Landkreis",
+            "Gemeindeschluessel", "Energietraeger" and "Inbetriebnahmejahr".
+            Use "technology" to group by technology. Defaults to "Bundesland".
+        where : dict or None, optional
+            Conditions keyed by dimension, see [`query`][open_mastr.Mastr.query].
+        refresh : bool, optional
+            If `True`, the statistics are aggregated again before the query,
+            e.g. after changing the unit tables yourself. Defaults to `False`.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Columns of `by` along with "Anzahl", "Bruttoleistung" and
+            "Nettonennleistung".
+
+        !!! example
+
+            ```python
+            from open_mastr import Mastr
+
+            db = Mastr()
+            db.download(data="solar")
+
+            db.stats(data="solar", by=["Bundesland", "Inbetriebnahmejahr"])
+            # Drill down to the districts of a state
+            db.stats(data="solar", by="Landkreis", where={"Bundesland": "Bayern"})
+            ```
+        """
+        if self.is_translated:
+            raise TypeError(
+                "You are currently connected to a translated database.\n"
+                "Statistics are only available for the original database."
+            )
+        if data is None:
+            data = TECHNOLOGIES
+        data = [data] if isinstance(data, str) else list(data)
+        by = [by] if isinstance(by, str) else list(by)
+        for tech in data:
+            if tech not in TECHNOLOGIES:
+                raise ValueError(f"Allowed values for 'data' are {TECHNOLOGIES}.")
+
+        if refresh:
+            refresh_capacity_statistics(technology=data, engine=self.engine)
+
+        return query_capacity_statistics(
+            technology=data, by=by, engine=self.engine, where=where
+        )
+
+    def within_bbox(
+        self, min_lat, min_lon, max_lat, max_lon, data=None, columns=None
+    ) -> pd.DataFrame:
+        """
+        Read the units within a bounding box.
+
+        The spatial indexes that are built at the end of each
+        [`download`][open_mastr.Mastr.download] are used, so only the units
+        within the bounding box are read from the database. No PostGIS is
+        required.
+
+        Parameters
+        ----------
+        min_lat, min_lon, max_lat, max_lon : float
+            Bounds of the box in degrees (WGS84).
+        data : str or list or None, optional
+            Technologies to include, e.g. "wind". Defaults to all technologies.
+        columns : list or None, optional
+            Columns of the extended tables to read along with the coordinates.
+            Defaults to `["EinheitMastrNummer", "Bruttoleistung"]`.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The units with their technology.
+
+        !!! example
+
+            ```python
+            from open_mastr import Mastr
+
+            db = Mastr()
+            df = db.within_bbox(52.3, 13.0, 52.7, 13.8, data="wind")
+            ```
+        """
+        return self._read_bbox(
+            (min_lat, min_lon, max_lat, max_lon), data=data, columns=columns
+        )
+
+    def nearby(self, lat, lon, radius_km, data=None, columns=None) -> pd.DataFrame:
+        """
+        Read the units within a radius around a location, sorted by distance.
+
+        The units within the bounding box of the circle are read with
+        [`within_bbox`][open_mastr.Mastr.within_bbox], then the great-circle
+        distance is calculated for each unit.
+
+        Parameters
+        ----------
+        lat, lon : float
+            Coordinates of the location in degrees (WGS84).
+        radius_km : float
+            Radius in km.
+        data : str or list or None, optional
+            Technologies to include, e.g. "wind". Defaults to all technologies.
+        columns : list or None, optional
+            Columns of the extended tables to read along with the coordinates.
+            Defaults to `["EinheitMastrNummer", "Bruttoleistung"]`.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The units with their technology and distance in the column
+            `distance_km`.
+
+        !!! example
+
+            ```python
+            from open_mastr import Mastr
+
+            db = Mastr()
+            df = db.nearby(lat=52.52, lon=13.40, radius_km=5, data="solar")
+            ```
+        """
+        lat_delta = np.degrees(radius_km / EARTH_RADIUS_KM)
+        lon_delta = lat_delta / max(np.cos(np.radians(lat)), 1e-6)
+        bbox = (lat - lat_delta, lon - lon_delta, lat + lat_delta, lon + lon_delta)
+        df = self._read_bbox(bbox, data=data, columns=columns)
+
+        df["distance_km"] = haversine_distance(
+            lat, lon, df["Breitengrad"], df["Laengengrad"]
+        )
+        df = df[df["distance_km"] <= radius_km]
+        return df.sort_values("distance_km", ignore_index=True)
+
+    def _read_bbox(self, bbox, data=None, columns=None) -> pd.DataFrame:
+        if self.is_translated:
+            raise TypeError(
+                "You are currently connected to a translated database.\n"
+                "Spatial queries are only available for the original database."
+            )
+        if data is None:
+            data = TECHNOLOGIES
+        data = [data] if isinstance(data, str) else list(data)
+        if not data or any(tech not in TECHNOLOGIES for tech in data):
+            raise ValueError(f"Allowed values for 'data' are {TECHNOLOGIES}.")
+
+        with self.engine.connect() as connection:
+            frames = [
+                pd.read_sql(
+                    create_bbox_query(tech, bbox, self.engine, columns=columns),
+                    con=connection,
+                )
+                for tech in data
+            ]
+        return pd.concat([frame for frame in frames if not frame.empty] or frames)
 
     def to_csv(
-        self, tables: list = None, chunksize: int = 500000, limit: int = None
+        self,
+        tables: list = None,
+        chunksize: int = 500000,
+        limit: int = None,
+        profile=None,
     ) -> None:
         """
         Save the database as csv files along with the metadata file.
@@ -313,8 +679,20 @@ class Mastr:
             Default value is 500.000 rows to include in each chunk.
         limit: None or int
             Limits the number of exported data rows.
+        profile: bool or str or None
+            Profile the export of each table, see
+            [`download`][open_mastr.Mastr.download]. Defaults to None, where the
+            environment variable `OPEN_MASTR_PROFILE` decides.
         """
 
+        profile_dir = get_profile_dir(profile, self.output_dir)
+        if profile_dir:
+            with profile_stages(profile_dir):
+                self.to_csv(
+                    tables=tables, chunksize=chunksize, limit=limit, profile=False
+                )
+            return
+
         if self.is_translated:
             raise TypeError(
                 "You are currently connected to a translated database.\n"
@@ -358,7 +736,10 @@ class Mastr:
 
         log.info(f"Tables are saved to: {data_path}")
 
-        reverse_fill_basic_units(technology=technologies_to_export, engine=self.engine)
+        with get_metrics().timer("reverse_fill", table="basic_units"):
+            reverse_fill_basic_units(
+                technology=technologies_to_export, engine=self.engine
+            )
 
         # Export technologies to csv
         for tech in technologies_to_export:
@@ -381,7 +762,7 @@ class Mastr:
         # Configure and save data package metadata file along with data
         # save_metadata(data=technologies_to_export, engine=self.engine)
 
-    def translate(self) -> None:
+    def translate(self, copy=False, views=False) -> None:
         """
         A database can be translated only once.
 
@@ -390,6 +771,23 @@ class Mastr:
         Translates currently connected database,renames it with '-translated'
         suffix and updates self.engine's path accordingly.
 
+        Each table is translated in a single transaction. Tables that can't be
+        translated keep their original column names and are reported in the log.
+        For other databases than SQLite, the tables are translated in place.
+
+        Parameters
+        ----------
+        copy : bool, optional
+            If `True`, the translation is done on a copy of the SQLite database
+            and the original file is kept untouched. Only for 'sqlite'-type engines.
+            Defaults to `False`.
+        views : bool, optional
+            If `True`, the database itself is not translated. Instead, a view
+            `en_<table>` with translated column names is created for each table,
+            e.g. `en_wind_extended`. The views are updated after each
+            [`download`][open_mastr.Mastr.download], so the database can still
+            be updated and exported. Defaults to `False`.
+
         !!! example
             ```python
 
@@ -404,35 +802,70 @@ class Mastr:
             print(df.head(10))
             ```
 
+            Keep the original database and query translated views instead
+            ```python
+
+            db = Mastr()
+            db.translate(views=True)
+
+            df = pd.read_sql(sql='en_biomass_extended', con=db.engine)
+            ```
+
         """
 
-        if "sqlite" not in self.engine.dialect.name:
-            raise ValueError("engine has to be of type 'sqlite'")
+        is_sqlite = "sqlite" in self.engine.dialect.name
+        if copy and not is_sqlite:
+            raise ValueError("copy=True requires an engine of type 'sqlite'")
         if self.is_translated:
             raise TypeError("The currently connected database is already translated.")
 
-        inspector = inspect(self.engine)
-        old_path = r"{}".format(self.engine.url.database)
-        new_path = old_path[:-3] + "-translated.db"
+        if views:
+            created_views = create_translated_views(self.engine)
+            log.info(f"Created {len(created_views)} views with translated column names")
+            return
 
-        if os.path.exists(new_path):
-            try:
-                os.remove(new_path)
-            except Exception as e:
-                print(f"An error occurred: {e}")
+        engine = self.engine
+        if is_sqlite:
+            old_path = r"{}".format(self.engine.url.database)
+            new_path = old_path[:-3] + "-translated.db"
+
+            if os.path.exists(new_path):
+                try:
+                    os.remove(new_path)
+                except Exception as e:
+                    print(f"An error occurred: {e}")
 
-            print("Replacing previous version of the translated database...")
+                print("Replacing previous version of the translated database...")
 
+            if copy:
+                copy_sqlite_database(old_path, new_path)
+                engine = create_engine(f"sqlite:///{new_path}")
+
+        inspector = inspect(engine)
+        failed_tables = []
         for table in inspector.get_table_names():
-            rename_table(table, inspector.get_columns(table), self.engine)
+            try:
+                rename_table(table, inspector.get_columns(table), engine)
+            except SQLAlchemyError as e:
+                log.error(f"Table '{table}' could not be translated: {e}")
+                failed_tables.append(table)
+
+        if failed_tables:
+            log.error(f"The tables {failed_tables} keep their original column names.")
+
+        if not is_sqlite:
+            self.is_translated = True
+            return
 
         self.engine.dispose()
+        engine.dispose()
 
-        try:
-            os.rename(old_path, new_path)
-            print(f"Database '{old_path}' changed to '{new_path}'")
-        except Exception as e:
-            print(f"An error occurred: {e}")
+        if not copy:
+            try:
+                os.rename(old_path, new_path)
+                print(f"Database '{old_path}' changed to '{new_path}'")
+            except Exception as e:
+                print(f"An error occurred: {e}")
 
         self.engine = create_engine(f"sqlite:///{new_path}")
         self.is_translated = True
@@ -2,28 +2,94 @@ import json
 import logging
 import multiprocessing
 import os
+import shutil
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from itertools import product
+from urllib.parse import urljoin, urlparse
 
 import pandas as pd
 import requests
+from lxml import etree
 from open_mastr.utils import credentials as cred
 from open_mastr.utils.config import (
     create_data_dir,
     get_data_version_dir,
     get_filenames,
+    get_project_home_dir,
     setup_logger,
 )
+from open_mastr.utils.metrics import get_metrics
 from tqdm import tqdm
 from zeep import Client, Settings
 from zeep.cache import SqliteCache
-from zeep.exceptions import Fault, XMLParseError
+from zeep.exceptions import Fault, TransportError, XMLParseError
 from zeep.helpers import serialize_object
 from zeep.transports import Transport
+from zeep.xsd.types.simple import AnySimpleType
 
 log = setup_logger()
 
+WSDL_URL = "https://www.marktstammdatenregister.de/MaStRAPI/wsdl/mastr.wsdl"
+MASTR_SERVICE_NAME = "Marktstammdatenregister"
+
+# zeep clients are expensive to build because the WSDL and all schemas are parsed.
+# They are built once per process and shared by all MaStRAPI instances. Worker
+# processes created by fork inherit the already parsed clients.
+_mastr_clients = {}
+_mastr_clients_lock = threading.Lock()
+
+# List functions whose responses can be parsed from raw XML, see
+# `MaStRAPI(raw_xml=True)`
+RAW_XML_LIST_FUNCTIONS = {
+    "GetListeAlleEinheiten": "Einheiten",
+    "GetGefilterteListeStromErzeuger": "Einheiten",
+}
+
+XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+
+# Rules of `flatten_dict`. Nested entries replaced by the value of one of their keys
+FLATTEN_RULE_REPLACE = {
+    "Hausnummer": "Wert",
+    "Kraftwerksnummer": "Wert",
+    "Weic": "Wert",
+    "WeitereBrennstoffe": "Wert",
+    "WeitererHauptbrennstoff": "Wert",
+    "AnlagenkennzifferAnlagenregister": "Wert",
+    "VerhaeltnisErtragsschaetzungReferenzertrag": "Wert",
+    "VerhaeltnisReferenzertragErtrag10Jahre": "Wert",
+    "VerhaeltnisReferenzertragErtrag15Jahre": "Wert",
+    "VerhaeltnisReferenzertragErtrag5Jahre": "Wert",
+    "RegistrierungsnummerPvMeldeportal": "Wert",
+    "BiogasGaserzeugungskapazitaet": "Wert",
+    "BiomethanErstmaligerEinsatz": "Wert",
+    "Frist": "Wert",
+    "WasserrechtAblaufdatum": "Wert",
+}
+# Lists of linked units replaced by a comma-separated string of their identifiers
+FLATTEN_RULE_REPLACE_LIST = {
+    "VerknuepfteEinheit": "MaStRNummer",
+    "VerknuepfteEinheiten": "MaStRNummer",
+    "Netzanschlusspunkte": "NetzanschlusspunktMastrNummer",
+}
+# Lists of strings replaced by a comma-separated string or None if empty
+FLATTEN_RULE_NONE_IF_EMPTY_LIST = [
+    "ArtDerFlaeche",
+    "WeitereBrennstoffe",
+    "VerknuepfteErzeugungseinheiten",
+]
+# Entries serialized to JSON because of their unknown number of sub-entries
+FLATTEN_RULE_SERIALIZE = ["Ertuechtigung"]
+# Entries split into '<name>Id' and their 'Wert'
+FLATTEN_RULE_MOVE_UP_AND_MERGE = ["Hersteller"]
+
+# Maximum number of rows returned by MaStR list functions
+BASIC_DATA_CHUNKSIZE = 2000
+
 
 class MaStRAPI(object):
     """
@@ -70,7 +136,9 @@ class MaStRAPI(object):
         wrapped SOAP queries. This is handled internally.
     """
 
-    def __init__(self, user=None, key=None, service_port="Anlage"):
+    def __init__(
+        self, user=None, key=None, service_port="Anlage", wsdl=None, raw_xml=False
+    ):
         """
         Parameters
         ----------
@@ -86,14 +154,34 @@ class MaStRAPI(object):
             full list:
             https://www.marktstammdatenregister.de/MaStRHilfe/subpages/webdienst.html
             Defaults to "Anlage".
+        wsdl : str , optional
+            Path or URL of the WSDL file. Defaults to `None` which uses the
+            local copy created by `update_local_wsdl` and falls back to the live
+            WSDL at marktstammdatenregister.de if no local copy is available.
+        raw_xml : bool , optional
+            If `True`, responses of the list functions in `RAW_XML_LIST_FUNCTIONS`
+            are parsed directly from the XML response with lxml and returned
+            already flattened, see [`flatten_dict`][open_mastr.soap_api.download.flatten_dict].
+            This skips the construction of zeep objects and is considerably faster
+            for large pages. Defaults to `False`.
         """
 
         # Bind MaStR SOAP API functions as instance methods
-        client, client_bind = _mastr_bindings(service_port=service_port)
+        client, client_bind = _mastr_bindings(service_port=service_port, wsdl=wsdl)
 
         # First, all services of registered service_port (i.e. 'Anlage')
         for n, f in client_bind:
-            setattr(self, n, self._mastr_wrapper(f))
+            if raw_xml and n in RAW_XML_LIST_FUNCTIONS:
+                setattr(
+                    self,
+                    n,
+                    self._mastr_wrapper(
+                        _raw_xml_list_function(client, client_bind, service_port, n),
+                        serialize=False,
+                    ),
+                )
+            else:
+                setattr(self, n, self._mastr_wrapper(f))
 
         # Second, general functions like 'GetLokaleUhrzeit'
         for n, f in client.service:
@@ -107,24 +195,29 @@ class MaStRAPI(object):
         self._user = user if user else cred.get_mastr_user()
         self._key = key if key else cred.get_mastr_token(self._user)
 
-    def _mastr_wrapper(self, soap_func):
+    def _mastr_wrapper(self, soap_func, serialize=True):
         """
         Decorates MaStR SOAP API methods with a wrapper automatically passing
         credentials and serializing return value
         """
+        operation = getattr(soap_func, "__name__", None)
 
         @wraps(soap_func)
         def wrapper(*args, **kwargs):
             kwargs.setdefault("apiKey", self._key)
             kwargs.setdefault("marktakteurMastrNummer", self._user)
+            metrics = get_metrics()
 
             # Catch weird MaStR SOAP response
             try:
-                response = soap_func(*args, **kwargs)
+                with metrics.timer("soap_call", operation=operation):
+                    response = soap_func(*args, **kwargs)
             except Fault:
+                metrics.increment("retries")
                 time.sleep(1.5)
                 try:
-                    response = soap_func(*args, **kwargs)
+                    with metrics.timer("soap_call", operation=operation):
+                        response = soap_func(*args, **kwargs)
                 except Fault as e:
                     msg = (
                         (
@@ -140,6 +233,8 @@ class MaStRAPI(object):
                     )
                     raise Fault(msg) from e
 
+            if not serialize:
+                return response
             return serialize_object(response, target_cls=dict)
 
         return wrapper
@@ -147,8 +242,8 @@ class MaStRAPI(object):
 
 def _mastr_bindings(
     service_port,
-    service_name="Marktstammdatenregister",
-    wsdl="https://www.marktstammdatenregister.de/MaStRAPI/wsdl/mastr.wsdl",
+    service_name=MASTR_SERVICE_NAME,
+    wsdl=None,
     max_retries=3,
     pool_connections=100,
     pool_maxsize=100,
@@ -165,8 +260,9 @@ def _mastr_bindings(
     service_name : str
         Service, defined in wsdl file, that is to be used. Parameters is
         passed to zeep.Client.bind
-    wsdl : str
-        Url of wsdl file to be used. Parameters is passed to zeep.Client
+    wsdl : str or None
+        Path or url of wsdl file to be used. Parameters is passed to zeep.Client.
+        Defaults to `None` which uses the bundled wsdl, see :func:`resolve_wsdl`.
     max_retries : int
         Maximum number of retries for a request. Parameters is passed to
         requests.adapters.HTTPAdapter
@@ -190,7 +286,58 @@ def _mastr_bindings(
         and :attr:`service_port`
     """
 
-    wsdl = wsdl
+    client = _mastr_client(
+        wsdl=resolve_wsdl(wsdl),
+        max_retries=max_retries,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        timeout=timeout,
+        operation_timeout=operation_timeout,
+    )
+    client_bind = client.bind(service_name, service_port)
+
+    return client, client_bind
+
+
+def get_wsdl_dir():
+    """
+    Directory of the local copy of the MaStR wsdl, see :func:`update_local_wsdl`
+
+    Returns
+    -------
+    str
+        `$HOME/.open-MaStR/wsdl`
+    """
+    return os.path.join(get_project_home_dir(), "wsdl")
+
+
+def resolve_wsdl(wsdl=None):
+    """
+    Determine the wsdl file used by :class:`MaStRAPI`
+
+    Parameters
+    ----------
+    wsdl : str or None
+        Path or url of a wsdl file. If given, it is returned unchanged.
+
+    Returns
+    -------
+    str
+        The local copy in :func:`get_wsdl_dir` if `wsdl` is `None` and a local
+        copy exists, otherwise the live wsdl at marktstammdatenregister.de.
+    """
+    if wsdl is not None:
+        return wsdl
+
+    local_wsdl = os.path.join(get_wsdl_dir(), "mastr.wsdl")
+    if os.path.isfile(local_wsdl):
+        return local_wsdl
+
+    log.debug(f"No local wsdl found in {get_wsdl_dir()}. Use {WSDL_URL}")
+    return WSDL_URL
+
+
+def _mastr_session(max_retries, pool_connections, pool_maxsize):
     session = requests.Session()
     session.max_redirects = 30
     a = requests.adapters.HTTPAdapter(
@@ -199,19 +346,134 @@ def _mastr_bindings(
         pool_maxsize=pool_maxsize,
     )
     session.mount("https://", a)
-    transport = Transport(
-        cache=SqliteCache(),
-        timeout=timeout,
-        operation_timeout=operation_timeout,
-        session=session,
+    return session
+
+
+def _mastr_client(
+    wsdl, max_retries, pool_connections, pool_maxsize, timeout, operation_timeout
+):
+    """
+    Return the zeep Client for `wsdl`, create it on first use
+
+    The client is cached per process. Parameters are described in
+    :func:`_mastr_bindings`.
+    """
+    key = (
+        wsdl,
+        max_retries,
+        pool_connections,
+        pool_maxsize,
+        timeout,
+        operation_timeout,
     )
-    settings = Settings(strict=False, xml_huge_tree=True)
-    client = Client(wsdl=wsdl, transport=transport, settings=settings)
-    client_bind = client.bind(service_name, service_port)
 
-    _mastr_suppress_parsing_errors(["parse-time-second"])
+    with _mastr_clients_lock:
+        if key not in _mastr_clients:
+            # Local files are not cached by zeep, so only remote documents need a cache
+            is_remote = urlparse(wsdl).scheme in ["http", "https"]
+            transport = Transport(
+                cache=SqliteCache() if is_remote else None,
+                timeout=timeout,
+                operation_timeout=operation_timeout,
+                session=_mastr_session(max_retries, pool_connections, pool_maxsize),
+            )
+            settings = Settings(strict=False, xml_huge_tree=True)
+            client = Client(wsdl=wsdl, transport=transport, settings=settings)
+            _mastr_clients[key] = client
 
-    return client, client_bind
+            _mastr_suppress_parsing_errors(["parse-time-second"])
+
+    return _mastr_clients[key]
+
+
+def _renew_sessions_after_fork():
+    """Give each inherited zeep Client its own HTTP connection pool in a forked child"""
+    global _mastr_clients_lock
+    _mastr_clients_lock = threading.Lock()
+
+    for key, client in _mastr_clients.items():
+        _, max_retries, pool_connections, pool_maxsize, _, _ = key
+        client.transport.session = _mastr_session(
+            max_retries, pool_connections, pool_maxsize
+        )
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_renew_sessions_after_fork)
+
+
+def update_local_wsdl(wsdl=WSDL_URL, target_dir=None):
+    """
+    Download the MaStR wsdl and all imported xsd files to `target_dir`
+
+    References between the documents are rewritten to relative file names, such
+    that the copy can be used offline by :class:`MaStRAPI`. The MaStR release
+    of the copy is written to `VERSION`. Run this after each MaStR release to
+    update the local copy. The files are downloaded to a temporary directory
+    first, so a failed download keeps the previous copy.
+
+    Parameters
+    ----------
+    wsdl : str
+        Url of the wsdl file. Defaults to the live wsdl at marktstammdatenregister.de.
+    target_dir : str or None
+        Directory the files are written to. Defaults to :func:`get_wsdl_dir`,
+        where :class:`MaStRAPI` looks for the local copy.
+    """
+    from open_mastr.xml_download.utils_download_bulk import gen_version
+
+    target_dir = target_dir or get_wsdl_dir()
+    parent_dir = os.path.dirname(os.path.abspath(target_dir))
+    os.makedirs(parent_dir, exist_ok=True)
+    download_dir = tempfile.mkdtemp(prefix=".wsdl-", dir=parent_dir)
+    try:
+        file_names = _download_wsdl_files(wsdl, download_dir)
+        with open(os.path.join(download_dir, "VERSION"), "w") as f:
+            f.write(f"{gen_version()}\n")
+        shutil.rmtree(target_dir, ignore_errors=True)
+        os.replace(download_dir, target_dir)
+    finally:
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+    log.info(f"Saved {len(file_names)} wsdl and xsd files to {target_dir}")
+
+
+def _download_wsdl_files(wsdl, target_dir):
+    """Download `wsdl` and the documents it imports, see :func:`update_local_wsdl`"""
+    from open_mastr.xml_download.utils_download_bulk import USER_AGENT
+
+    location_attributes = {
+        "{http://www.w3.org/2001/XMLSchema}import": "schemaLocation",
+        "{http://www.w3.org/2001/XMLSchema}include": "schemaLocation",
+        "{http://schemas.xmlsoap.org/wsdl/}import": "location",
+    }
+
+    file_names = {wsdl: "mastr.wsdl"}
+    queue = [wsdl]
+    while queue:
+        url = queue.pop()
+        response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=60)
+        response.raise_for_status()
+        tree = etree.fromstring(response.content)
+
+        for node in tree.iter(*location_attributes):
+            attribute = location_attributes[node.tag]
+            location = node.get(attribute)
+            if not location:
+                continue
+            absolute_url = urljoin(url, location)
+            if absolute_url not in file_names:
+                file_name = os.path.basename(urlparse(absolute_url).path)
+                if file_name in file_names.values():
+                    file_name = f"{len(file_names)}_{file_name}"
+                file_names[absolute_url] = file_name
+                queue.append(absolute_url)
+            node.set(attribute, file_names[absolute_url])
+
+        with open(os.path.join(target_dir, file_names[url]), "wb") as f:
+            f.write(etree.tostring(tree, xml_declaration=True, encoding="utf-8"))
+
+    return file_names
 
 
 def _mastr_suppress_parsing_errors(which_errors):
@@ -258,7 +520,7 @@ def _mastr_suppress_parsing_errors(which_errors):
 
 def replace_second_level_keys_with_first_level_data(dic: dict) -> dict:
     """The returned dict from the API call often contains nested dicts. The
-    columns where this happens are defined in flatten_rule_replace. The nested dicts
+    columns where this happens are defined in `FLATTEN_RULE_REPLACE`. The nested dicts
     are replaced by its actual value.
 
     Example:
@@ -276,24 +538,7 @@ def replace_second_level_keys_with_first_level_data(dic: dict) -> dict:
     dict
         Dictionary where nested entries are replaced by data of interest
     """
-    flatten_rule_replace = {
-        "Hausnummer": "Wert",
-        "Kraftwerksnummer": "Wert",
-        "Weic": "Wert",
-        "WeitereBrennstoffe": "Wert",
-        "WeitererHauptbrennstoff": "Wert",
-        "AnlagenkennzifferAnlagenregister": "Wert",
-        "VerhaeltnisErtragsschaetzungReferenzertrag": "Wert",
-        "VerhaeltnisReferenzertragErtrag10Jahre": "Wert",
-        "VerhaeltnisReferenzertragErtrag15Jahre": "Wert",
-        "VerhaeltnisReferenzertragErtrag5Jahre": "Wert",
-        "RegistrierungsnummerPvMeldeportal": "Wert",
-        "BiogasGaserzeugungskapazitaet": "Wert",
-        "BiomethanErstmaligerEinsatz": "Wert",
-        "Frist": "Wert",
-        "WasserrechtAblaufdatum": "Wert",
-    }
-    for k, v in flatten_rule_replace.items():
+    for k, v in FLATTEN_RULE_REPLACE.items():
         if k in dic:
             dic[k] = dic[k][v]
 
@@ -314,13 +559,7 @@ def replace_linked_units_with_unit_identifier(dic: dict) -> dict:
     dict
         Dictionary where linked units are replaced with linked unit identifier (MaStRNummer)
     """
-
-    flatten_rule_replace_list = {
-        "VerknuepfteEinheit": "MaStRNummer",
-        "VerknuepfteEinheiten": "MaStRNummer",
-        "Netzanschlusspunkte": "NetzanschlusspunktMastrNummer",
-    }
-    for k, v in flatten_rule_replace_list.items():
+    for k, v in FLATTEN_RULE_REPLACE_LIST.items():
         if k in dic:
             if len(dic[k]) != 0:
                 mastr_nr_list = [unit[v] for unit in dic[k]]
@@ -345,12 +584,7 @@ def replace_entries_of_type_list(dic: dict) -> dict:
     dict
         Dictionary containing information on single unit without list entries.
     """
-    flatten_rule_none_if_empty_list = [
-        "ArtDerFlaeche",
-        "WeitereBrennstoffe",
-        "VerknuepfteErzeugungseinheiten",
-    ]
-    for k in flatten_rule_none_if_empty_list:
+    for k in FLATTEN_RULE_NONE_IF_EMPTY_LIST:
         if k in dic:
             dic[k] = None if dic[k] == [] else ",".join(dic[k])
     return dic
@@ -370,10 +604,6 @@ def flatten_dict(data: list, serialize_with_json: bool = False) -> list:
     list of dict
         Flattened data dictionary
     """
-    flatten_rule_serialize = ["Ertuechtigung"]
-
-    flatten_rule_move_up_and_merge = ["Hersteller"]
-
     for dic in data:
         dic = replace_second_level_keys_with_first_level_data(dic)
         dic = replace_linked_units_with_unit_identifier(dic)
@@ -381,13 +611,13 @@ def flatten_dict(data: list, serialize_with_json: bool = False) -> list:
         # Serilializes dictionary entries with unknown number of sub-entries into JSON string
         # This affects "Ertuechtigung" in extended unit data of hydro
         if serialize_with_json:
-            for k in flatten_rule_serialize:
+            for k in FLATTEN_RULE_SERIALIZE:
                 if k in dic.keys():
                     dic[k] = json.dumps(dic[k], indent=4, sort_keys=True, default=str)
 
         # Join 'Id' with original key to new column
         # and overwrite original data with 'Wert'
-        for k in flatten_rule_move_up_and_merge:
+        for k in FLATTEN_RULE_MOVE_UP_AND_MERGE:
             if k in dic.keys():
                 dic.update({k + "Id": dic[k]["Id"]})
                 dic.update({k: dic[k]["Wert"]})
@@ -396,6 +626,249 @@ def flatten_dict(data: list, serialize_with_json: bool = False) -> list:
     return data
 
 
+def _list_response_type(client, service_port, name):
+    """
+    Return the xsd type of the response of operation `name`
+
+    The operation is looked up via the service definitions of the parsed wsdl.
+    Returns `None` if the type can't be determined, e.g. because the
+    structure of zeep's wsdl objects changed.
+    """
+    try:
+        service = client.wsdl.services[MASTR_SERVICE_NAME]
+        operation = service.ports[service_port].binding.get(name)
+        return operation.output.body.type
+    except (AttributeError, KeyError, ValueError) as e:
+        log.debug(f"Response type of {name} not available ({e!r})")
+        return None
+
+
+def _raw_xml_list_function(client, client_bind, service_port, name):
+    """
+    Create a function that calls the list function `name` and parses its
+    raw XML response with :func:`parse_list_response`
+
+    If the response type can't be determined, the response is deserialized by
+    zeep and flattened with :func:`flatten_dict` instead.
+    """
+    soap_func = getattr(client_bind, name)
+    category = RAW_XML_LIST_FUNCTIONS[name]
+    response_type = _list_response_type(client, service_port, name)
+
+    if response_type is None:
+
+        @wraps(soap_func)
+        def zeep_func(*args, **kwargs):
+            response = serialize_object(soap_func(*args, **kwargs), target_cls=dict)
+            response[category] = flatten_dict(response.get(category) or [])
+            return response
+
+        return zeep_func
+
+    schema = _xml_response_schema(response_type)
+
+    @wraps(soap_func)
+    def raw_xml_func(*args, **kwargs):
+        with client.settings(raw_response=True):
+            response = soap_func(*args, **kwargs)
+        return parse_list_response(response.content, category, schema)
+
+    return raw_xml_func
+
+
+def _xml_response_schema(xsd_type, path=(), schema=None, repeated=False, max_depth=8):
+    """
+    Map element paths of a zeep response type to the information needed to
+    parse them from raw XML
+
+    Returns
+    -------
+    dict
+        Keys are tuples of element names relative to the response element.
+        Values are tuples of the python conversion function (`None` for complex
+        types), whether the element is repeated and a list of `(name, repeated)`
+        of its child elements.
+    """
+    if schema is None:
+        schema = {}
+    children = []
+    schema[path] = (None, repeated, children)
+    if len(path) >= max_depth:
+        return schema
+    for name, element in getattr(xsd_type, "elements", []):
+        child_path = path + (name,)
+        child_repeated = element.max_occurs != 1
+        children.append((name, child_repeated))
+        if isinstance(element.type, AnySimpleType):
+            schema[child_path] = (element.type.pythonvalue, child_repeated, [])
+        else:
+            _xml_response_schema(
+                element.type, child_path, schema, child_repeated, max_depth
+            )
+    return schema
+
+
+def _xml_local_name(element):
+    return element.tag.rpartition("}")[2]
+
+
+def _xml_element_to_python(element, path, schema):
+    """Convert an lxml element to python types like `serialize_object` does"""
+    if element.get(XSI_NIL) in ("true", "1"):
+        return None
+    convert, _, children = schema.get(path, (None, False, []))
+    if not children and len(element) == 0:
+        if element.text is None or convert is None:
+            return element.text
+        try:
+            return convert(element.text)
+        except (TypeError, ValueError):
+            # zeep returns None for values it can't convert as well
+            return None
+
+    value = {name: [] if repeated else None for name, repeated in children}
+    for child in element.iterchildren(etree.Element):
+        name = _xml_local_name(child)
+        child_path = path + (name,)
+        child_value = _xml_element_to_python(child, child_path, schema)
+        if isinstance(value.get(name), list):
+            value[name].append(child_value)
+        else:
+            value[name] = child_value
+    return value
+
+
+def _xml_child_value(element, path, schema):
+    """
+    Value of the child element `path[-1]` of `element`, i.e.
+    `_xml_element_to_python(element, path[:-1], schema)[path[-1]]` without
+    converting the other children
+    """
+    if element.get(XSI_NIL) in ("true", "1"):
+        return None
+    _, repeated, _ = schema.get(path, (None, False, []))
+    values = [
+        _xml_element_to_python(child, path, schema)
+        for child in element.iterchildren("{*}" + path[-1])
+    ]
+    if repeated:
+        return values
+    return values[-1] if values else None
+
+
+def _list_entry_parser(schema, category):
+    """
+    Build a function that parses one entry of `category` into a flat dict
+
+    The rules of :func:`flatten_dict` are applied while the children of an entry
+    are read, so the columns are produced directly and no nested dicts are built
+    for the flattened columns.
+    """
+    entry_path = (category,)
+    _, _, children = schema.get(entry_path, (None, False, []))
+    defaults = {}
+    list_columns = []
+    for name, repeated in children:
+        if name in FLATTEN_RULE_REPLACE_LIST or (
+            repeated and name not in FLATTEN_RULE_REPLACE
+        ):
+            list_columns.append(name)
+        else:
+            defaults[name] = None
+        if name in FLATTEN_RULE_MOVE_UP_AND_MERGE:
+            defaults[name + "Id"] = None
+
+    def parse_entry(element):
+        entry = dict(defaults)
+        for name in list_columns:
+            entry[name] = []
+
+        for child in element.iterchildren(etree.Element):
+            name = _xml_local_name(child)
+            path = entry_path + (name,)
+            if name in FLATTEN_RULE_REPLACE:
+                entry[name] = _xml_child_value(
+                    child, path + (FLATTEN_RULE_REPLACE[name],), schema
+                )
+            elif name in FLATTEN_RULE_REPLACE_LIST:
+                entry.setdefault(name, []).append(
+                    _xml_child_value(
+                        child, path + (FLATTEN_RULE_REPLACE_LIST[name],), schema
+                    )
+                )
+            elif name in FLATTEN_RULE_MOVE_UP_AND_MERGE:
+                entry[name + "Id"] = _xml_child_value(child, path + ("Id",), schema)
+                entry[name] = _xml_child_value(child, path + ("Wert",), schema)
+            elif isinstance(entry.get(name), list):
+                entry[name].append(_xml_element_to_python(child, path, schema))
+            else:
+                entry[name] = _xml_element_to_python(child, path, schema)
+
+        for name in FLATTEN_RULE_REPLACE_LIST:
+            if name in entry:
+                entry[name] = ", ".join(entry[name])
+        for name in FLATTEN_RULE_NONE_IF_EMPTY_LIST:
+            if isinstance(entry.get(name), list):
+                entry[name] = None if entry[name] == [] else ",".join(entry[name])
+        return entry
+
+    return parse_entry
+
+
+def parse_list_response(content, category, schema):
+    """
+    Parse the raw XML response of a MaStR list function
+
+    Instead of building zeep objects and serializing them afterwards, the SOAP
+    body is parsed with lxml. The entries of `category` are flattened while they
+    are parsed, giving the same result as :func:`flatten_dict`.
+
+    Parameters
+    ----------
+    content : bytes
+        Raw XML response of the MaStR SOAP API
+    category : str
+        Name of the repeated element holding the list entries,
+        e.g. "Einheiten"
+    schema : dict
+        Parsing information as returned by `_xml_response_schema`
+
+    Returns
+    -------
+    dict
+        Response as returned by `serialize_object` with flattened entries
+        in `category`
+    """
+    try:
+        envelope = etree.fromstring(content, parser=etree.XMLParser(huge_tree=True))
+    except etree.XMLSyntaxError as e:
+        raise TransportError(f"Server returned invalid XML: {e}") from e
+
+    body = envelope.find("{*}Body")
+    if body is None or len(body) == 0:
+        raise TransportError("Server returned a response without SOAP body")
+
+    fault = body.find("{*}Fault")
+    if fault is not None:
+        raise Fault(
+            fault.findtext("{*}faultstring") or fault.findtext(".//{*}Text") or ""
+        )
+
+    parse_entry = _list_entry_parser(schema, category)
+    _, _, children = schema.get((), (None, False, []))
+    response = {name: [] if repeated else None for name, repeated in children}
+    response[category] = []
+    for child in body[0].iterchildren(etree.Element):
+        name = _xml_local_name(child)
+        if name == category:
+            response[category].append(parse_entry(child))
+        elif isinstance(response.get(name), list):
+            response[name].append(_xml_element_to_python(child, (name,), schema))
+        else:
+            response[name] = _xml_element_to_python(child, (name,), schema)
+    return response
+
+
 def _missed_units_to_file(data, data_type, missed_units):
     """
     Write IDs of missed units to file
@@ -584,7 +1057,7 @@ class MaStRDownload:
 
         # Check if MaStR credentials are available and otherwise ask
         # for user input
-        self._mastr_api = MaStRAPI()
+        self._mastr_api = MaStRAPI(raw_xml=True)
         self._mastr_api._user = cred.check_and_set_mastr_user()
         self._mastr_api._key = cred.check_and_set_mastr_token(self._mastr_api._user)
 
@@ -734,7 +1207,16 @@ class MaStRDownload:
             else []
         )
 
-    def basic_unit_data(self, data=None, limit=2000, date_from=None, max_retries=3):
+    def basic_unit_data(
+        self,
+        data=None,
+        limit=2000,
+        date_from=None,
+        max_retries=3,
+        concurrency=4,
+        start=None,
+        with_position=False,
+    ):
         """
         Download basic unit information for one data type.
 
@@ -761,6 +1243,18 @@ class MaStRDownload:
             Defaults to `None`.
         max_retries: int, optional
             Maximum number of retries in case of errors with the connection to the server.
+        concurrency: int, optional
+            Number of chunks of 2000 units that are requested at the same time.
+            Defaults to 4.
+        start: dict, optional
+            Index of the first unit to download per energietraeger, e.g.
+            `{"SolareStrahlungsenergie": 10001}`. Use `None` as key if `data` is
+            not given. Used to resume an interrupted download.
+            Defaults to `None` which means all downloads start at 1.
+        with_position: bool, optional
+            If `True`, tuples of energietraeger, start index of the chunk and the
+            list of units are yielded. For chunks that finally failed to download,
+            `None` is yielded instead of the list of units. Defaults to `False`.
 
         Yields
         ------
@@ -768,14 +1262,7 @@ class MaStRDownload:
             A generator of dicts is returned with each dictionary containing
             information about one unit.
         """
-        # Split download of basic unit data in chunks of 2000
-        # Reason: the API limits retrieval of data to 2000 items
-        chunksize = 2000
-        chunks_start = list(range(1, limit + 1, chunksize))
-        limits = [
-            chunksize if (x + chunksize) <= limit else limit - x + 1
-            for x in chunks_start
-        ]
+        start = start or {}
 
         # Deal with or w/o data type being specified
         energietraeger = (
@@ -788,31 +1275,29 @@ class MaStRDownload:
             log.info(
                 f"Get list of units with basic information for data type {data} ({et})"
             )
-            yield from (
-                basic_data_download(
-                    self._mastr_api,
-                    "GetListeAlleEinheiten",
-                    "Einheiten",
-                    chunks_start,
-                    limits,
-                    date_from,
-                    max_retries,
-                    data,
-                    et=et,
-                )
-                if et is None
-                else basic_data_download(
-                    self._mastr_api,
-                    "GetGefilterteListeStromErzeuger",
-                    "Einheiten",
-                    chunks_start,
-                    limits,
-                    date_from,
-                    max_retries,
-                    data,
-                    et=et,
-                )
+            chunks_start, limits = _basic_data_chunks(limit, start.get(et, 1))
+            chunks = basic_data_download(
+                self._mastr_api,
+                (
+                    "GetListeAlleEinheiten"
+                    if et is None
+                    else "GetGefilterteListeStromErzeuger"
+                ),
+                "Einheiten",
+                chunks_start,
+                limits,
+                date_from,
+                max_retries,
+                data,
+                et=et,
+                concurrency=concurrency,
+                with_position=True,
             )
+            for chunk_start, units in chunks:
+                if with_position:
+                    yield et, chunk_start, units
+                elif units is not None:
+                    yield units
 
     def additional_data(self, data, unit_ids, data_fcn, timeout=10):
         """
@@ -1237,7 +1722,15 @@ class MaStRDownload:
 
         return data, missed_ids_tmp
 
-    def basic_location_data(self, limit=2000, date_from=None, max_retries=3):
+    def basic_location_data(
+        self,
+        limit=2000,
+        date_from=None,
+        max_retries=3,
+        concurrency=4,
+        start=1,
+        with_position=False,
+    ):
         """
         Retrieve basic location data in chunks
 
@@ -1262,6 +1755,16 @@ class MaStRDownload:
         max_retries: int, optional
             Maximum number of retries for each chunk in case of errors with the connection to
             the server.
+        concurrency: int, optional
+            Number of chunks of 2000 locations that are requested at the same time.
+            Defaults to 4.
+        start: int, optional
+            Index of the first location to download. Used to resume an interrupted
+            download. Defaults to 1.
+        with_position: bool, optional
+            If `True`, tuples of the start index of the chunk and the list of
+            locations are yielded. For chunks that finally failed to download,
+            `None` is yielded instead of the list of locations. Defaults to `False`.
 
         Yields
         ------
@@ -1281,12 +1784,7 @@ class MaStRDownload:
             ```
         """
         # Prepare indices for chunked data retrieval
-        chunksize = 2000
-        chunks_start = list(range(1, limit + 1, chunksize))
-        limits = [
-            chunksize if (x + chunksize) <= limit else limit - x + 1
-            for x in chunks_start
-        ]
+        chunks_start, limits = _basic_data_chunks(limit, start)
 
         yield from basic_data_download(
             self._mastr_api,
@@ -1296,6 +1794,8 @@ class MaStRDownload:
             limits,
             date_from,
             max_retries,
+            concurrency=concurrency,
+            with_position=with_position,
         )
 
     def daily_contingent(self):
@@ -1307,6 +1807,76 @@ class MaStRDownload:
         )
 
 
+def _basic_data_chunks(limit, start=1, chunksize=BASIC_DATA_CHUNKSIZE):
+    """
+    Split download of basic data from `start` to `limit` in chunks
+
+    Reason: the API limits retrieval of data to 2000 items
+
+    Returns
+    -------
+    tuple of list
+        Start index and limit of each chunk
+    """
+    chunks_start = list(range(start, limit + 1, chunksize))
+    limits = [
+        chunksize if (x + chunksize) <= limit else limit - x + 1 for x in chunks_start
+    ]
+    return chunks_start, limits
+
+
+def _basic_data_window(
+    mastr_api,
+    fcn_name,
+    chunk_start,
+    limit,
+    date_from,
+    max_retries,
+    stop_event,
+    et=None,
+    backoff=5,
+    max_backoff=60,
+):
+    """
+    Query one `startAb` window of a list-returning MaStR function
+
+    Connection errors are retried with an exponentially growing waiting time,
+    starting at `backoff` seconds and capped at `max_backoff` seconds.
+    Waiting is interrupted as soon as `stop_event` is set.
+
+    Returns
+    -------
+    dict or None
+        Response of the MaStR API or `None` if the window finally failed or
+        was cancelled.
+    """
+    for try_number in range(max_retries + 1):
+        if stop_event.is_set():
+            return None
+        try:
+            if et is None:
+                return getattr(mastr_api, fcn_name)(
+                    startAb=chunk_start, limit=limit, datumAb=date_from
+                )
+            return getattr(mastr_api, fcn_name)(
+                energietraeger=et,
+                startAb=chunk_start,
+                limit=limit,
+                datumAb=date_from,
+            )
+        except (
+            requests.exceptions.ConnectionError,
+            Fault,
+            requests.exceptions.ReadTimeout,
+        ) as e:
+            log.debug(
+                f"MaStR SOAP API does not respond properly: {e}. Retry {try_number + 1}"
+            )
+            if try_number < max_retries:
+                stop_event.wait(min(backoff * 2**try_number, max_backoff))
+    return None
+
+
 def basic_data_download(
     mastr_api,
     fcn_name,
@@ -1317,6 +1887,9 @@ def basic_data_download(
     max_retries,
     data=None,
     et=None,
+    concurrency=4,
+    max_failed_windows=3,
+    with_position=False,
 ):
     """
     Helper function for downloading basic data with MaStR list query
@@ -1325,9 +1898,14 @@ def basic_data_download(
     Automatically
 
     * respects limit of 2.000 rows returned by MaStR list functions
+    * queries up to `concurrency` chunks at once and yields them in order
     * stops, if no further data is available
     * nicely integrates dynamic update of tqdm progress bar
 
+    The number of concurrently requested chunks adapts to the server: it is
+    halved each time a chunk finally fails and grows again by one with each
+    successful chunk, up to `concurrency`.
+
     Parameters
     ----------
     mastr_api: :class:`MaStRAPI`
@@ -1352,6 +1930,18 @@ def basic_data_download(
     et: str
         Energietraeger of a data type. Some technologies are subdivided into a list of
         energietraeger. Only relevant if category="Einheiten". Defaults to None.
+    concurrency: int, optional
+        Maximum number of chunks requested at the same time. Up to `concurrency - 1`
+        requests beyond the end of the data might be sent and count against
+        the daily request limit. Defaults to 4.
+    max_failed_windows: int, optional
+        Stop the download after this number of consecutive chunks finally
+        failed. Defaults to 3.
+    with_position: bool, optional
+        If `True`, tuples of the start index of the chunk and the data are
+        yielded. Chunks that finally failed are reported as well, with `None`
+        instead of the data, such that callers know which chunks are missing.
+        Defaults to `False`.
 
     Yields
     ------
@@ -1368,65 +1958,79 @@ def basic_data_download(
 
     pbar = tqdm(desc=description, unit=" units")
 
-    # Iterate over chunks and download data
-    # Results are first collected per 'et' (units_tech) for properly
-    # displaying download progress.
-    # Later, all units of a single data are collected in 'units'
-    for chunk_start, limit_iter in zip(chunks_start, limits):
-        # Use a retry loop to retry on connection errors
-        for try_number in range(max_retries + 1):
-            try:
-                if et is None:
-                    response = getattr(mastr_api, fcn_name)(
-                        startAb=chunk_start, limit=limit_iter, datumAb=date_from
-                    )
-                else:
-                    response = getattr(mastr_api, fcn_name)(
-                        energietraeger=et,
-                        startAb=chunk_start,
-                        limit=limit_iter,
-                        datumAb=date_from,
-                    )
-
-            except (
-                requests.exceptions.ConnectionError,
-                Fault,
-                requests.exceptions.ReadTimeout,
-            ) as e:
-                try_number += 1
-                log.debug(
-                    f"MaStR SOAP API does not respond properly: {e}. Retry {try_number}"
+    concurrency = max(1, concurrency)
+    windows = iter(zip(chunks_start, limits))
+    pending = deque()
+    window_target = concurrency
+    failed_windows = 0
+    stop_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def submit_windows():
+        while len(pending) < window_target:
+            window = next(windows, None)
+            if window is None:
+                return
+            future = executor.submit(
+                _basic_data_window,
+                mastr_api,
+                fcn_name,
+                window[0],
+                window[1],
+                date_from,
+                max_retries,
+                stop_event,
+                et=et,
+            )
+            pending.append((window, future))
+
+    # Chunks are requested concurrently, but consumed strictly in order of
+    # their start index. Results are first collected per 'et' (units_tech)
+    # for properly displaying download progress.
+    try:
+        submit_windows()
+        while pending:
+            (chunk_start, limit_iter), future = pending.popleft()
+            response = future.result()
+
+            if response is None:
+                log.error(
+                    f"Finally failed to download data."
+                    f"Basic unit data of index {chunk_start} to "
+                    f"{chunk_start + limit_iter - 1} will be missing."
                 )
-                time.sleep(5)
-            else:
-                # If it does run into the except clause, break out of the for loop
-                # This also means query was successful
-                units_tech = response[category]
-                yield units_tech
-                pbar.update(len(units_tech))
+                if with_position:
+                    yield chunk_start, None
+                failed_windows += 1
+                if failed_windows >= max_failed_windows:
+                    log.error(
+                        f"{failed_windows} consecutive chunks failed. "
+                        f"Stop downloading basic {category} data."
+                    )
+                    break
+                window_target = max(1, window_target // 2)
+                submit_windows()
+                continue
+
+            failed_windows = 0
+            window_target = min(concurrency, window_target + 1)
+            units_tech = response[category]
+            yield (chunk_start, units_tech) if with_position else units_tech
+            pbar.update(len(units_tech))
+
+            # Stop querying more data, if no further data available
+            if response["Ergebniscode"] != "OkWeitereDatenVorhanden":
+                pbar.total = pbar.n
+                pbar.refresh()
                 break
-        else:
-            log.error(
-                f"Finally failed to download data."
-                f"Basic unit data of index {chunk_start} to "
-                f"{chunk_start + limit_iter - 1} will be missing."
-            )
-            # TODO: this has potential risk! Please change
-            # If the download continuously fails on the last chunk, this query will run forever
-            response = {"Ergebniscode": "OkWeitereDatenVorhanden"}
 
-        # Stop querying more data, if no further data available
-        if response["Ergebniscode"] == "OkWeitereDatenVorhanden":
-            continue
-
-        # Update progress bar and move on with next et or data type
-        pbar.total = pbar.n
-        pbar.refresh()
+            submit_windows()
+    finally:
+        # Cancel windows beyond the end of the data and make sure progress
+        # bar is closed properly
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
         pbar.close()
-        break
-
-    # Make sure progress bar is closed properly
-    pbar.close()
 
 
 if __name__ == "__main__":
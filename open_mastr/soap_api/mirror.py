@@ -1,7 +1,7 @@
 import datetime
 import os
 import pandas as pd
-from sqlalchemy import and_, func
+from sqlalchemy import DateTime, String, and_, func, insert, literal, select
 from sqlalchemy.sql import exists
 import shlex
 import subprocess
@@ -10,14 +10,31 @@ from datetime import date
 from open_mastr.utils.config import (
     setup_logger,
 )
-from open_mastr.soap_api.download import MaStRDownload, flatten_dict
+from open_mastr.soap_api.download import (
+    BASIC_DATA_CHUNKSIZE,
+    MaStRDownload,
+    flatten_dict,
+)
 from open_mastr.utils import orm
-from open_mastr.utils.helpers import session_scope, reverse_unit_type_map
+from open_mastr.utils.helpers import (
+    mark_spatial_index_outdated,
+    reverse_unit_type_map,
+    session_scope,
+)
+from open_mastr.utils.metrics import get_metrics
 
 from open_mastr.utils.constants import ORM_MAP, UNIT_TYPE_MAP
 
 log = setup_logger()
 
+# Columns of basic_units identifying additional data of each data type
+ADDITIONAL_DATA_ID_COLUMNS = {
+    "unit_data": "EinheitMastrNummer",
+    "eeg_data": "EegMastrNummer",
+    "kwk_data": "KwkMastrNummer",
+    "permit_data": "GenMastrNummer",
+}
+
 
 class MaStRMirror:
     """
@@ -166,12 +183,24 @@ class MaStRMirror:
             Maximum number of units.
             Defaults to the large number of 10**8 which means
             all available data is queried. Use with care!
+
+        Notes
+        -----
+        Progress is recorded per data type, energietraeger and `date` in the table
+        `backfill_checkpoints` in the same transaction as the downloaded data.
+        If a backfill is interrupted, calling it again with the same arguments
+        resumes after the last stored chunk. With `date="latest"`, an unfinished
+        backfill is resumed with the date it was started with. If chunks finally
+        fail to download, the checkpoint stays before the first failed chunk and
+        the backfill is not marked as completed, such that it resumes there.
         """
 
         dates = self._get_list_of_dates(date, data)
 
-        for data_type, date in zip(data, dates):
-            self._write_basic_data_for_one_data_type_to_db(data_type, date, limit)
+        for data_type, date_from in zip(data, dates):
+            if date == "latest":
+                date_from = self._get_unfinished_checkpoint_date(data_type, date_from)
+            self._write_basic_data_for_one_data_type_to_db(data_type, date_from, limit)
 
     def backfill_locations_basic(
         self, limit=10**7, date=None, delete_additional_data_requests=True
@@ -209,12 +238,30 @@ class MaStRMirror:
             Useful to speed up download of data. Ignores existence of already created requests
             for additional data and
             skips deletion these.
+
+        Notes
+        -----
+        Like [`backfill_basic`][open_mastr.soap_api.mirror.MaStRMirror.backfill_basic],
+        an interrupted backfill is resumed after the last stored chunk.
         """
 
-        date = self._get_date(date, technology_list=None)
-        locations_basic = self.mastr_dl.basic_location_data(limit, date_from=date)
+        if date == "latest":
+            date = self._get_unfinished_checkpoint_date(
+                "locations", self._get_date(date, technology_list=None)
+            )
+        start = self._start_from_checkpoints("locations", [None], date, limit)
+        locations_basic = self.mastr_dl.basic_location_data(
+            limit, date_from=date, start=start[None], with_position=True
+        )
+        metrics = get_metrics()
+        failed = False
+
+        for chunk_start, locations_chunk in locations_basic:
+            if locations_chunk is None:
+                # Keep the checkpoint before the first failed chunk to resume there
+                failed = True
+                continue
 
-        for locations_chunk in locations_basic:
             # Remove duplicates returned from API
             locations_chunk_unique = [
                 location
@@ -225,8 +272,19 @@ class MaStRMirror:
             locations_unique_ids = [
                 _["LokationMastrNummer"] for _ in locations_chunk_unique
             ]
+            metrics.increment(
+                "rows", len(locations_chunk_unique), table="locations_basic"
+            )
+            metrics.increment(
+                "skipped_duplicates",
+                len(locations_chunk) - len(locations_chunk_unique),
+                table="locations_basic",
+            )
 
-            with session_scope(engine=self._engine) as session:
+            with (
+                metrics.timer("mirror_write", table="locations_basic"),
+                session_scope(engine=self._engine) as session,
+            ):
                 # Find units that are already in the DB
                 common_ids = [
                     _.LokationMastrNummer
@@ -265,13 +323,24 @@ class MaStRMirror:
                     ).delete(
                         synchronize_session="fetch"
                     )
-                    session.commit()
+                    session.flush()
 
                 # Do bulk insert of new data requests
                 session.bulk_insert_mappings(
                     orm.AdditionalLocationsRequested, new_requests
                 )
 
+                # Store progress in the same transaction as the data
+                if not failed:
+                    self._update_checkpoint(
+                        session, "locations", None, date, chunk_start, locations_chunk
+                    )
+
+        if failed:
+            self._log_incomplete_backfill("locations")
+            return
+        self._complete_checkpoints("locations", date)
+
     def retrieve_additional_data(self, data, data_type, limit=10**8, chunksize=1000):
         """
         Retrieve additional unit data
@@ -309,6 +378,11 @@ class MaStRMirror:
         if chunksize > limit:
             chunksize = limit
 
+        metrics = get_metrics()
+        orm_class_name = self.orm_map[data].get(data_type)
+        table_name = (
+            getattr(orm, orm_class_name).__tablename__ if orm_class_name else data_type
+        )
         number_units_queried = 0
         while number_units_queried < limit:
             with session_scope(engine=self._engine) as session:
@@ -336,13 +410,16 @@ class MaStRMirror:
                 number_units_merged = 0
 
                 # Prepare data and add to database table
-                for unit_dat in unit_data:
-                    unit = self._preprocess_additional_data_entry(
-                        unit_dat, data, data_type
-                    )
-                    session.merge(unit)
-                    number_units_merged += 1
-                session.commit()
+                with metrics.timer("mirror_write", table=table_name):
+                    mark_spatial_index_outdated(session.connection(), table_name)
+                    for unit_dat in unit_data:
+                        unit = self._preprocess_additional_data_entry(
+                            unit_dat, data, data_type
+                        )
+                        session.merge(unit)
+                        number_units_merged += 1
+                    session.commit()
+                metrics.increment("rows", number_units_merged, table=table_name)
 
                 log.info(
                     f"Downloaded data for {len(unit_data)} units ({len(requested_ids)} requested). "
@@ -419,6 +496,11 @@ class MaStRMirror:
 
                 # Prepare data and add to database table
                 location_data = flatten_dict(location_data)
+                get_metrics().increment(
+                    "rows",
+                    len(location_data),
+                    table=orm.LocationExtended.__tablename__,
+                )
                 for location_dat in location_data:
                     location_dat = self._add_data_source_and_download_date(location_dat)
                     # Remove query status information from response
@@ -492,8 +574,6 @@ class MaStRMirror:
             Defaults to True.
         """
 
-        data_requests = []
-
         with session_scope(engine=self._engine) as session:
             # Check which additional data is missing
             for data_type in data_types:
@@ -511,43 +591,24 @@ class MaStRMirror:
                             orm.AdditionalDataRequested.technology == technology,
                             orm.AdditionalDataRequested.data_type == data_type,
                         ).delete()
-                        session.commit()
+                        session.flush()
 
-                    # Query database for missing additional data
+                    # Insert requests for missing additional data directly in the database
                     units_for_request = self._get_units_for_request(
                         data_type, session, additional_data_orm, technology
                     )
-
-                    # Prepare data for additional data request
-                    for basic_unit in units_for_request:
-                        data_request = {
-                            "EinheitMastrNummer": basic_unit.EinheitMastrNummer,
-                            "technology": self.unit_type_map[basic_unit.Einheittyp],
-                            "data_type": data_type,
-                            "request_date": datetime.datetime.now(
-                                tz=datetime.timezone.utc
-                            ),
-                        }
-                        if data_type == "unit_data":
-                            data_request[
-                                "additional_data_id"
-                            ] = basic_unit.EinheitMastrNummer
-                        elif data_type == "eeg_data":
-                            data_request[
-                                "additional_data_id"
-                            ] = basic_unit.EegMastrNummer
-                        elif data_type == "kwk_data":
-                            data_request[
-                                "additional_data_id"
-                            ] = basic_unit.KwkMastrNummer
-                        elif data_type == "permit_data":
-                            data_request[
-                                "additional_data_id"
-                            ] = basic_unit.GenMastrNummer
-                        data_requests.append(data_request)
-
-            # Insert new requests for additional data into database
-            session.bulk_insert_mappings(orm.AdditionalDataRequested, data_requests)
+                    session.execute(
+                        insert(orm.AdditionalDataRequested).from_select(
+                            [
+                                "EinheitMastrNummer",
+                                "additional_data_id",
+                                "technology",
+                                "data_type",
+                                "request_date",
+                            ],
+                            units_for_request,
+                        )
+                    )
 
     def _add_data_source_and_download_date(self, entry: dict) -> dict:
         """Adds DatenQuelle = 'APT' and DatumDownload = date.today"""
@@ -678,54 +739,221 @@ class MaStRMirror:
             else:
                 insert.append(entry)
         session.bulk_save_objects([table_class(**u) for u in insert])
-        session.commit()
+        session.flush()
         return insert + updated
 
     def _write_basic_data_for_one_data_type_to_db(self, data, date, limit) -> None:
         log.info(f"Backfill data for data type {data}")
 
+        energietraeger = (
+            self.mastr_dl._unit_data_specs[data]["energietraeger"] if data else [None]
+        )
+        start = self._start_from_checkpoints(data, energietraeger, date, limit)
+
         # Catch weird MaStR SOAP response
-        basic_units = self.mastr_dl.basic_unit_data(data, limit, date_from=date)
+        basic_units = self.mastr_dl.basic_unit_data(
+            data, limit, date_from=date, start=start, with_position=True
+        )
 
+        metrics = get_metrics()
         with session_scope(engine=self._engine) as session:
             log.info(
                 "Insert basic unit data into DB and submit additional data requests"
             )
-            for basic_units_chunk in basic_units:
-                # Insert basic data into database
-                (
-                    extended_data,
-                    eeg_data,
-                    kwk_data,
-                    permit_data,
-                    inserted_and_updated,
-                ) = self._create_data_list_from_basic_units(session, basic_units_chunk)
-
-                # Delete old entries for additional data requests
-                additional_data_table = orm.AdditionalDataRequested.__table__
-                ids_to_delete = [_["EinheitMastrNummer"] for _ in inserted_and_updated]
-                session.execute(
-                    additional_data_table.delete()
-                    .where(
-                        additional_data_table.c.EinheitMastrNummer.in_(ids_to_delete)
+            previous_et = None
+            failed_energietraeger = set()
+            for et, chunk_start, basic_units_chunk in basic_units:
+                if (
+                    et != previous_et
+                    and previous_et is not None
+                    and previous_et not in failed_energietraeger
+                ):
+                    # Energietraeger are downloaded one after another
+                    self._update_checkpoint(session, data, previous_et, date)
+                previous_et = et
+
+                if basic_units_chunk is None:
+                    # Keep the checkpoint before the first failed chunk to resume there
+                    failed_energietraeger.add(et)
+                    continue
+
+                with metrics.timer("mirror_write", table="basic_units"):
+                    # Insert basic data into database
+                    (
+                        extended_data,
+                        eeg_data,
+                        kwk_data,
+                        permit_data,
+                        inserted_and_updated,
+                    ) = self._create_data_list_from_basic_units(
+                        session, basic_units_chunk
                     )
-                    .where(additional_data_table.c.technology == "wind")
-                    .where(
-                        additional_data_table.c.request_date
-                        < datetime.datetime.now(tz=datetime.timezone.utc)
+
+                    # Delete old entries for additional data requests
+                    additional_data_table = orm.AdditionalDataRequested.__table__
+                    ids_to_delete = [
+                        _["EinheitMastrNummer"] for _ in inserted_and_updated
+                    ]
+                    session.execute(
+                        additional_data_table.delete()
+                        .where(
+                            additional_data_table.c.EinheitMastrNummer.in_(
+                                ids_to_delete
+                            )
+                        )
+                        .where(additional_data_table.c.technology == "wind")
+                        .where(
+                            additional_data_table.c.request_date
+                            < datetime.datetime.now(tz=datetime.timezone.utc)
+                        )
                     )
-                )
 
-                # Flush delete statements to database
-                session.commit()
+                    # Flush delete statements to database
+                    session.flush()
+
+                    # Insert new requests for additional data
+                    session.bulk_insert_mappings(
+                        orm.AdditionalDataRequested, extended_data
+                    )
+                    session.bulk_insert_mappings(orm.AdditionalDataRequested, eeg_data)
+                    session.bulk_insert_mappings(orm.AdditionalDataRequested, kwk_data)
+                    session.bulk_insert_mappings(
+                        orm.AdditionalDataRequested, permit_data
+                    )
+
+                    # Store progress and commit it together with the data of this chunk
+                    if et not in failed_energietraeger:
+                        self._update_checkpoint(
+                            session, data, et, date, chunk_start, basic_units_chunk
+                        )
+                    session.commit()
+                metrics.increment("rows", len(basic_units_chunk), table="basic_units")
+
+        if failed_energietraeger:
+            self._log_incomplete_backfill(data)
+            return
+        self._complete_checkpoints(data, date)
+        log.info("Backfill successfully finished")
+
+    def _checkpoint_key(self, data_type, energietraeger, date) -> dict:
+        """Primary key of a checkpoint in table `backfill_checkpoints`"""
+        if isinstance(date, (datetime.date, datetime.datetime)):
+            date = date.isoformat()
+        return {
+            "data_type": data_type or "",
+            "energietraeger": energietraeger or "",
+            "date_from": date or "",
+        }
+
+    def _get_unfinished_checkpoint_date(self, data_type, date):
+        """Returns the date of an unfinished backfill of `data_type`, else `date`."""
+        with session_scope(engine=self._engine) as session:
+            checkpoint = (
+                session.query(orm.BackfillCheckpoint)
+                .filter_by(data_type=data_type or "", completed=False)
+                .order_by(orm.BackfillCheckpoint.update_date.desc())
+                .first()
+            )
+            if checkpoint is None:
+                return date
+            log.info(
+                f"Resume unfinished backfill of {data_type} "
+                f"from {checkpoint.date_from or 'the beginning'}"
+            )
+            return (
+                datetime.datetime.fromisoformat(checkpoint.date_from)
+                if checkpoint.date_from
+                else None
+            )
 
-                # Insert new requests for additional data
-                session.bulk_insert_mappings(orm.AdditionalDataRequested, extended_data)
-                session.bulk_insert_mappings(orm.AdditionalDataRequested, eeg_data)
-                session.bulk_insert_mappings(orm.AdditionalDataRequested, kwk_data)
-                session.bulk_insert_mappings(orm.AdditionalDataRequested, permit_data)
+    def _start_from_checkpoints(self, data_type, energietraeger, date, limit) -> dict:
+        """
+        Returns the start index per energietraeger for backfilling `data_type`.
+
+        If an unfinished backfill with the same `date` exists, finished energietraeger
+        are skipped and unfinished ones resume after the last stored chunk.
+        Otherwise, new checkpoints are created for all energietraeger.
+        """
+        key = self._checkpoint_key(data_type, None, date)
+        key.pop("energietraeger")
+        with session_scope(engine=self._engine) as session:
+            checkpoints = {
+                checkpoint.energietraeger: checkpoint
+                for checkpoint in session.query(orm.BackfillCheckpoint).filter_by(
+                    **key
+                )
+            }
+            if not any(not c.completed for c in checkpoints.values()):
+                # Start a new backfill
+                for checkpoint in checkpoints.values():
+                    session.delete(checkpoint)
+                session.flush()
+                session.add_all(
+                    orm.BackfillCheckpoint(
+                        **self._checkpoint_key(data_type, et, date), completed=False
+                    )
+                    for et in energietraeger
+                )
+                return {et: 1 for et in energietraeger}
+
+            start = {}
+            for et in energietraeger:
+                checkpoint = checkpoints.get(et or "")
+                if checkpoint is None:
+                    start[et] = 1
+                elif checkpoint.completed:
+                    start[et] = limit + 1
+                elif checkpoint.last_chunk_start is None:
+                    start[et] = 1
+                else:
+                    start[et] = checkpoint.last_chunk_start + BASIC_DATA_CHUNKSIZE
+                    log.info(
+                        f"Resume backfill of {data_type} ({et}) at index {start[et]}"
+                    )
+            return start
+
+    def _update_checkpoint(
+        self, session, data_type, energietraeger, date, chunk_start=None, chunk=None
+    ) -> None:
+        """Stores the last chunk and the newest DatumLetzteAktualisierung of a backfill.
+        The checkpoint is only committed together with the data of the chunk.
+        Without `chunk`, the checkpoint is marked as completed."""
+        key = self._checkpoint_key(data_type, energietraeger, date)
+        checkpoint = session.get(orm.BackfillCheckpoint, key)
+        if checkpoint is None:
+            checkpoint = orm.BackfillCheckpoint(**key, completed=False)
+            session.add(checkpoint)
+
+        if chunk is None:
+            checkpoint.completed = True
+            return
+
+        dates = [
+            entry.get("DatumLetzteAktualisierung")
+            or entry.get("DatumLetzeAktualisierung")
+            for entry in chunk
+        ] + [checkpoint.DatumLetzteAktualisierung]
+        dates = [d for d in dates if d]
+        if dates:
+            checkpoint.DatumLetzteAktualisierung = max(dates, key=_naive_utc)
+        checkpoint.last_chunk_start = chunk_start
+        checkpoint.update_date = datetime.datetime.now(tz=datetime.timezone.utc)
+
+    def _log_incomplete_backfill(self, data_type) -> None:
+        log.warning(
+            f"Backfill of {data_type} is incomplete because chunks failed to "
+            "download. Run it again with the same arguments to resume at the "
+            "first failed chunk."
+        )
 
-            log.info("Backfill successfully finished")
+    def _complete_checkpoints(self, data_type, date) -> None:
+        """Marks all checkpoints of a finished backfill as completed."""
+        key = self._checkpoint_key(data_type, None, date)
+        key.pop("energietraeger")
+        with session_scope(engine=self._engine) as session:
+            session.query(orm.BackfillCheckpoint).filter_by(**key).update(
+                {"completed": True}
+            )
 
     def _get_date(self, date, technology_list):
         """Parses 'latest' to the latest date in the database, else returns the given date."""
@@ -904,63 +1132,31 @@ class MaStRMirror:
     def _get_units_for_request(
         self, data_type, session, additional_data_orm, technology
     ):
-        if data_type == "unit_data":
-            units_for_request = (
-                session.query(orm.BasicUnit)
-                .outerjoin(
-                    additional_data_orm,
-                    orm.BasicUnit.EinheitMastrNummer
-                    == additional_data_orm.EinheitMastrNummer,
-                )
-                .filter(
-                    orm.BasicUnit.Einheittyp == self.unit_type_map_reversed[technology]
-                )
-                .filter(additional_data_orm.EinheitMastrNummer.is_(None))
-                .filter(orm.BasicUnit.EinheitMastrNummer.isnot(None))
-            )
-        elif data_type == "eeg_data":
-            units_for_request = (
-                session.query(orm.BasicUnit)
-                .outerjoin(
-                    additional_data_orm,
-                    orm.BasicUnit.EegMastrNummer == additional_data_orm.EegMastrNummer,
-                )
-                .filter(
-                    orm.BasicUnit.Einheittyp == self.unit_type_map_reversed[technology]
-                )
-                .filter(additional_data_orm.EegMastrNummer.is_(None))
-                .filter(orm.BasicUnit.EegMastrNummer.isnot(None))
-            )
-        elif data_type == "kwk_data":
-            units_for_request = (
-                session.query(orm.BasicUnit)
-                .outerjoin(
-                    additional_data_orm,
-                    orm.BasicUnit.KwkMastrNummer == additional_data_orm.KwkMastrNummer,
-                )
-                .filter(
-                    orm.BasicUnit.Einheittyp == self.unit_type_map_reversed[technology]
-                )
-                .filter(additional_data_orm.KwkMastrNummer.is_(None))
-                .filter(orm.BasicUnit.KwkMastrNummer.isnot(None))
-            )
-        elif data_type == "permit_data":
-            units_for_request = (
-                session.query(orm.BasicUnit)
-                .outerjoin(
-                    additional_data_orm,
-                    orm.BasicUnit.GenMastrNummer == additional_data_orm.GenMastrNummer,
-                )
-                .filter(
-                    orm.BasicUnit.Einheittyp == self.unit_type_map_reversed[technology]
-                )
-                .filter(additional_data_orm.GenMastrNummer.is_(None))
-                .filter(orm.BasicUnit.GenMastrNummer.isnot(None))
-            )
-        else:
+        """Returns a select statement of additional data requests for all units of
+        `technology` in basic_units that are missing in `additional_data_orm`."""
+        if data_type not in ADDITIONAL_DATA_ID_COLUMNS:
             raise ValueError(f"Data type {data_type} is not a valid option.")
 
-        return units_for_request
+        id_column = ADDITIONAL_DATA_ID_COLUMNS[data_type]
+        basic_unit_id = getattr(orm.BasicUnit, id_column)
+        additional_data_id = getattr(additional_data_orm, id_column)
+
+        return (
+            select(
+                orm.BasicUnit.EinheitMastrNummer,
+                basic_unit_id,
+                literal(technology, type_=String),
+                literal(data_type, type_=String),
+                literal(
+                    datetime.datetime.now(tz=datetime.timezone.utc),
+                    type_=DateTime(timezone=True),
+                ),
+            )
+            .outerjoin(additional_data_orm, basic_unit_id == additional_data_id)
+            .where(orm.BasicUnit.Einheittyp == self.unit_type_map_reversed[technology])
+            .where(additional_data_id.is_(None))
+            .where(basic_unit_id.isnot(None))
+        )
 
     def dump(self, dumpfile="open-mastr-continuous-update.backup"):
         """
@@ -1024,6 +1220,13 @@ class MaStRMirror:
         proc.wait()
 
 
+def _naive_utc(date):
+    """Makes naive and timezone aware datetimes comparable."""
+    if date.tzinfo is None:
+        return date
+    return date.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
 def list_of_dicts_to_columns(row) -> pd.Series:  # FIXME: Function not used
     """
     Expand data stored in dict to spearate columns
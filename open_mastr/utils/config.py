@@ -17,7 +17,9 @@ __author__ = "Ludee; christian-rli"
 __issue__ = "https://github.com/OpenEnergyPlatform/examples/issues/52"
 __version__ = "v0.10.0"
 
+import copy
 import os
+import threading
 import yaml
 import shutil
 import pathlib
@@ -93,12 +95,10 @@ def get_filenames():
     dict
         File names used in open-MaStR
     """
-    with open(
+    setup_project_home()
+    return config_service.load_yaml(
         os.path.join(get_project_home_dir(), "config", "filenames.yml")
-    ) as filename_fh:
-        filenames = yaml.safe_load(filename_fh)
-
-    return filenames
+    )
 
 
 def get_data_config():
@@ -253,8 +253,15 @@ def _filenames_generator():
     # Add metadata file
     filenames["metadata"] = "datapackage.json"
 
+    # Only write the file if it changed
+    filenames_yaml = yaml.dump(filenames)
+    if os.path.isfile(filenames_file):
+        with open(filenames_file) as infile:
+            if infile.read() == filenames_yaml:
+                return
+
     with open(filenames_file, "w") as outfile:
-        yaml.dump(filenames, outfile)
+        outfile.write(filenames_yaml)
     log.info(f"File names configuration saved to {filenames_file}")
 
 
@@ -263,37 +270,25 @@ def setup_project_home():
 
     Create PROJECTHOME returned by :func:`~.get_project_home_dir`.
     In addition, default config files are copied to `PROJECTHOME/config/`.
-    """
-
-    # Create directory structure of project home dir
-    create_project_home_dir()
 
-    # Save default file names
-    _filenames_generator()
+    This is done once per process, when the project home is used first.
+    Further calls return immediately, see :class:`ConfigService`.
+    """
+    config_service.setup_project_home()
 
 
 def setup_logger():
     """Configure logging in console and log file.
 
+    The configuration is applied on the first call and again only if
+    `logging.yml` was changed, see :class:`ConfigService`.
+
     Returns
     -------
     logging.Logger
         Logger with two handlers: console and file.
     """
-
-    # Read logging config
-    with open(
-        os.path.join(get_project_home_dir(), "config", "logging.yml")
-    ) as filename_fh:
-        logging_config = yaml.safe_load(filename_fh)
-
-    # Add logfile location
-    logging_config["handlers"]["file"]["filename"] = os.path.join(
-        get_project_home_dir(), "logs", "open_mastr.log"
-    )
-
-    logging.config.dictConfig(logging_config)
-    return logging.getLogger("open-MaStR")
+    return config_service.setup_logger()
 
 
 def column_renaming():
@@ -307,6 +302,10 @@ def column_renaming():
     dict
         Suffix and column to be suffixed keyed by data type.
     """
+    return config_service.get("column_renaming", _column_renaming)
+
+
+def _column_renaming():
     return {
         "basic_data": {
             "columns": ["BestandsanlageMastrNummer"],
@@ -346,3 +345,78 @@ def column_renaming():
             "suffix": "permit",
         },
     }
+
+
+class ConfigService:
+    """
+    Cache of the configuration of open-MaStR within a process
+
+    Config files are read once and only read again if their modification time
+    changed. Other values are computed once. All values are returned as copies,
+    so they can be changed by the caller. The cache can be used from several
+    threads; forked processes keep the cache but get a new lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._files = {}
+        self._values = {}
+        self._project_home_is_set_up = False
+        self._logging_mtime = None
+
+    def _reset_lock(self):
+        self._lock = threading.RLock()
+
+    def load_yaml(self, path):
+        """Content of a YAML file, read again only after the file changed."""
+        with self._lock:
+            mtime = os.stat(path).st_mtime_ns
+            if path not in self._files or self._files[path][0] != mtime:
+                with open(path) as file_handle:
+                    self._files[path] = (mtime, yaml.safe_load(file_handle))
+            return copy.deepcopy(self._files[path][1])
+
+    def get(self, name, factory):
+        """Value of `factory()`, which is computed once and stored as `name`."""
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = factory()
+            return copy.deepcopy(self._values[name])
+
+    def setup_project_home(self):
+        with self._lock:
+            if self._project_home_is_set_up:
+                return
+
+            # Create directory structure of project home dir
+            create_project_home_dir()
+
+            # Save default file names
+            _filenames_generator()
+
+            self._project_home_is_set_up = True
+
+    def setup_logger(self):
+        self.setup_project_home()
+        logging_file = os.path.join(get_project_home_dir(), "config", "logging.yml")
+
+        with self._lock:
+            mtime = os.stat(logging_file).st_mtime_ns
+            if mtime != self._logging_mtime:
+                # Read logging config
+                logging_config = self.load_yaml(logging_file)
+
+                # Add logfile location
+                logging_config["handlers"]["file"]["filename"] = os.path.join(
+                    get_project_home_dir(), "logs", "open_mastr.log"
+                )
+
+                logging.config.dictConfig(logging_config)
+                self._logging_mtime = mtime
+
+        return logging.getLogger("open-MaStR")
+
+
+config_service = ConfigService()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=config_service._reset_lock)
@@ -530,3 +530,21 @@ TRANSLATIONS = {
     "WebportalDesNetzbetreibers": "webPortalGridOperator",
     "RegisternummerPraefix": "registerNumberPrefix",
 }
+
+# Prefix of the views with translated column names, see Mastr.translate(views=True)
+TRANSLATED_VIEW_PREFIX = "en_"
+
+# Region levels of the capacity statistics, from coarse to fine, see Mastr.stats
+STATISTICS_REGION_LEVELS = ["Bundesland", "Landkreis", "Gemeindeschluessel"]
+
+# Dimensions of the capacity statistics that are pre-aggregated
+STATISTICS_DIMENSIONS = STATISTICS_REGION_LEVELS + [
+    "Energietraeger",
+    "Inbetriebnahmejahr",
+]
+
+# Suffix of the spatial indexes of the extended unit tables, see Mastr.nearby
+SPATIAL_INDEX_SUFFIX = "_rtree"
+
+# Mean earth radius in km, used for distances between units
+EARTH_RADIUS_KM = 6371.0
@@ -16,7 +16,7 @@ __version__ = "v0.10.0"
 
 import os
 import configparser as cp
-from open_mastr.utils.config import get_project_home_dir
+from open_mastr.utils.config import get_project_home_dir, setup_project_home
 import keyring
 
 import logging
@@ -26,6 +26,7 @@ log = logging.getLogger(__name__)
 
 def _load_config_file():
 
+    setup_project_home()
     config_file = os.path.join(get_project_home_dir(), "config", "credentials.cfg")
     cfg = cp.ConfigParser()
 
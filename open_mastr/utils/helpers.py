@@ -1,5 +1,6 @@
 import os
 import json
+import sqlite3
 import sys
 from contextlib import contextmanager
 from datetime import date, datetime
@@ -9,17 +10,20 @@ import dateutil
 import sqlalchemy
 from sqlalchemy.sql import insert, literal_column, text
 from dateutil.parser import parse
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, extract, func, literal, select
 from sqlalchemy.orm import Query, sessionmaker
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 from open_mastr.soap_api.metadata.create import create_datapackage_meta_json
 from open_mastr.utils import orm
+from open_mastr.utils.metrics import get_metrics
 from open_mastr.utils.config import (
     get_filenames,
     get_data_version_dir,
     column_renaming,
+    config_service,
 )
 
 from open_mastr.soap_api.download import MaStRAPI, log
@@ -35,6 +39,11 @@ from open_mastr.utils.constants import (
     UNIT_TYPE_MAP,
     ADDITIONAL_TABLES,
     TRANSLATIONS,
+    TRANSLATED_VIEW_PREFIX,
+    STATISTICS_REGION_LEVELS,
+    STATISTICS_DIMENSIONS,
+    SPATIAL_INDEX_SUFFIX,
+    EARTH_RADIUS_KM,
 )
 
 
@@ -429,7 +438,9 @@ def data_to_include_tables(data: list, mapping: str = None) -> list:
 
 
 def reverse_unit_type_map():
-    return {v: k for k, v in UNIT_TYPE_MAP.items()}
+    return config_service.get(
+        "reverse_unit_type_map", lambda: {v: k for k, v in UNIT_TYPE_MAP.items()}
+    )
 
 
 # EXPORT RELEVANT FUNCTIONS
@@ -565,6 +576,399 @@ def create_db_query(
             return query_additional_tables
 
 
+def create_select_query(data, columns=None, where=None, since=None, limit=None):
+    """
+    Create a select statement that only reads the requested columns and rows.
+
+    For technologies, the query is based on the extended unit table, e.g.
+    `wind_extended`. EEG, KWK and permit data is only joined if one of its
+    columns is requested or filtered. A column that exists in several of these
+    tables is taken from the first one in the order unit data, EEG data,
+    KWK data and permit data. Other tables can be selected by appending the
+    suffix of the CSV export, e.g. `Meldedatum_eeg`, see
+    `open_mastr.utils.config.column_renaming`.
+
+    Parameters
+    ----------
+    data: str
+        A technology in `open_mastr.utils.constants.TECHNOLOGIES` or an
+        additional table in `open_mastr.utils.constants.ADDITIONAL_TABLES`.
+    columns: list of str or None
+        Columns to select. Defaults to all columns of the unit table.
+    where: dict or None
+        Conditions keyed by column name. A value is either compared for
+        equality, a list of allowed values, `None` for missing values, or a
+        tuple `(operator, value)` with one of `==`, `!=`, `<`, `<=`, `>`,
+        `>=`, `in`, `not in`, `like`.
+    since: datetime.datetime or str or None
+        Only select rows with a `DatumLetzteAktualisierung` after this date.
+    limit: int or None
+        Limit number of rows.
+
+    Returns
+    -------
+    sqlalchemy.sql.Select
+    """
+    if data in TECHNOLOGIES:
+        orm_tables = {
+            data_type: getattr(orm, ORM_MAP[data][data_type])
+            for data_type in API_DATA_TYPES
+            if data_type in ORM_MAP[data]
+        }
+    elif data in ADDITIONAL_TABLES:
+        orm_tables = {"unit_data": getattr(orm, ORM_MAP[data])}
+    else:
+        raise ValueError(
+            f"Allowed values for 'data' are {TECHNOLOGIES + ADDITIONAL_TABLES}, "
+            f"got '{data}'."
+        )
+    base_table = orm_tables["unit_data"].__table__
+
+    if columns is None:
+        columns = [column.name for column in base_table.columns]
+    where = where or {}
+
+    resolved = {
+        name: _resolve_query_column(name, orm_tables)
+        for name in dict.fromkeys(list(columns) + list(where))
+    }
+
+    statement = select(*[resolved[name].label(name) for name in columns])
+    statement = statement.select_from(base_table)
+
+    # Join additional data only if it is used
+    used_tables = {column.table for column in resolved.values()}
+    for data_type, join_column in [
+        ("eeg_data", "EegMastrNummer"),
+        ("kwk_data", "KwkMastrNummer"),
+        ("permit_data", "GenMastrNummer"),
+    ]:
+        if data_type not in orm_tables:
+            continue
+        table = orm_tables[data_type].__table__
+        if table in used_tables:
+            statement = statement.join(
+                table,
+                base_table.columns[join_column] == table.columns[join_column],
+                isouter=True,
+            )
+
+    for name, condition in where.items():
+        statement = statement.where(_where_clause(resolved[name], condition))
+
+    if since is not None:
+        if "DatumLetzteAktualisierung" not in base_table.columns:
+            raise ValueError(f"The table of '{data}' can't be filtered by date.")
+        if isinstance(since, str):
+            since = parse(since)
+        statement = statement.where(
+            base_table.columns["DatumLetzteAktualisierung"] > since
+        )
+
+    if limit:
+        statement = statement.limit(limit)
+
+    return statement
+
+
+def read_select_query(
+    statement, engine, chunksize=None, dtype_backend="numpy_nullable"
+):
+    """
+    Read a select statement into a typed pandas.DataFrame.
+
+    Date columns are parsed to datetimes. The other columns use nullable
+    dtypes, so that e.g. boolean columns with missing values stay boolean.
+
+    Parameters
+    ----------
+    statement: sqlalchemy.sql.Select
+        See `create_select_query`.
+    engine: <class 'sqlalchemy.engine.base.Engine'>
+        User-defined database engine.
+    chunksize: int or None
+        If given, an iterator over DataFrames with at most `chunksize` rows is
+        returned.
+    dtype_backend: {"numpy_nullable", "pyarrow"}
+        Backend of the dtypes, see `pandas.read_sql`. "pyarrow" requires the
+        package `pyarrow`.
+
+    Returns
+    -------
+    pandas.DataFrame or iterator of pandas.DataFrame
+    """
+    if dtype_backend not in ["numpy_nullable", "pyarrow"]:
+        raise ValueError("dtype_backend must be 'numpy_nullable' or 'pyarrow'.")
+    dtypes = {
+        "numpy_nullable": {
+            sqlalchemy.Boolean: "boolean",
+            sqlalchemy.Integer: "Int64",
+            sqlalchemy.Float: "Float64",
+            sqlalchemy.String: "string",
+        },
+        "pyarrow": {
+            sqlalchemy.Boolean: "bool[pyarrow]",
+            sqlalchemy.Integer: "int64[pyarrow]",
+            sqlalchemy.Float: "double[pyarrow]",
+            sqlalchemy.String: "string[pyarrow]",
+        },
+    }[dtype_backend]
+
+    # Set dtypes from the table definition, as columns might contain only NULL
+    parse_dates = []
+    dtype = {}
+    for column in statement.selected_columns:
+        if isinstance(column.type, (sqlalchemy.Date, sqlalchemy.DateTime)):
+            parse_dates.append(column.name)
+            continue
+        for sql_type, column_dtype in dtypes.items():
+            if isinstance(column.type, sql_type):
+                dtype[column.name] = column_dtype
+                break
+    read_kwargs = dict(
+        parse_dates=parse_dates, dtype=dtype, dtype_backend=dtype_backend
+    )
+
+    if chunksize is None:
+        with engine.connect() as con:
+            return pd.read_sql(sql=statement, con=con, **read_kwargs)
+
+    def read_chunks():
+        # The connection is kept open until all chunks are read
+        with engine.connect() as con:
+            yield from pd.read_sql(
+                sql=statement, con=con, chunksize=chunksize, **read_kwargs
+            )
+
+    return read_chunks()
+
+
+def _resolve_query_column(name, orm_tables):
+    """Find the table column of a (suffixed) column name of a query."""
+    renaming = column_renaming()
+    for data_type, orm_table in orm_tables.items():
+        suffix = f"_{renaming[data_type]['suffix']}"
+        columns = orm_table.__table__.columns
+        if name.endswith(suffix) and name[: -len(suffix)] in columns:
+            return columns[name[: -len(suffix)]]
+    for orm_table in orm_tables.values():
+        if name in orm_table.__table__.columns:
+            return orm_table.__table__.columns[name]
+    raise ValueError(f"Column '{name}' is not available.")
+
+
+def _where_clause(column, condition):
+    """Translate a condition of `create_select_query` into a SQL expression."""
+    if condition is None:
+        return column.is_(None)
+    if isinstance(condition, list):
+        return column.in_(condition)
+    if not isinstance(condition, tuple):
+        return column == condition
+
+    operator, value = condition
+    if operator == "in":
+        return column.in_(value)
+    if operator == "not in":
+        return column.not_in(value)
+    if operator == "like":
+        return column.like(value)
+    if operator in ["==", "!="] and value is None:
+        return column.is_(None) if operator == "==" else column.is_not(None)
+    comparisons = {
+        "==": column.__eq__,
+        "!=": column.__ne__,
+        "<": column.__lt__,
+        "<=": column.__le__,
+        ">": column.__gt__,
+        ">=": column.__ge__,
+    }
+    if operator not in comparisons:
+        raise ValueError(f"Operator '{operator}' is not supported.")
+    return comparisons[operator](value)
+
+
+def refresh_capacity_statistics(technology, engine) -> None:
+    """
+    Rebuild the pre-aggregated capacity statistics of technologies.
+
+    The units of the extended tables are counted and their `Bruttoleistung` and
+    `Nettonennleistung` summed by region, `Energietraeger` and year of
+    `Inbetriebnahmedatum`. The sums are stored for each region level in
+    `open_mastr.utils.constants.STATISTICS_REGION_LEVELS` in the table
+    `capacity_statistics`. Only the finest level is aggregated from the
+    extended table, coarser levels are aggregated from the finer one.
+
+    Parameters
+    ----------
+    technology: list of str
+        See `open_mastr.utils.constants.TECHNOLOGIES`.
+    engine: <class 'sqlalchemy.engine.base.Engine'>
+        User-defined database engine.
+    """
+    statistics = orm.CapacityStatistic.__table__
+    values = ["Anzahl", "Bruttoleistung", "Nettonennleistung"]
+
+    for tech in technology:
+        unit_table = getattr(orm, ORM_MAP[tech]["unit_data"]).__table__
+        dimensions = [
+            unit_table.columns[name] for name in STATISTICS_DIMENSIONS[:-1]
+        ] + [
+            extract("year", unit_table.columns["Inbetriebnahmedatum"]).label(
+                "Inbetriebnahmejahr"
+            )
+        ]
+        finest_level = STATISTICS_REGION_LEVELS[-1]
+        aggregation = select(
+            literal(tech),
+            literal(finest_level),
+            *dimensions,
+            func.count(),
+            func.sum(unit_table.columns["Bruttoleistung"]),
+            func.sum(unit_table.columns["Nettonennleistung"]),
+        ).group_by(*dimensions)
+
+        with engine.begin() as connection:
+            connection.execute(
+                sqlalchemy.delete(statistics).where(statistics.c.technology == tech)
+            )
+            connection.execute(
+                insert(statistics).from_select(
+                    ["technology", "region_level"] + STATISTICS_DIMENSIONS + values,
+                    aggregation,
+                )
+            )
+
+            # Coarser levels are aggregated from the finest one
+            for level_number in range(len(STATISTICS_REGION_LEVELS) - 1):
+                regions = STATISTICS_REGION_LEVELS[: level_number + 1]
+                columns = regions + STATISTICS_DIMENSIONS[-2:]
+                dimensions = [statistics.columns[name] for name in columns]
+                aggregation = (
+                    select(
+                        literal(tech),
+                        literal(regions[-1]),
+                        *dimensions,
+                        *[func.sum(statistics.columns[name]) for name in values],
+                    )
+                    .where(statistics.c.technology == tech)
+                    .where(statistics.c.region_level == finest_level)
+                    .group_by(*dimensions)
+                )
+                connection.execute(
+                    insert(statistics).from_select(
+                        ["technology", "region_level"] + columns + values,
+                        aggregation,
+                    )
+                )
+        log.info(f"Refreshed capacity statistics of {tech}")
+
+
+def query_capacity_statistics(technology, by, engine, where=None) -> pd.DataFrame:
+    """
+    Sum up units and capacities of technologies by the given dimensions.
+
+    The statistics are read from the table `capacity_statistics`, see
+    `refresh_capacity_statistics`. For technologies without pre-aggregated
+    statistics or for dimensions that are not pre-aggregated, e.g. `Lage`
+    of solar units, the extended tables are queried instead.
+
+    Parameters
+    ----------
+    technology: list of str
+        See `open_mastr.utils.constants.TECHNOLOGIES`.
+    by: list of str
+        Dimensions to group by. Besides the columns of the extended tables,
+        `Inbetriebnahmejahr` and `technology` are available.
+    engine: <class 'sqlalchemy.engine.base.Engine'>
+        User-defined database engine.
+    where: dict or None
+        Conditions keyed by dimension, see `create_select_query`. A condition
+        on `technology` selects from `technology`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columns of `by` along with `Anzahl`, `Bruttoleistung` and
+        `Nettonennleistung`.
+    """
+    where = where or {}
+    values = ["Anzahl", "Bruttoleistung", "Nettonennleistung"]
+    dimensions = [name for name in list(by) + list(where) if name != "technology"]
+    is_aggregated = set(dimensions) <= set(STATISTICS_DIMENSIONS)
+
+    statistics = orm.CapacityStatistic.__table__
+    with engine.connect() as connection:
+        aggregated_technologies = set(
+            connection.execute(select(statistics.c.technology).distinct()).scalars()
+        )
+
+        frames = []
+        for tech in technology:
+            if is_aggregated and tech in aggregated_technologies:
+                statement = _aggregated_statistics_query(tech, by, where, dimensions)
+            else:
+                log.info(f"Capacity statistics of {tech} are queried from the units")
+                statement = _unit_statistics_query(tech, by, where)
+            frames.append(pd.read_sql(statement, con=connection))
+
+    # Technologies without units don't contribute to the result
+    df = pd.concat([frame for frame in frames if frame["Anzahl"].any()] or frames)
+    if not by:
+        return df[values].agg(["sum"]).reset_index(drop=True)
+    return df.groupby(list(by), dropna=False, as_index=False)[values].sum()
+
+
+def _aggregated_statistics_query(tech, by, where, dimensions):
+    """Select statistics of a technology from the table `capacity_statistics`."""
+    statistics = orm.CapacityStatistic.__table__
+    region_levels = [
+        level for level in STATISTICS_REGION_LEVELS if level in dimensions
+    ] or STATISTICS_REGION_LEVELS[:1]
+
+    group_columns = [statistics.columns[name] for name in by if name != "technology"]
+    statement = (
+        select(
+            literal(tech).label("technology"),
+            *group_columns,
+            func.sum(statistics.c.Anzahl).label("Anzahl"),
+            func.sum(statistics.c.Bruttoleistung).label("Bruttoleistung"),
+            func.sum(statistics.c.Nettonennleistung).label("Nettonennleistung"),
+        )
+        .where(statistics.c.technology == tech)
+        .where(statistics.c.region_level == region_levels[-1])
+        .group_by(*group_columns)
+    )
+    for name, condition in where.items():
+        statement = statement.where(_where_clause(statistics.columns[name], condition))
+    return statement
+
+
+def _unit_statistics_query(tech, by, where):
+    """Aggregate statistics of a technology from its extended table."""
+    unit_table = getattr(orm, ORM_MAP[tech]["unit_data"]).__table__
+
+    def unit_column(name):
+        if name == "Inbetriebnahmejahr":
+            return extract("year", unit_table.c.Inbetriebnahmedatum).label(name)
+        if name not in unit_table.columns:
+            raise ValueError(f"Column '{name}' is not available for {tech}.")
+        return unit_table.columns[name]
+
+    group_columns = [unit_column(name) for name in by if name != "technology"]
+    statement = select(
+        literal(tech).label("technology"),
+        *group_columns,
+        func.count().label("Anzahl"),
+        func.sum(unit_table.c.Bruttoleistung).label("Bruttoleistung"),
+        func.sum(unit_table.c.Nettonennleistung).label("Nettonennleistung"),
+    ).group_by(*group_columns)
+    for name, condition in where.items():
+        column = literal(tech) if name == "technology" else unit_column(name)
+        statement = statement.where(_where_clause(column, condition))
+    return statement
+
+
 def save_metadata(data: list = None, engine=None) -> None:
     """
     Save metadata during csv export.
@@ -603,33 +1007,66 @@ def save_metadata(data: list = None, engine=None) -> None:
     log.info("Saved metadata")
 
 
-def reverse_fill_basic_units(technology=None, engine=None):
+def reverse_fill_basic_units(technology=None, engine=None, incremental=True):
     """
     The basic_units table is empty after bulk download.
     To enable csv export, the table is filled from extended
     tables reversely.
 
+    For each technology, the maximum `DatumLetzteAktualisierung` and the number
+    of rows of its extended table are stored in `basic_units_watermarks`.
+    Units of a technology are only rebuilt if these changed since the last
+    reverse fill, otherwise the technology is skipped.
+
     .. warning::
-    The basic_units table will be dropped and then recreated.
-    Returns -------
+    Rows of basic_units of rebuilt technologies are deleted and then recreated.
 
     Parameters
     ----------
     technology: list of str
         Available technologies are in open_mastr.Mastr.to_csv()
+    incremental: bool, optional
+        If `False`, all basic_units are deleted and rebuilt for `technology`
+        regardless of the stored watermarks. Defaults to `True`.
     """
+    unit_type_map_reversed = reverse_unit_type_map()
+    basic_unit_column_names = [
+        column.name for column in orm.BasicUnit.__mapper__.columns
+    ]
 
-    with session_scope(engine=engine) as session:
-        # Empty the basic_units table, because it will be filled entirely from extended tables
-        session.query(getattr(orm, "BasicUnit", None)).delete()
-
-        for tech in tqdm(technology, desc="Performing reverse fill of basic units: "):
-            # Get the class of extended table
-            unit_data_orm = getattr(orm, ORM_MAP[tech]["unit_data"], None)
-            basic_unit_column_names = [
-                column.name
-                for column in getattr(orm, "BasicUnit", None).__mapper__.columns
-            ]
+    if not incremental:
+        with session_scope(engine=engine) as session:
+            # Empty the basic_units table, because it will be filled entirely from extended tables
+            session.query(orm.BasicUnit).delete()
+            session.query(orm.BasicUnitsWatermark).delete()
+
+    for tech in tqdm(technology, desc="Performing reverse fill of basic units: "):
+        # Get the class of extended table
+        unit_data_orm = getattr(orm, ORM_MAP[tech]["unit_data"], None)
+        unit_type = unit_type_map_reversed.get(tech, None)
+
+        # Each technology is rebuilt in its own transaction
+        with session_scope(engine=engine) as session:
+            newest_date, row_count = session.query(
+                func.max(unit_data_orm.DatumLetzteAktualisierung),
+                func.count(),
+            ).one()
+            watermark = session.get(orm.BasicUnitsWatermark, tech)
+            if (
+                watermark is not None
+                and watermark.DatumLetzteAktualisierung == newest_date
+                and watermark.row_count == row_count
+                and session.query(orm.BasicUnit)
+                .filter(orm.BasicUnit.Einheittyp == unit_type)
+                .count()
+                == row_count
+            ):
+                log.info(f"basic_units of {tech} are up to date")
+                continue
+
+            session.query(orm.BasicUnit).filter(
+                orm.BasicUnit.Einheittyp == unit_type
+            ).delete()
 
             unit_columns_to_reverse_fill = [
                 column
@@ -640,10 +1077,8 @@ def reverse_fill_basic_units(technology=None, engine=None):
                 column.name for column in unit_columns_to_reverse_fill
             ]
 
-            unit_type_map_reversed = reverse_unit_type_map()
-
             # Add Einheittyp artificially
-            unit_typ = "'" + unit_type_map_reversed.get(tech, None) + "'"
+            unit_typ = "'" + unit_type + "'"
             unit_columns_to_reverse_fill.append(
                 literal_column(unit_typ).label("Einheittyp")
             )
@@ -656,6 +1091,298 @@ def reverse_fill_basic_units(technology=None, engine=None):
             )
 
             session.execute(insert_query)
+            session.merge(
+                orm.BasicUnitsWatermark(
+                    technology=tech,
+                    DatumLetzteAktualisierung=newest_date,
+                    row_count=row_count,
+                    update_date=datetime.now(),
+                )
+            )
+
+
+def create_secondary_indexes(engine) -> list:
+    """
+    Create missing indexes for the columns in `orm.secondary_index_columns`.
+
+    Indexes are created in all existing tables of the ORM that contain one of
+    these columns, unless the column is a primary key or already indexed.
+
+    Parameters
+    ----------
+    engine: sqlalchemy.engine.Engine
+        Database engine
+
+    Returns
+    -------
+    list of str
+        Names of the created indexes
+    """
+    inspector = sqlalchemy.inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    quote = engine.dialect.identifier_preparer.quote
+    created_indexes = []
+
+    for table in orm.Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+        indexed_columns = [
+            index["column_names"] for index in inspector.get_indexes(table.name)
+        ]
+        for column in orm.secondary_index_columns:
+            if (
+                column not in existing_columns
+                or (column in table.c and table.c[column].primary_key)
+                or [column] in indexed_columns
+            ):
+                continue
+            index_name = f"ix_{table.name}_{column}"
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        f"CREATE INDEX {quote(index_name)} "
+                        f"ON {quote(table.name)} ({quote(column)})"
+                    )
+                )
+            log.info(f"Created index {index_name}")
+            created_indexes.append(index_name)
+
+    return created_indexes
+
+
+def analyze_database(engine) -> None:
+    """Update the statistics of the query planner with ANALYZE."""
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+
+def create_spatial_indexes(engine, technology=None) -> list:
+    """
+    Create spatial indexes on the coordinates of the extended unit tables.
+
+    For SQLite, an R*Tree `<table>_rtree` is (re)built from `Laengengrad` and
+    `Breitengrad`, which references the units by their `rowid`. The largest
+    `rowid` of the table is stored in the table `spatial_index_states`, so that
+    an outdated R*Tree can be detected, see `spatial_index_is_current`. For
+    other databases, a missing B-tree index on both columns is created.
+
+    Parameters
+    ----------
+    engine: sqlalchemy.engine.Engine
+        Database engine
+    technology: list of str or None
+        See `open_mastr.utils.constants.TECHNOLOGIES`. Defaults to all.
+
+    Returns
+    -------
+    list of str
+        Names of the created indexes
+    """
+    inspector = sqlalchemy.inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    quote = engine.dialect.identifier_preparer.quote
+    created_indexes = []
+
+    if technology is None:
+        technology = TECHNOLOGIES
+
+    for tech in technology:
+        table = getattr(orm, ORM_MAP[tech]["unit_data"]).__tablename__
+        if table not in existing_tables:
+            continue
+
+        if engine.dialect.name != "sqlite":
+            index_name = f"ix_{table}_coordinates"
+            if index_name in [index["name"] for index in inspector.get_indexes(table)]:
+                continue
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        f"CREATE INDEX {quote(index_name)} ON {quote(table)} "
+                        '("Breitengrad", "Laengengrad")'
+                    )
+                )
+            created_indexes.append(index_name)
+            continue
+
+        index_name = table + SPATIAL_INDEX_SUFFIX
+        with engine.begin() as connection:
+            connection.exec_driver_sql("BEGIN")
+            connection.execute(text(f"DROP TABLE IF EXISTS {quote(index_name)}"))
+            connection.execute(
+                text(
+                    f"CREATE VIRTUAL TABLE {quote(index_name)} USING rtree"
+                    "(unit_rowid, min_x, max_x, min_y, max_y)"
+                )
+            )
+            connection.execute(
+                text(
+                    f"INSERT INTO {quote(index_name)} "
+                    'SELECT rowid, "Laengengrad", "Laengengrad", '
+                    '"Breitengrad", "Breitengrad" '
+                    f"FROM {quote(table)} "
+                    'WHERE "Laengengrad" IS NOT NULL AND "Breitengrad" IS NOT NULL'
+                )
+            )
+            max_rowid = _max_rowid(connection, table, quote)
+            state = orm.SpatialIndexState.__table__
+            connection.execute(state.delete().where(state.c.table_name == table))
+            connection.execute(
+                state.insert().values(
+                    table_name=table,
+                    max_rowid=max_rowid,
+                    update_date=datetime.now(),
+                )
+            )
+        log.info(f"Created spatial index {index_name}")
+        created_indexes.append(index_name)
+
+    return created_indexes
+
+
+def _max_rowid(connection, table, quote):
+    """Largest `rowid` of a SQLite table, which is read from the end of its B-tree"""
+    return connection.execute(text(f"SELECT max(rowid) FROM {quote(table)}")).scalar()
+
+
+def mark_spatial_index_outdated(connection, table) -> None:
+    """
+    Mark the R*Tree of `table` as outdated, see `spatial_index_is_current`.
+
+    Called before open-mastr writes to a unit table. The index is not used
+    until `create_spatial_indexes` rebuilds it.
+
+    Parameters
+    ----------
+    connection: sqlalchemy.engine.Connection
+        Database connection, the state is changed in its transaction.
+    table: str
+        Name of the extended unit table
+    """
+    state = orm.SpatialIndexState.__table__
+    if sqlalchemy.inspect(connection).has_table(state.name):
+        connection.execute(state.delete().where(state.c.table_name == table))
+
+
+def spatial_index_is_current(engine, table) -> bool:
+    """
+    Check if the R*Tree of `create_spatial_indexes` covers all rows of `table`.
+
+    The index is outdated if open-mastr wrote to the table since it was built,
+    see `mark_spatial_index_outdated`, or if the largest `rowid` of the table
+    changed, e.g. because rows were appended by other tools. Both checks use
+    an index lookup, so the table is not scanned.
+    """
+    index_name = table + SPATIAL_INDEX_SUFFIX
+    inspector = sqlalchemy.inspect(engine)
+    state = orm.SpatialIndexState.__table__
+    if not (inspector.has_table(index_name) and inspector.has_table(state.name)):
+        return False
+
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.connect() as connection:
+        indexed = connection.execute(
+            select(state.c.max_rowid).where(state.c.table_name == table)
+        ).first()
+        current = _max_rowid(connection, table, quote)
+
+    if indexed is None or indexed.max_rowid != current:
+        log.warning(
+            f"Spatial index {index_name} is outdated and not used. "
+            "Run create_spatial_indexes to update it."
+        )
+        return False
+    return True
+
+
+def create_bbox_query(tech, bbox, engine, columns=None):
+    """
+    Create a query for the units of a technology within a bounding box.
+
+    The R*Tree of `create_spatial_indexes` is used if it is up to date, see
+    `spatial_index_is_current`. Otherwise, only the coordinates of the units
+    are filtered, so rows added after the index was built are not missed.
+
+    Parameters
+    ----------
+    tech: str
+        See `open_mastr.utils.constants.TECHNOLOGIES`.
+    bbox: tuple of float
+        `(min_lat, min_lon, max_lat, max_lon)` in degrees.
+    engine: sqlalchemy.engine.Engine
+        Database engine
+    columns: list of str or None
+        Columns of the extended table. `Laengengrad` and `Breitengrad` are
+        always selected. Defaults to `EinheitMastrNummer` and `Bruttoleistung`.
+
+    Returns
+    -------
+    sqlalchemy.sql.Select
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    unit_table = getattr(orm, ORM_MAP[tech]["unit_data"]).__table__
+    columns = columns or ["EinheitMastrNummer", "Bruttoleistung"]
+    columns = list(dict.fromkeys(list(columns) + ["Laengengrad", "Breitengrad"]))
+    for name in columns:
+        if name not in unit_table.columns:
+            raise ValueError(f"Column '{name}' is not available for {tech}.")
+
+    statement = select(
+        literal(tech).label("technology"),
+        *[unit_table.columns[name] for name in columns],
+    ).where(
+        unit_table.c.Breitengrad.between(min_lat, max_lat),
+        unit_table.c.Laengengrad.between(min_lon, max_lon),
+    )
+
+    index_name = unit_table.name + SPATIAL_INDEX_SUFFIX
+    if engine.dialect.name == "sqlite" and spatial_index_is_current(
+        engine, unit_table.name
+    ):
+        rtree = sqlalchemy.table(
+            index_name,
+            *[
+                sqlalchemy.column(name)
+                for name in ["unit_rowid", "min_x", "max_x", "min_y", "max_y"]
+            ],
+        )
+        candidates = select(rtree.c.unit_rowid).where(
+            rtree.c.max_x >= min_lon,
+            rtree.c.min_x <= max_lon,
+            rtree.c.max_y >= min_lat,
+            rtree.c.min_y <= max_lat,
+        )
+        statement = statement.where(
+            literal_column(f"{unit_table.name}.rowid").in_(candidates)
+        )
+
+    return statement
+
+
+def haversine_distance(lat, lon, lats, lons):
+    """
+    Great-circle distance in km between a point and arrays of points.
+
+    Parameters
+    ----------
+    lat, lon: float
+        Coordinates of the point in degrees.
+    lats, lons: array-like
+        Coordinates of the other points in degrees.
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    lat, lon, lats, lons = (
+        np.radians(np.asarray(value, dtype=float)) for value in (lat, lon, lats, lons)
+    )
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
 
 
 def partially_suffixed_columns(mapper, column_names, suffix):
@@ -718,7 +1445,11 @@ def db_query_to_csv(db_query, data_table: str, chunksize: int) -> None:
             data_path, filenames["raw"]["additional_table"][data_table]
         )
 
-    with db_query.session.bind.connect() as con:
+    metrics = get_metrics()
+    with (
+        metrics.timer("export", table=data_table),
+        db_query.session.bind.connect() as con,
+    ):
         with con.begin():
             # Read data into pandas.DataFrame in chunks of max. 500000 rows of ~2.5 GB RAM
             for chunk_number, chunk_df in enumerate(
@@ -741,6 +1472,7 @@ def db_query_to_csv(db_query, data_table: str, chunksize: int) -> None:
                         chunk_df[col] = chunk_df[col].str.replace("\r", "")
 
                 if not chunk_df.empty:
+                    metrics.increment("rows", len(chunk_df), table=data_table)
 
                     if chunk_number == 0:
                         chunk_df.to_csv(
@@ -763,28 +1495,141 @@ def db_query_to_csv(db_query, data_table: str, chunksize: int) -> None:
                             f"Appended {len(chunk_df)} rows to: {csv_file.split('/')[-1:]}"
                         )
 
+    if os.path.exists(csv_file):
+        metrics.increment("bytes", os.path.getsize(csv_file), table=data_table)
+
 
 def rename_table(table, columns, engine) -> None:
     """
     Rename table based on translation dictionary.
+
+    All columns of a table are renamed in a single transaction. If a column
+    can't be renamed, the transaction is rolled back and the error is raised,
+    so a table is never translated partially. Columns which are already
+    translated are skipped.
+    """
+    quote = engine.dialect.identifier_preparer.quote
+    column_names = [column["name"] for column in columns]
+    alter_statements = [
+        text(
+            f"ALTER TABLE {quote(table)} RENAME COLUMN "
+            f"{quote(column)} TO {quote(TRANSLATIONS[column])}"
+        )
+        for column in column_names
+        if column in TRANSLATIONS and TRANSLATIONS[column] not in column_names
+    ]
+    if not alter_statements:
+        return
+
+    with engine.begin() as connection:
+        if engine.dialect.name == "sqlite":
+            # pysqlite does not begin a transaction before DDL statements
+            connection.exec_driver_sql("BEGIN")
+        for statement in alter_statements:
+            connection.execute(statement)
+
+
+def mastr_data_tables() -> set:
+    """
+    Names of the tables holding MaStR data.
+
+    Tables open-mastr uses for bookkeeping, e.g. `backfill_checkpoints` or
+    `capacity_statistics`, are not included.
     """
-    alter_statements = []
+    return {
+        mapper.class_.__tablename__
+        for mapper in orm.Base.registry.mappers
+        if issubclass(mapper.class_, orm.ParentAllTables)
+    } | {orm.BasicUnit.__tablename__, orm.LocationBasic.__tablename__}
 
-    for column in columns:
-        column = column["name"]
 
-        if column in TRANSLATIONS:
-            alter_statement = text(
-                f"ALTER TABLE {table} RENAME COLUMN {column} TO {TRANSLATIONS[column]}"
+def create_translated_views(engine) -> list:
+    """
+    Create a view with translated column names for each table with MaStR data.
+
+    The views are named like the tables with the prefix `TRANSLATED_VIEW_PREFIX`,
+    e.g. `en_wind_extended`. Existing views are replaced. Columns keep their
+    name if their translation is already used by another column of the table.
+    Bookkeeping tables, see `mastr_data_tables`, get no view.
+
+    Returns
+    -------
+    list of str
+        Names of the created views
+    """
+    inspector = sqlalchemy.inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    views = []
+
+    tables = sorted(mastr_data_tables() & set(inspector.get_table_names()))
+
+    with engine.begin() as connection:
+        for table in tables:
+            columns = [column["name"] for column in inspector.get_columns(table)]
+            translated_columns = []
+            for column in columns:
+                translated_column = TRANSLATIONS.get(column, column)
+                if translated_column != column and (
+                    translated_column in columns
+                    or translated_column in translated_columns
+                ):
+                    translated_column = column
+                translated_columns.append(translated_column)
+
+            select_list = ", ".join(
+                f"{quote(column)} AS {quote(translated_column)}"
+                for column, translated_column in zip(columns, translated_columns)
+            )
+            view = TRANSLATED_VIEW_PREFIX + table
+            connection.execute(text(f"DROP VIEW IF EXISTS {quote(view)}"))
+            connection.execute(
+                text(
+                    f"CREATE VIEW {quote(view)} AS "
+                    f"SELECT {select_list} FROM {quote(table)}"
+                )
             )
-            alter_statements.append(alter_statement)
+            views.append(view)
 
-    with engine.connect() as connection:
-        for statement in alter_statements:
-            try:
-                connection.execute(statement)
-            except sqlalchemy.exc.OperationalError:
-                continue
+    return views
+
+
+def drop_translated_views(engine) -> list:
+    """
+    Drop all views created by `create_translated_views`.
+
+    Only the views of the MaStR data tables are dropped, other views starting
+    with `TRANSLATED_VIEW_PREFIX` are kept.
+
+    Returns
+    -------
+    list of str
+        Names of the dropped views
+    """
+    quote = engine.dialect.identifier_preparer.quote
+    translated_views = {TRANSLATED_VIEW_PREFIX + table for table in mastr_data_tables()}
+    views = [
+        view
+        for view in sqlalchemy.inspect(engine).get_view_names()
+        if view in translated_views
+    ]
+    with engine.begin() as connection:
+        for view in views:
+            connection.execute(text(f"DROP VIEW IF EXISTS {quote(view)}"))
+    return views
+
+
+def copy_sqlite_database(source_path, target_path) -> None:
+    """
+    Copy a SQLite database file with the backup API of SQLite.
+    """
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        with target:
+            source.backup(target)
+    finally:
+        target.close()
+        source.close()
 
 
 def create_translated_database_engine(engine, folder_path) -> sqlalchemy.engine.Engine:
@@ -0,0 +1,243 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Counters that are reported per table in the run summary
+TABLE_COUNTERS = [
+    "rows",
+    "bytes",
+    "retries",
+    "skipped_duplicates",
+    "skipped_rows",
+    "coerced_values",
+    "deleted_values",
+]
+
+
+class MetricsCollector:
+    """
+    Collects timers, counters and histograms of a run.
+
+    Timers, counters and histograms are identified by a name and an optional
+    table, timers and histograms additionally by an optional operation such as
+    the called SOAP API method. The collector is thread-safe and can be shared between the threads
+    of a download. It is activated with :func:`use_metrics` or by passing
+    `metrics` to [`Mastr.download`][open_mastr.Mastr.download].
+
+    Parameters
+    ----------
+    tracer : opentelemetry.trace.Tracer or None, optional
+        If given, each timer additionally opens a span with
+        `tracer.start_as_current_span`, for example with the tracer from
+        `opentelemetry.trace.get_tracer("open_mastr")`. Defaults to None.
+    """
+
+    enabled = True
+
+    def __init__(self, tracer=None) -> None:
+        self.tracer = tracer
+        self._lock = threading.Lock()
+        self._timers = defaultdict(list)
+        self._counters = defaultdict(float)
+        self._histograms = defaultdict(list)
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def timer(self, name, table=None, operation=None, **attributes):
+        """Measure the duration of the enclosed block as stage `name`."""
+        span = (
+            self.tracer.start_as_current_span(
+                name,
+                attributes={
+                    key: value
+                    for key, value in dict(
+                        attributes, table=table, operation=operation
+                    ).items()
+                    if value is not None
+                },
+            )
+            if self.tracer is not None
+            else None
+        )
+        start = time.perf_counter()
+        try:
+            if span is None:
+                yield
+            else:
+                with span:
+                    yield
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self._timers[(name, table, operation)].append(duration)
+
+    def increment(self, name, value=1, table=None) -> None:
+        """Add `value` to the counter `name`."""
+        with self._lock:
+            self._counters[(name, table)] += value
+
+    def observe(self, name, value, table=None, operation=None) -> None:
+        """Record `value` in the histogram `name`."""
+        with self._lock:
+            self._histograms[(name, table, operation)].append(value)
+
+    def summary(self) -> "RunSummary":
+        """Return the summary of all metrics collected so far."""
+        with self._lock:
+            timers = {key: list(values) for key, values in self._timers.items()}
+            counters = dict(self._counters)
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+        return RunSummary(
+            timers=timers,
+            counters=counters,
+            histograms=histograms,
+            duration=time.perf_counter() - self._start,
+        )
+
+
+class NullMetricsCollector(MetricsCollector):
+    """Collector that discards all metrics, used when no collector is active."""
+
+    enabled = False
+
+    @contextmanager
+    def timer(self, name, table=None, operation=None, **attributes):
+        yield
+
+    def increment(self, name, value=1, table=None) -> None:
+        pass
+
+    def observe(self, name, value, table=None, operation=None) -> None:
+        pass
+
+
+class RunSummary:
+    """
+    Summary of the metrics of a run.
+
+    Attributes
+    ----------
+    duration : float
+        Seconds between the creation of the collector and the summary.
+    stages : pandas.DataFrame
+        Number of calls, total, mean, median, 95th percentile and maximal
+        seconds per stage, table and operation, e.g. of the SOAP API calls
+        (`soap_call`) per API operation.
+    tables : pandas.DataFrame
+        Rows, bytes, retries, skipped duplicates, skipped rows, coerced values
+        and deleted values per table, together with the seconds spent on the
+        table and the resulting rows and bytes per second.
+    counters : dict
+        All counters with `(name, table)` as key.
+    histograms : pandas.DataFrame
+        Count, mean, median, 95th percentile and maximum of each histogram,
+        for example of the rows (`batch_rows`) and seconds (`batch_seconds`) of
+        the batches written to the database.
+    """
+
+    def __init__(self, timers, counters, histograms, duration) -> None:
+        self.duration = duration
+        self.counters = counters
+        self.stages = pd.DataFrame(
+            [
+                {
+                    "stage": name,
+                    "table": table,
+                    "operation": operation,
+                    "calls": len(values),
+                    "seconds": sum(values),
+                    "mean_seconds": sum(values) / len(values),
+                    "median_seconds": pd.Series(values).median(),
+                    "p95_seconds": pd.Series(values).quantile(0.95),
+                    "max_seconds": max(values),
+                }
+                for (name, table, operation), values in timers.items()
+            ],
+            columns=[
+                "stage",
+                "table",
+                "operation",
+                "calls",
+                "seconds",
+                "mean_seconds",
+                "median_seconds",
+                "p95_seconds",
+                "max_seconds",
+            ],
+        )
+        self.histograms = pd.DataFrame(
+            [
+                {
+                    "name": name,
+                    "table": table,
+                    "operation": operation,
+                    "count": len(values),
+                    "mean": pd.Series(values).mean(),
+                    "median": pd.Series(values).median(),
+                    "p95": pd.Series(values).quantile(0.95),
+                    "max": max(values),
+                }
+                for (name, table, operation), values in histograms.items()
+            ],
+            columns=[
+                "name",
+                "table",
+                "operation",
+                "count",
+                "mean",
+                "median",
+                "p95",
+                "max",
+            ],
+        )
+        self.tables = self._table_summary()
+
+    def _table_summary(self) -> pd.DataFrame:
+        tables = sorted(
+            {table for _, table in self.counters if table is not None}
+            | set(self.stages["table"].dropna())
+        )
+        seconds = self.stages.groupby("table")["seconds"].sum()
+        summary = pd.DataFrame(
+            {
+                counter: [self.counters.get((counter, table), 0) for table in tables]
+                for counter in TABLE_COUNTERS
+            },
+            index=pd.Index(tables, name="table"),
+        ).astype("int64")
+        summary["seconds"] = seconds.reindex(summary.index, fill_value=0.0).astype(
+            "float64"
+        )
+        seconds = summary["seconds"].where(summary["seconds"] > 0)
+        summary["rows_per_second"] = (summary["rows"] / seconds).fillna(0.0)
+        summary["bytes_per_second"] = (summary["bytes"] / seconds).fillna(0.0)
+        return summary
+
+    def __repr__(self) -> str:
+        return (
+            f"RunSummary(duration={self.duration:.1f}s, tables={len(self.tables)}, "
+            f"stages={len(self.stages)})"
+        )
+
+
+_active_collector = NullMetricsCollector()
+
+
+def get_metrics() -> MetricsCollector:
+    """Return the active metrics collector."""
+    return _active_collector
+
+
+@contextmanager
+def use_metrics(collector: MetricsCollector):
+    """Activate `collector` for the enclosed block."""
+    global _active_collector
+    previous = _active_collector
+    _active_collector = collector
+    try:
+        yield collector
+    finally:
+        _active_collector = previous
@@ -10,6 +10,7 @@ from sqlalchemy import (
     func,
     Date,
     JSON,
+    Index,
 )
 
 
@@ -72,6 +73,59 @@ class MissedAdditionalData(Base):
     download_date = Column(DateTime(timezone=True), default=func.now())
 
 
+class BackfillCheckpoint(Base):
+    __tablename__ = "backfill_checkpoints"
+
+    data_type = Column(String, primary_key=True)
+    energietraeger = Column(String, primary_key=True)
+    date_from = Column(String, primary_key=True)
+    last_chunk_start = Column(Integer)
+    DatumLetzteAktualisierung = Column(DateTime(timezone=True))
+    completed = Column(Boolean, default=False)
+    update_date = Column(DateTime(timezone=True), default=func.now())
+
+
+class BasicUnitsWatermark(Base):
+    __tablename__ = "basic_units_watermarks"
+
+    technology = Column(String, primary_key=True)
+    DatumLetzteAktualisierung = Column(DateTime(timezone=True))
+    row_count = Column(Integer)
+    update_date = Column(DateTime(timezone=True), default=func.now())
+
+
+class SpatialIndexState(Base):
+    __tablename__ = "spatial_index_states"
+
+    table_name = Column(String, primary_key=True)
+    max_rowid = Column(Integer)
+    update_date = Column(DateTime(timezone=True), default=func.now())
+
+
+class CapacityStatistic(Base):
+    __tablename__ = "capacity_statistics"
+    __table_args__ = (
+        Index("ix_capacity_statistics_level", "technology", "region_level"),
+    )
+
+    id = Column(
+        Integer,
+        Sequence("capacity_statistics_id_seq"),
+        primary_key=True,
+    )
+    technology = Column(String)
+    region_level = Column(String)
+    Bundesland = Column(String)
+    Landkreis = Column(String)
+    Gemeindeschluessel = Column(String)
+    Energietraeger = Column(String)
+    Inbetriebnahmejahr = Column(Integer)
+    Anzahl = Column(Integer)
+    Bruttoleistung = Column(Float)
+    Nettonennleistung = Column(Float)
+    update_date = Column(DateTime(timezone=True), default=func.now())
+
+
 class Extended(object):
     NetzbetreiberMastrNummer = Column(String)
     Registrierungsdatum = Column(Date)
@@ -815,6 +869,18 @@ class ChangedDSOAssignment(ParentAllTables, Base):
     Netzbetreiberzuordnungsaenderungsdatum = Column(DateTime(timezone=True))
 
 
+# Columns used to join and filter tables, e.g. in exports and when mirroring
+# via the API. They are indexed in all tables that have them once the tables
+# are filled, see `Mastr.optimize()`. The indexes are not part of the table
+# definitions to keep bulk inserts fast.
+secondary_index_columns = [
+    "Einheittyp",
+    "EegMastrNummer",
+    "KwkMastrNummer",
+    "GenMastrNummer",
+    "DatumLetzteAktualisierung",
+]
+
 tablename_mapping = {
     "anlageneegbiomasse": {
         "__name__": BiomassEeg.__tablename__,
@@ -0,0 +1,201 @@
+import cProfile
+import os
+import pstats
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from open_mastr.utils.config import setup_logger
+from open_mastr.utils.metrics import MetricsCollector, get_metrics, use_metrics
+
+log = setup_logger()
+
+# Environment variable that enables profiling for Mastr.download and Mastr.to_csv
+PROFILE_ENV_VARIABLE = "OPEN_MASTR_PROFILE"
+
+
+class StageProfiler(MetricsCollector):
+    """
+    Profiles each stage of a run with `cProfile`.
+
+    The profiler is used like a metrics collector: Every timer of a table (or,
+    for timers without a table, of a stage such as "download") is run under
+    `cProfile`, and the statistics are aggregated per table. Timers, counters
+    and histograms are passed on to the wrapped collector.
+
+    Parameters
+    ----------
+    output_dir : str
+        Directory the `<table>.prof` files are written to.
+    collector : MetricsCollector or None, optional
+        Collector receiving the metrics. Defaults to the active collector.
+    top : int, optional
+        Number of hotspots shown by :meth:`finish`. Defaults to 20.
+    """
+
+    def __init__(self, output_dir, collector=None, top=20) -> None:
+        super().__init__(tracer=None)
+        self.output_dir = output_dir
+        self.collector = collector if collector is not None else get_metrics()
+        self.enabled = self.collector.enabled
+        self.top = top
+        self._stats = {}
+        self._local = threading.local()
+
+    @contextmanager
+    def timer(self, name, table=None, **attributes):
+        with self.collector.timer(name, table=table, **attributes):
+            # Nested stages are part of the profile of the outer stage
+            if getattr(self._local, "active", False):
+                yield
+                return
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is already running in this thread
+                yield
+                return
+            self._local.active = True
+            try:
+                yield
+            finally:
+                profile.disable()
+                self._local.active = False
+                self._add_profile(table or name, profile)
+
+    def increment(self, name, value=1, table=None) -> None:
+        self.collector.increment(name, value, table=table)
+
+    def observe(self, name, value, table=None, operation=None) -> None:
+        self.collector.observe(name, value, table=table, operation=operation)
+
+    def summary(self):
+        return self.collector.summary()
+
+    def _add_profile(self, key, profile) -> None:
+        with self._lock:
+            if key in self._stats:
+                self._stats[key].add(profile)
+            else:
+                self._stats[key] = pstats.Stats(profile)
+
+    def hotspots(self, top=None) -> pd.DataFrame:
+        """
+        Return the functions with the highest internal time over all stages.
+
+        Parameters
+        ----------
+        top : int or None, optional
+            Number of functions. Defaults to the `top` of the profiler.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Table, function, number of calls, internal and cumulative seconds,
+            sorted by the internal seconds.
+        """
+        rows = []
+        with self._lock:
+            for key, stats in self._stats.items():
+                for (filename, line, function), (
+                    _,
+                    calls,
+                    internal_time,
+                    cumulative_time,
+                    _,
+                ) in stats.stats.items():
+                    rows.append(
+                        {
+                            "table": key,
+                            "function": f"{function} ({filename}:{line})",
+                            "calls": calls,
+                            "internal_seconds": internal_time,
+                            "cumulative_seconds": cumulative_time,
+                        }
+                    )
+        hotspots = pd.DataFrame(
+            rows,
+            columns=[
+                "table",
+                "function",
+                "calls",
+                "internal_seconds",
+                "cumulative_seconds",
+            ],
+        )
+        return hotspots.nlargest(top or self.top, "internal_seconds").reset_index(
+            drop=True
+        )
+
+    def finish(self) -> pd.DataFrame:
+        """
+        Write one `<table>.prof` file per table and print the hotspots.
+
+        The files can be inspected with `pstats`, `snakeviz` or converted
+        for speedscope.
+
+        Returns
+        -------
+        pandas.DataFrame
+            See :meth:`hotspots`.
+        """
+        if not self._stats:
+            log.info("No stage was profiled.")
+            return self.hotspots()
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._lock:
+            for key, stats in self._stats.items():
+                file_name = re.sub(r"[^\w.-]", "_", key)
+                stats.dump_stats(os.path.join(self.output_dir, f"{file_name}.prof"))
+        hotspots = self.hotspots()
+        with pd.option_context("display.max_colwidth", 120, "display.width", 200):
+            print(f"Top {len(hotspots)} hotspots:\n{hotspots.to_string()}")
+        print(f"Profiles were written to {self.output_dir}.")
+        return hotspots
+
+
+def get_profile_dir(profile, output_dir):
+    """
+    Return the directory for the profiles or None if profiling is disabled.
+
+    Parameters
+    ----------
+    profile : bool or str or None
+        True profiles into a new folder in `<output_dir>/profiles`, a string
+        is used as directory. If None, the environment variable
+        `OPEN_MASTR_PROFILE` is used, which accepts the same values.
+    output_dir : str
+        Output directory of open-mastr.
+    """
+    if profile is None:
+        profile = os.environ.get(PROFILE_ENV_VARIABLE, "")
+    if isinstance(profile, str):
+        if profile.lower() in ["", "0", "false", "no"]:
+            return None
+        if profile.lower() not in ["1", "true", "yes"]:
+            return profile
+    if not profile:
+        return None
+    return os.path.join(
+        output_dir, "profiles", datetime.now().strftime("%Y%m%d_%H%M%S")
+    )
+
+
+@contextmanager
+def profile_stages(output_dir, top=20):
+    """
+    Profile every stage of the enclosed block with a :class:`StageProfiler`.
+
+    The profiles are written and the hotspots are printed when the block is
+    left, also if it raised an error.
+    """
+    profiler = StageProfiler(output_dir, top=top)
+    try:
+        with use_metrics(profiler):
+            yield profiler
+    finally:
+        profiler.finish()
@@ -10,6 +10,7 @@ from tqdm import tqdm
 
 # setup logger
 from open_mastr.utils.config import setup_logger
+from open_mastr.utils.metrics import get_metrics
 
 try:
     USER_AGENT = (
@@ -140,10 +141,12 @@ def download_xml_Mastr(
         log.error("Could not download file: download URL not found")
         return
 
+    metrics = get_metrics()
     total_length = int(18000 * 1024 * 1024)
     with (
         open(save_path, "wb") as zfile,
         tqdm(desc=save_path, total=(total_length / 1024 / 1024), unit="") as bar,
+        metrics.timer("download", url=url),
     ):
         for chunk in r.iter_content(chunk_size=1024 * 1024):
             # chunk size of 1024 * 1024 needs 9min 11 sek = 551sek
@@ -151,6 +154,7 @@ def download_xml_Mastr(
             if chunk:
                 zfile.write(chunk)
                 zfile.flush()
+                metrics.increment("bytes", len(chunk))
             bar.update()
             # if the rate falls below 100 kB/s -> prompt warning
             if bar.format_dict["rate"] and bar.format_dict["rate"] < 2:
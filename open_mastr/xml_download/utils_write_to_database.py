@@ -1,5 +1,13 @@
+import contextlib
+import glob
+import hashlib
+import os
+import re
+import time
+from importlib.metadata import PackageNotFoundError, version
 from shutil import Error
-from zipfile import ZipFile
+from typing import NamedTuple
+from zipfile import ZipFile, ZipInfo
 
 import lxml
 import numpy as np
@@ -9,11 +17,40 @@ from sqlalchemy import select
 from sqlalchemy.sql import text
 
 from open_mastr.utils.config import setup_logger
-from open_mastr.utils.helpers import data_to_include_tables
+from open_mastr.utils.helpers import (
+    data_to_include_tables,
+    mark_spatial_index_outdated,
+)
+from open_mastr.utils.metrics import get_metrics
 from open_mastr.utils.orm import tablename_mapping
 from open_mastr.xml_download.utils_cleansing_bulk import cleanse_bulk_data
+from open_mastr.xml_download.utils_zip_access import MappedZip, read_utf8_member
 from io import StringIO
 
+try:
+    # Parsed members of another open-mastr version are not reused
+    PARSED_MEMBER_CACHE_VERSION = version("open-mastr")
+except PackageNotFoundError:
+    PARSED_MEMBER_CACHE_VERSION = "unknown"
+
+log = setup_logger()
+
+# Identifiers with leading zeros and their length
+ZERO_PADDED_COLUMNS = {
+    "Gemeindeschluessel": 8,
+    "Postleitzahl": 5,
+}
+
+# Number of rows written per transaction, per SQLAlchemy dialect
+WRITE_BATCH_SIZE = {
+    "sqlite": 10000,
+    "postgresql": 20000,
+}
+DEFAULT_WRITE_BATCH_SIZE = 10000
+
+# Name of the xml files in the zipped MaStR, e.g. EinheitenSolar_12.xml or Katalogwerte.xml
+XML_MEMBER_PATTERN = re.compile(r"^(?P<table>[^_./]+)(?:_(?P<part>\d+))?\.xml$", re.I)
+
 
 def write_mastr_xml_to_database(
     engine: sqlalchemy.engine.Engine,
@@ -21,54 +58,241 @@ def write_mastr_xml_to_database(
     data: list,
     bulk_cleansing: bool,
     bulk_download_date: str,
+    cache_dir: str = None,
+    batch_size: int = None,
 ) -> None:
-    """Write the Mastr in xml format into a database defined by the engine parameter."""
-    include_tables = data_to_include_tables(data, mapping="write_xml")
-
-    with ZipFile(zipped_xml_file_path, "r") as f:
-        files_list = f.namelist()
-        files_list = correct_ordering_of_filelist(files_list)
-        for file_name in files_list:
-            # xml_tablename is the beginning of the filename without the number in lowercase
-            xml_tablename = file_name.split("_")[0].split(".")[0].lower()
+    """Write the Mastr in xml format into a database defined by the engine parameter.
 
-            if is_table_relevant(
-                xml_tablename=xml_tablename, include_tables=include_tables
-            ):
-                sql_tablename = tablename_mapping[xml_tablename]["__name__"]
-
-                if is_first_file(file_name):
-                    create_database_table(engine=engine, xml_tablename=xml_tablename)
-                    print(
-                        f"Table '{sql_tablename}' is filled with data '{xml_tablename}' "
-                        "from the bulk download."
-                    )
-                print(f"File '{file_name}' is parsed.")
+    If `cache_dir` is given, the parsed and cleansed table of each file is stored
+    there and reused for a later export containing the identical file, see
+    :func:`parsed_member_cache_path`. The tables are written in batches of
+    `batch_size` rows, see :func:`add_table_to_database`.
+    """
+    include_tables = data_to_include_tables(data, mapping="write_xml")
+    metrics = get_metrics()
+
+    with MappedZip(zipped_xml_file_path) as f:
+        previous_xml_tablename = None
+        for member in build_member_index(f, include_tables):
+            file_name = member.info.filename
+            xml_tablename = member.xml_tablename
+            sql_tablename = tablename_mapping[xml_tablename]["__name__"]
+
+            # The index is sorted, so the first file of a table creates the table
+            if xml_tablename != previous_xml_tablename:
+                with engine.begin() as connection:
+                    mark_spatial_index_outdated(connection, sql_tablename)
+                create_database_table(engine=engine, xml_tablename=xml_tablename)
+                print(
+                    f"Table '{sql_tablename}' is filled with data '{xml_tablename}' "
+                    "from the bulk download."
+                )
+                previous_xml_tablename = xml_tablename
+            print(f"File '{file_name}' is parsed.")
 
-                df = preprocess_table_for_writing_to_database(
+            cache_path = (
+                parsed_member_cache_path(cache_dir, f, file_name, bulk_cleansing)
+                if cache_dir
+                else None
+            )
+            df = None
+            if cache_path:
+                with metrics.timer("cache_read", table=sql_tablename):
+                    df = read_parsed_member(cache_path)
+
+            if df is not None:
+                metrics.increment("cache_hits", table=sql_tablename)
+                # Only the download date differs between identical files
+                df["DatumDownload"] = pd.to_datetime(
+                    bulk_download_date, errors="coerce"
+                )
+            else:
+                df = parse_member(
                     f=f,
                     file_name=file_name,
                     xml_tablename=xml_tablename,
+                    sql_tablename=sql_tablename,
                     bulk_download_date=bulk_download_date,
+                    bulk_cleansing=bulk_cleansing,
+                    zipped_xml_file_path=zipped_xml_file_path,
                 )
+                if cache_path:
+                    with metrics.timer("cache_write", table=sql_tablename):
+                        write_parsed_member(df, cache_path)
+            metrics.increment("bytes", member.info.file_size, table=sql_tablename)
+            metrics.increment("rows", len(df), table=sql_tablename)
 
-                # Convert date and datetime columns into the datatype datetime
-                df = cast_date_columns_to_datetime(xml_tablename, df)
-
-                if bulk_cleansing:
-                    df = cleanse_bulk_data(df, zipped_xml_file_path)
-
+            with metrics.timer("write", table=sql_tablename):
                 add_table_to_database(
                     df=df,
                     xml_tablename=xml_tablename,
                     sql_tablename=sql_tablename,
                     if_exists="append",
                     engine=engine,
+                    batch_size=batch_size,
                 )
     print("Bulk download and data cleansing were successful.")
 
 
-def is_table_relevant(xml_tablename: str, include_tables: list) -> bool:
+class ZipMember(NamedTuple):
+    """Xml file of the zipped MaStR, see :func:`build_member_index`."""
+
+    xml_tablename: str
+    part: int
+    info: ZipInfo
+
+
+def build_member_index(f: ZipFile, include_tables) -> list:
+    """
+    Index the relevant xml files of the zipped MaStR.
+
+    The file names are parsed once with :data:`XML_MEMBER_PATTERN` from the
+    central directory of the zip file. Only files of tables in `include_tables`
+    are kept, so no other file is touched. The index is picklable and can be
+    handed to parallel workers.
+
+    Parameters
+    ----------
+    f : ZipFile or MappedZip
+        Opened zipped MaStR.
+    include_tables : list or set
+        Lowercase xml table names to include, see
+        `open_mastr.utils.helpers.data_to_include_tables`.
+
+    Returns
+    -------
+    list of ZipMember
+        `(xml_tablename, part, info)` of each relevant file, sorted by table and
+        numerically by part, e.g. `EinheitenSolar_2.xml` before `EinheitenSolar_10.xml`.
+    """
+    include_tables = set(include_tables)
+    relevant_tables = {}
+    members = []
+    for info in f.infolist():
+        match = XML_MEMBER_PATTERN.match(info.filename)
+        if match is None:
+            continue
+        xml_tablename = match["table"].lower()
+        if xml_tablename not in relevant_tables:
+            relevant_tables[xml_tablename] = is_table_relevant(
+                xml_tablename=xml_tablename, include_tables=include_tables
+            )
+        if relevant_tables[xml_tablename]:
+            members.append(ZipMember(xml_tablename, int(match["part"] or 1), info))
+    return sorted(members, key=lambda member: (member.xml_tablename, member.part))
+
+
+def parse_member(
+    f: ZipFile,
+    file_name: str,
+    xml_tablename: str,
+    sql_tablename: str,
+    bulk_download_date: str,
+    bulk_cleansing: bool,
+    zipped_xml_file_path: str,
+) -> pd.DataFrame:
+    """Parse one xml file of the zipped MaStR into a DataFrame that is ready to be
+    written to the database."""
+    metrics = get_metrics()
+    with metrics.timer("parse", table=sql_tablename, file=file_name):
+        df = preprocess_table_for_writing_to_database(
+            f=f,
+            file_name=file_name,
+            xml_tablename=xml_tablename,
+            bulk_download_date=bulk_download_date,
+        )
+
+    # Convert date and datetime columns into the datatype datetime
+    with metrics.timer("cast_dates", table=sql_tablename):
+        df = cast_date_columns_to_datetime(xml_tablename, df)
+
+    if bulk_cleansing:
+        with metrics.timer("cleanse", table=sql_tablename):
+            df = cleanse_bulk_data(df, zipped_xml_file_path)
+    return df
+
+
+def parsed_member_cache_path(
+    cache_dir: str, f: ZipFile, file_name: str, bulk_cleansing: bool
+) -> str:
+    """
+    Path of the cached parsed table of a file in the zipped MaStR, without suffix.
+
+    The key is built from the CRC32 and the size of the file, which are stored in
+    the central directory of the zip file, so the file has not to be read. If the
+    data is cleansed, the CRC32 and size of `Katalogwerte.xml` are part of the key
+    as well.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory of the cache.
+    f : ZipFile or MappedZip
+        Opened zipped MaStR.
+    file_name : str
+        Name of the xml file in the zipped MaStR.
+    bulk_cleansing : bool
+        Whether the cached table is cleansed.
+
+    Returns
+    -------
+    str
+        Path of the form `<cache_dir>/<file>-<cleansed|raw>-<key>`.
+    """
+    members = [file_name, "Katalogwerte.xml"] if bulk_cleansing else [file_name]
+    key = [PARSED_MEMBER_CACHE_VERSION, str(bulk_cleansing)]
+    for member in members:
+        info = f.getinfo(member)
+        key.extend([member, f"{info.CRC:08x}", str(info.file_size)])
+    digest = hashlib.sha256("|".join(key).encode()).hexdigest()[:16]
+    variant = "cleansed" if bulk_cleansing else "raw"
+    return os.path.join(cache_dir, f"{file_name.split('.')[0]}-{variant}-{digest}")
+
+
+def read_parsed_member(cache_path: str):
+    """Read a cached parsed table, returns None if it is not cached."""
+    for suffix, read_function in [
+        (".parquet", pd.read_parquet),
+        (".pkl", pd.read_pickle),
+    ]:
+        if os.path.exists(cache_path + suffix):
+            try:
+                return read_function(cache_path + suffix)
+            except (ImportError, OSError, ValueError) as err:
+                log.warning(f"Cached table {cache_path + suffix} is ignored: {err}")
+    return None
+
+
+def write_parsed_member(df: pd.DataFrame, cache_path: str) -> None:
+    """
+    Store a parsed table in the cache.
+
+    The table is stored as Parquet if pyarrow is installed and the columns can be
+    converted, otherwise as pickle. Older versions of the same file, cleansed or
+    not like the new one, are removed, so the cache holds one version of each
+    file and variant. Temporary files of concurrent runs are kept.
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(temporary_path, index=False)
+        suffix = ".parquet"
+    except (ImportError, ValueError, TypeError):
+        # Columns with mixed types can't be stored as Parquet
+        df.to_pickle(temporary_path)
+        suffix = ".pkl"
+    os.replace(temporary_path, cache_path + suffix)
+
+    prefix = cache_path.rsplit("-", 1)[0]
+    for outdated_path in glob.glob(f"{glob.escape(prefix)}-*"):
+        path, suffix = os.path.splitext(outdated_path)
+        if suffix in [".parquet", ".pkl"] and path != cache_path:
+            # A concurrent run may have removed it already
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(outdated_path)
+
+
+def is_table_relevant(xml_tablename: str, include_tables) -> bool:
     """Checks if the table contains relevant data and if the user wants to
     have it in the database."""
     # few tables are only needed for data cleansing of the xml files and contain no
@@ -84,9 +308,7 @@ def is_table_relevant(xml_tablename: str, include_tables: list) -> bool:
         )
         return False
     # check if the table should be written to sql database (depends on user input)
-    include_count = include_tables.count(xml_tablename)
-
-    return include_count == 1 and boolean_write_table_to_sql_database
+    return xml_tablename in include_tables and boolean_write_table_to_sql_database
 
 
 def create_database_table(engine: sqlalchemy.engine.Engine, xml_tablename: str) -> None:
@@ -97,23 +319,23 @@ def create_database_table(engine: sqlalchemy.engine.Engine, xml_tablename: str)
     orm_class.__table__.create(engine)
 
 
-def is_first_file(file_name: str) -> bool:
-    """check if the file name indicates that it is the first file from the table"""
-    return (
-        file_name.split(".")[0].split("_")[-1] == "1"
-        or len(file_name.split(".")[0].split("_")) == 1
-    )
-
-
 def cast_date_columns_to_datetime(xml_tablename: str, df: pd.DataFrame) -> pd.DataFrame:
     sqlalchemy_columnlist = tablename_mapping[xml_tablename][
         "__class__"
     ].__table__.columns.items()
+    metrics = get_metrics()
     for column in sqlalchemy_columnlist:
         column_name = column[0]
         if is_date_column(column, df):
             # Convert column to datetime64, invalid string -> NaT
-            df[column_name] = pd.to_datetime(df[column_name], errors="coerce")
+            converted = pd.to_datetime(df[column_name], errors="coerce")
+            if metrics.enabled:
+                metrics.increment(
+                    "coerced_values",
+                    int((converted.isna() & df[column_name].notna()).sum()),
+                    table=tablename_mapping[xml_tablename]["__name__"],
+                )
+            df[column_name] = converted
     return df
 
 
@@ -128,30 +350,22 @@ def is_date_column(column, df: pd.DataFrame) -> bool:
     )
 
 
-def correct_ordering_of_filelist(files_list: list) -> list:
-    """Files that end with a single digit number get a 0 prefixed to this number
-    to correct the list ordering. Afterwards the 0 is deleted again."""
-    files_list_ordered = []
-    count_if_zeros_are_prefixed = 0
-    for file_name in files_list:
-        if len(file_name.split(".")[0].split("_")[-1]) == 1:
-            file_name = file_name.split("_")[0] + "_0" + file_name.split("_")[1]
-            count_if_zeros_are_prefixed += 1
-        files_list_ordered.append(file_name)
-
-    files_list_ordered.sort()
-    # the list is now in right order, but the 0 has to be deleted
-    files_list_correct = []
-    for file_name in files_list_ordered:
-        if file_name.split(".")[0].split("_")[-1][0] == "0":
-            file_name = file_name.split("_")[0] + "_" + file_name.split("_0")[-1]
-        files_list_correct.append(file_name)
-
-    if count_if_zeros_are_prefixed >= 5:
-        # check if file names from marktstammdatenregister have no prefixed 0 already
-        files_list = files_list_correct
-
-    return files_list
+def xml_dtype_schema(xml_tablename: str) -> dict:
+    """Returns the dtypes of the columns of an xml table that must not be inferred by
+    `pandas.read_xml`. Identifiers with leading zeros are read as strings, so the 0 is
+    kept. The keys are the column names of the xml file."""
+    orm_columns = tablename_mapping[xml_tablename]["__class__"].__table__.columns
+    xml_column_names = {
+        orm_name: xml_name
+        for xml_name, orm_name in (
+            tablename_mapping[xml_tablename]["replace_column_names"] or {}
+        ).items()
+    }
+    return {
+        xml_column_names.get(column_name, column_name): str
+        for column_name in ZERO_PADDED_COLUMNS
+        if column_name in orm_columns
+    }
 
 
 def preprocess_table_for_writing_to_database(
@@ -160,11 +374,13 @@ def preprocess_table_for_writing_to_database(
     xml_tablename: str,
     bulk_download_date: str,
 ) -> pd.DataFrame:
-    data = f.read(file_name)
+    # lxml parses UTF-8 faster and it needs half the memory of UTF-16
+    data = read_utf8_member(f, file_name)
+    dtype = xml_dtype_schema(xml_tablename)
     try:
-        df = pd.read_xml(data, encoding="UTF-16", compression="zip")
+        df = pd.read_xml(data, encoding="UTF-8", compression="zip", dtype=dtype)
     except lxml.etree.XMLSyntaxError as err:
-        df = handle_xml_syntax_error(data.decode("utf-16"), err)
+        df = handle_xml_syntax_error(data.decode("utf-8"), err, dtype=dtype)
 
     df = add_zero_as_first_character_for_too_short_string(df)
     df = change_column_names_to_orm_format(df, xml_tablename)
@@ -192,9 +408,30 @@ def add_table_to_database(
     sql_tablename: str,
     if_exists: str,
     engine: sqlalchemy.engine.Engine,
+    batch_size: int = None,
 ) -> None:
-    # get a dictionary for the data types
+    """Write the table of one xml file to the database in batches of rows.
+
+    Each batch is written in its own transaction with an `executemany`, which
+    SQLAlchemy sends as multi-row inserts where the dialect supports it. If a batch
+    fails, only this batch is retried, see :func:`write_batch_to_database`.
 
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Parsed and cleansed xml file.
+    xml_tablename : str
+        Table name of the xml file.
+    sql_tablename : str
+        Name of the database table.
+    if_exists : str
+        Passed to `pandas.DataFrame.to_sql` for the first batch.
+    engine : sqlalchemy.engine.Engine
+        Database engine.
+    batch_size : int or None, optional
+        Number of rows per batch. Defaults to :data:`WRITE_BATCH_SIZE` of the
+        dialect of the engine.
+    """
     table_columns_list = list(
         tablename_mapping[xml_tablename]["__class__"].__table__.columns
     )
@@ -203,60 +440,132 @@ def add_table_to_database(
         for column in table_columns_list
         if column.name in df.columns
     }
+    if batch_size is None:
+        batch_size = WRITE_BATCH_SIZE.get(engine.dialect.name, DEFAULT_WRITE_BATCH_SIZE)
 
     add_missing_columns_to_table(engine, xml_tablename, column_list=df.columns.tolist())
-    for _ in range(10000):
+    # An empty table is written once, so that `if_exists` is applied
+    for start in range(0, max(len(df), 1), batch_size):
+        write_batch_to_database(
+            batch=df.iloc[start : start + batch_size],
+            xml_tablename=xml_tablename,
+            sql_tablename=sql_tablename,
+            if_exists=if_exists if start == 0 else "append",
+            engine=engine,
+            dtype=dtypes_for_writing_sql,
+        )
+
+
+def write_batch_to_database(
+    batch: pd.DataFrame,
+    xml_tablename: str,
+    sql_tablename: str,
+    if_exists: str,
+    engine: sqlalchemy.engine.Engine,
+    dtype: dict,
+    deduplicated: bool = False,
+) -> None:
+    """Write one batch of rows to the database and repair it if this fails.
+
+    Values with a wrong data type are removed, see :func:`delete_wrong_xml_entry`,
+    and rows that already exist in the database are dropped, see
+    :func:`write_single_entries_until_not_unique_comes_up`. If the batch still
+    fails, it is split in halves that are written separately, until the failing
+    row is found and skipped. Rows of other batches are never written twice.
+    """
+    metrics = get_metrics()
+    for attempt in range(100):
+        if attempt:
+            metrics.increment("retries", table=sql_tablename)
         try:
+            start = time.perf_counter()
             with engine.connect() as con:
                 with con.begin():
-                    df.to_sql(
+                    batch.to_sql(
                         sql_tablename,
                         con=con,
                         index=False,
                         if_exists=if_exists,
-                        dtype=dtypes_for_writing_sql,
+                        dtype=dtype,
                     )
-                    break
+            metrics.observe(
+                "batch_seconds", time.perf_counter() - start, table=sql_tablename
+            )
+            metrics.observe("batch_rows", len(batch), table=sql_tablename)
+            return
 
         except sqlalchemy.exc.DataError as err:
-            delete_wrong_xml_entry(err, df)
+            try:
+                repaired_batch = delete_wrong_xml_entry(err, batch)
+            except IndexError:
+                # The wrong entry cannot be read from the error message
+                break
+            if repaired_batch.equals(batch):
+                break
+            metrics.increment(
+                "deleted_values",
+                int((repaired_batch.isna() & batch.notna()).sum().sum()),
+                table=sql_tablename,
+            )
+            batch = repaired_batch
 
         except sqlalchemy.exc.IntegrityError:
             # error resulting from Unique constraint failed
-            df = write_single_entries_until_not_unique_comes_up(
-                df=df, xml_tablename=xml_tablename, engine=engine
+            if deduplicated:
+                break
+            batch = write_single_entries_until_not_unique_comes_up(
+                df=batch, xml_tablename=xml_tablename, engine=engine
             )
+            deduplicated = True
+            if batch.empty:
+                return
+
+    if len(batch) == 1:
+        log.warning(
+            f"One row of table '{sql_tablename}' could not be written and was skipped."
+        )
+        metrics.increment("skipped_rows", table=sql_tablename)
+        return
+
+    metrics.increment("retries", table=sql_tablename)
+    middle = len(batch) // 2
+    # Only the first half may replace the table, the second one is appended to it
+    for half, half_if_exists in [
+        (batch.iloc[:middle], if_exists),
+        (batch.iloc[middle:], "append"),
+    ]:
+        write_batch_to_database(
+            batch=half,
+            xml_tablename=xml_tablename,
+            sql_tablename=sql_tablename,
+            if_exists=half_if_exists,
+            engine=engine,
+            dtype=dtype,
+            deduplicated=deduplicated,
+        )
 
 
 def add_zero_as_first_character_for_too_short_string(df: pd.DataFrame) -> pd.DataFrame:
-    """Some columns are read as integer even though they are actually strings starting with
-    a 0. This function converts those columns back to strings and adds a 0 as first character.
-    """
+    """Adds the leading 0 to identifiers in :data:`ZERO_PADDED_COLUMNS` that lost it.
 
-    dict_of_columns_and_string_length = {
-        "Gemeindeschluessel": 8,
-        "Postleitzahl": 5,
-    }
-    for column_name, string_length in dict_of_columns_and_string_length.items():
+    The bulk download reads these columns as strings, see :func:`xml_dtype_schema`,
+    so only values that are missing the 0 in the data itself are padded. Columns
+    that were read as numbers, e.g. from legacy data, are converted to strings first.
+    """
+    for column_name, string_length in ZERO_PADDED_COLUMNS.items():
         if column_name not in df.columns:
             continue
-        try:
-            df[column_name] = df[column_name].astype("Int64").astype(str)
-        except (ValueError, TypeError):
-            # some Plz are in the format DK-9999 for danish Postleitzahl
-            # or A-9999 for austrian PLz
-            # They cannot be converted to integer
-            df[column_name] = df[column_name].astype(str)
-            continue
-        df[column_name] = df[column_name].where(
-            cond=-df[column_name].isin(["None", "<NA>"]), other=None
-        )
-
-        string_adding_series = pd.Series(["0"] * len(df))
-        string_adding_series = string_adding_series.where(
-            cond=df[column_name].str.len() == string_length - 1, other=""
-        )
-        df[column_name] = string_adding_series + df[column_name]
+        column = df[column_name]
+        if pd.api.types.is_numeric_dtype(column):
+            try:
+                column = column.astype("Int64").astype("string").astype(object)
+                column = column.where(column.notna(), np.nan)
+            except (ValueError, TypeError):
+                column = column.astype(str)
+
+        # Foreign postcodes such as DK-9999 or A-9999 are not padded
+        is_too_short = column.str.fullmatch(rf"\d{{{string_length - 1}}}", na=False)
+        df[column_name] = column.mask(is_too_short, column.str.zfill(string_length))
     return df
 
 
@@ -279,10 +588,18 @@ def write_single_entries_until_not_unique_comes_up(
     table = tablename_mapping[xml_tablename]["__class__"].__table__
     primary_key = next(c for c in table.columns if c.primary_key)
 
+    # Only the keys of the rows in the dataframe are looked up
     with engine.connect() as con:
         with con.begin():
             key_list = (
-                pd.read_sql(sql=select(primary_key), con=con).values.squeeze().tolist()
+                pd.read_sql(
+                    sql=select(primary_key).where(
+                        primary_key.in_(df[primary_key.name].dropna().unique().tolist())
+                    ),
+                    con=con,
+                )
+                .iloc[:, 0]
+                .tolist()
             )
 
     len_df_before = len(df)
@@ -296,6 +613,9 @@ def write_single_entries_until_not_unique_comes_up(
     )  # drop primary keys that already exist in the table
     df = df.reset_index()
     print(f"{len_df_before-len(df)} entries already existed in the database.")
+    get_metrics().increment(
+        "skipped_duplicates", len_df_before - len(df), table=table.name
+    )
 
     return df
 
@@ -349,7 +669,7 @@ def delete_wrong_xml_entry(err: Error, df: pd.DataFrame) -> pd.DataFrame:
     return df.replace(delete_entry, np.nan)
 
 
-def handle_xml_syntax_error(data: str, err: Error) -> pd.DataFrame:
+def handle_xml_syntax_error(data: str, err: Error, dtype: dict = None) -> pd.DataFrame:
     """Deletes entries that cause an xml syntax error and produces DataFrame.
 
     Parameters
@@ -358,6 +678,8 @@ def handle_xml_syntax_error(data: str, err: Error) -> pd.DataFrame:
         Decoded xml file as one string
     err : ErrorMessage
         Error message that appeared when trying to use pd.read_xml on invalid xml file.
+    dtype : dict or None
+        Dtypes of columns passed to pd.read_xml, see :func:`xml_dtype_schema`.
 
     Returns
     ----------
@@ -385,7 +707,7 @@ def handle_xml_syntax_error(data: str, err: Error) -> pd.DataFrame:
         )
         try:
             print("One invalid xml expression was deleted.")
-            df = pd.read_xml(StringIO("\n".join(data)))
+            df = pd.read_xml(StringIO("\n".join(data)), dtype=dtype)
             return df
         except lxml.etree.XMLSyntaxError as e:
             err = e
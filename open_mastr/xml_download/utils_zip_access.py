@@ -0,0 +1,294 @@
+import codecs
+import mmap
+import os
+import re
+import struct
+import zlib
+from zipfile import ZIP_DEFLATED, ZIP_STORED, BadZipFile, ZipFile
+
+# Fixed part of the local file header, see section 4.3.7 of the zip specification
+LOCAL_HEADER_FORMAT = "<4s5H3L2H"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+# Encoding in the xml declaration, which has to match the transcoded content
+XML_DECLARATION_ENCODING = re.compile(
+    r"^(\s*<\?xml[^>]*?encoding\s*=\s*)([\"'])[^\"']*\2", re.I
+)
+
+
+class MappedZip:
+    """
+    Read-only access to the zipped MaStR through a memory map.
+
+    The archive is mapped once and its central directory is read with
+    `zipfile.ZipFile`. Members are read directly from their offset in the
+    mapped archive without a shared file position, so one instance can be used
+    by several threads and is inherited by forked worker processes without
+    reopening the file. Pickling transfers only the path, so spawned workers
+    map the archive again.
+
+    The class provides `infolist`, `namelist`, `getinfo` and `read` of
+    `zipfile.ZipFile` and can replace it for reading.
+
+    Parameters
+    ----------
+    path : str
+        Path of the zip file.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        with open(path, "rb") as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as err:
+                raise BadZipFile(f"File is not a zip file: {path}") from err
+        self._zip = ZipFile(self._mmap)
+        self._data_offsets = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state["path"])
+
+    def close(self) -> None:
+        """
+        Close the archive.
+
+        If views of the memory map are still alive, e.g. of an unfinished
+        :meth:`iter_chunks`, only the reference to the map is dropped. It is
+        then unmapped once the last view is released.
+        """
+        self._zip.close()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+
+    def infolist(self) -> list:
+        return self._zip.infolist()
+
+    def namelist(self) -> list:
+        return self._zip.namelist()
+
+    def getinfo(self, name):
+        return self._zip.getinfo(name)
+
+    def _info(self, member):
+        return self._zip.getinfo(member) if isinstance(member, str) else member
+
+    def data_offset(self, member) -> int:
+        """
+        Return the offset of the compressed data of `member` in the archive.
+
+        The offset is read from the local file header at the position given
+        in the central directory.
+        """
+        info = self._info(member)
+        offset = self._data_offsets.get(info.filename)
+        if offset is None:
+            header = struct.unpack_from(
+                LOCAL_HEADER_FORMAT, self._mmap, info.header_offset
+            )
+            if header[0] != LOCAL_HEADER_SIGNATURE:
+                raise BadZipFile(f"Bad local file header of {info.filename}")
+            file_name_length, extra_length = header[-2:]
+            offset = (
+                info.header_offset + LOCAL_HEADER_SIZE + file_name_length + extra_length
+            )
+            self._data_offsets[info.filename] = offset
+        return offset
+
+    def _compressed_data(self, info) -> memoryview:
+        offset = self.data_offset(info)
+        return memoryview(self._mmap)[offset : offset + info.compress_size]
+
+    def read(self, member) -> bytes:
+        """Return the decompressed content of `member`."""
+        info = self._info(member)
+        if info.compress_type not in [ZIP_STORED, ZIP_DEFLATED]:
+            return self._zip.read(info)
+        with self._compressed_data(info) as compressed:
+            if info.compress_type == ZIP_STORED:
+                data = bytes(compressed)
+            else:
+                data = zlib.decompress(compressed, -zlib.MAX_WBITS, info.file_size)
+        _check_crc(info, zlib.crc32(data))
+        return data
+
+    def iter_chunks(self, member, chunk_size=2**20):
+        """
+        Decompress `member` in chunks of at most `chunk_size` bytes.
+
+        Only one chunk is held in memory at a time, independent of the size of
+        the member. The CRC32 is checked after the last chunk.
+        """
+        info = self._info(member)
+        if info.compress_type not in [ZIP_STORED, ZIP_DEFLATED]:
+            with self._zip.open(info) as file:
+                while chunk := file.read(chunk_size):
+                    yield chunk
+            return
+
+        crc = 0
+        # The view is released in any case, also if the generator is closed early
+        compressed = self._compressed_data(info)
+        try:
+            if info.compress_type == ZIP_STORED:
+                for start in range(0, len(compressed), chunk_size):
+                    chunk = bytes(compressed[start : start + chunk_size])
+                    crc = zlib.crc32(chunk, crc)
+                    yield chunk
+            else:
+                decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                for start in range(0, len(compressed), chunk_size):
+                    data = compressed[start : start + chunk_size]
+                    while data:
+                        chunk = decompressor.decompress(data, chunk_size)
+                        data = decompressor.unconsumed_tail
+                        if chunk:
+                            crc = zlib.crc32(chunk, crc)
+                            yield chunk
+                chunk = decompressor.flush()
+                if chunk:
+                    crc = zlib.crc32(chunk, crc)
+                    yield chunk
+        finally:
+            compressed.release()
+        _check_crc(info, crc)
+
+    def readinto(self, member, buffer: bytearray) -> memoryview:
+        """
+        Decompress `member` into `buffer` and return a view of its content.
+
+        The buffer is enlarged if needed and can be reused for the next member,
+        so no new memory is allocated for members that fit into it. The returned
+        view has to be released before the buffer is enlarged.
+        """
+        info = self._info(member)
+        if len(buffer) < info.file_size:
+            buffer.extend(bytes(info.file_size - len(buffer)))
+        view = memoryview(buffer)
+        position = 0
+        for chunk in self.iter_chunks(info):
+            view[position : position + len(chunk)] = chunk
+            position += len(chunk)
+        return view[:position]
+
+
+def _check_crc(info, crc: int) -> None:
+    if crc != info.CRC:
+        raise BadZipFile(f"Bad CRC-32 for file {info.filename}")
+
+
+def iter_utf8_chunks(f, member, chunk_size=2**20):
+    """
+    Transcode a UTF-16 encoded xml file of the zipped MaStR to UTF-8 in blocks.
+
+    The byte order is taken from the BOM, files without BOM are read as little
+    endian. Surrogate pairs or characters split between two blocks are
+    combined by the incremental decoder. The encoding in the xml declaration
+    is changed to UTF-8. Invalid UTF-16 is replaced by U+FFFD.
+
+    Parameters
+    ----------
+    f : MappedZip or ZipFile
+        Opened zipped MaStR.
+    member : str or ZipInfo
+        Xml file in the zipped MaStR.
+    chunk_size : int, optional
+        Size of the UTF-16 blocks. Defaults to 1 MiB.
+
+    Yields
+    ------
+    bytes
+        UTF-8 encoded blocks of the xml file.
+    """
+    if isinstance(f, MappedZip):
+        chunks = f.iter_chunks(member, chunk_size)
+    else:
+        chunks = _iter_zip_file_chunks(f, member, chunk_size)
+
+    decoder = None
+    start = b""
+    head = ""
+    try:
+        for chunk in chunks:
+            if decoder is None:
+                # Choose the decoder once the first two bytes are known
+                start += chunk
+                if len(start) < 2:
+                    continue
+                decoder = _utf16_decoder(start)
+                chunk = start
+            text = decoder.decode(chunk)
+            if head is not None:
+                # Collect the beginning of the file until the xml declaration is complete
+                head += text
+                if "?>" not in head and len(head) < 4096:
+                    continue
+                text = XML_DECLARATION_ENCODING.sub(r"\1\2UTF-8\2", head, count=1)
+                head = None
+            if text:
+                yield text.encode("utf-8")
+    finally:
+        # Release the archive also if decoding fails or the consumer stops early
+        chunks.close()
+
+    if decoder is None:
+        decoder = _utf16_decoder(start)
+        text = decoder.decode(start, final=True)
+    else:
+        text = decoder.decode(b"", final=True)
+    if head is not None:
+        text = XML_DECLARATION_ENCODING.sub(r"\1\2UTF-8\2", head + text, count=1)
+    if text:
+        yield text.encode("utf-8")
+
+
+def _utf16_decoder(start: bytes):
+    """Incremental UTF-16 decoder for a file starting with `start`"""
+    if start[:2] in [codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE]:
+        # The decoder takes the byte order from the BOM and removes it
+        return codecs.getincrementaldecoder("utf-16")(errors="replace")
+    return codecs.getincrementaldecoder("utf-16-le")(errors="replace")
+
+
+def read_utf8_member(f, member, cache_dir=None) -> bytes:
+    """
+    Return a UTF-16 encoded xml file of the zipped MaStR encoded as UTF-8.
+
+    See :func:`iter_utf8_chunks`. If `cache_dir` is given, the UTF-8 version is
+    stored as `<cache_dir>/<file>-<crc32>-<size>.xml` and read from there if
+    the zipped MaStR contains the identical file again.
+    """
+    if cache_dir is None:
+        return b"".join(iter_utf8_chunks(f, member))
+
+    info = f.getinfo(member) if isinstance(member, str) else member
+    stem = os.path.splitext(os.path.basename(info.filename))[0]
+    cache_path = os.path.join(cache_dir, f"{stem}-{info.CRC:08x}-{info.file_size}.xml")
+    if not os.path.exists(cache_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            for chunk in iter_utf8_chunks(f, info):
+                file.write(chunk)
+        os.replace(temporary_path, cache_path)
+    with open(cache_path, "rb") as file:
+        return file.read()
+
+
+def _iter_zip_file_chunks(f: ZipFile, member, chunk_size: int):
+    with f.open(member) as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
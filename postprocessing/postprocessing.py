@@ -1,18 +1,32 @@
 import datetime
 import json
+import shutil
+import time
+from functools import partial
 import pandas as pd
-from sqlalchemy import text, String
-from geoalchemy2 import Geometry, WKTElement
-import numpy as np
+from sqlalchemy import text, Integer, String
+from geoalchemy2 import Geometry
 import os
 from urllib.request import urlretrieve
 from open_mastr.postprocessing import orm
-from open_mastr.utils.config import setup_logger, get_filenames, get_data_version_dir
+from open_mastr.postprocessing.utils import (
+    COPY_NULL,
+    copy_csv_buffer,
+    file_hash,
+    run_tasks,
+    split_sql_statements,
+    update_cache,
+)
+from open_mastr.utils.config import (
+    setup_logger,
+    get_filenames,
+    get_data_version_dir,
+    get_output_dir,
+)
 from open_mastr.soap_api.metadata.create import create_datapackage_meta_json
 from open_mastr.utils.helpers import chunks, session_scope, db_engine
 import geopandas as gpd
-from shapely.wkb import loads as wkb_loads
-
+import shapely
 
 log = setup_logger()
 
@@ -28,6 +42,8 @@ OEP_QUERY_PATTERN = "https://openenergy-platform.org/api/v0/schema/{schema}/tabl
 
 DATA_BASE_PATH = "data"
 
+SQL_POSTPROCESSING_DIR = os.path.join(os.path.dirname(__file__), "db-cleansing")
+
 MASTR_RAW_SCHEMA = "model_draft"
 OPEN_MASTR_SCHEMA = "model_draft"
 
@@ -92,6 +108,9 @@ def table_to_db(csv_data, table, schema, conn, geom_col="geom", srid=4326):
     """
     Import data table into PostgreSQL database
 
+    The table is created from the columns of `csv_data` and filled using COPY.
+    Geometries are expected as hex (E)WKB.
+
     Parameters
     ----------
     csv_data : pandas.DataFrame
@@ -108,9 +127,10 @@ def table_to_db(csv_data, table, schema, conn, geom_col="geom", srid=4326):
 
     # Create schemas
     query = "CREATE SCHEMA IF NOT EXISTS {schema}".format(schema=schema)
-    conn.execute(query)
+    conn.execute(text(query))
 
-    csv_data.to_sql(
+    # Create empty table, data is inserted with COPY
+    csv_data.head(0).to_sql(
         table,
         con=conn,
         schema=schema,
@@ -118,9 +138,36 @@ def table_to_db(csv_data, table, schema, conn, geom_col="geom", srid=4326):
             geom_col: Geometry(srid=srid),
             "plz": String(),
         },
-        chunksize=100000,
         if_exists="replace",
     )
+    with conn.connection.cursor() as cursor:
+        copy_to_db(csv_data.reset_index(), f'"{schema}"."{table}"', cursor)
+
+
+def copy_to_db(data, table, cursor, integer_columns=()):
+    """
+    Insert data into an existing table using COPY
+
+    The data is serialized with :func:`copy_csv_buffer`, so empty strings are
+    kept and only missing values are inserted as NULL.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Tabular data. The columns need to exist in `table`, the index is ignored.
+    table : str
+        Quoted table name including schema
+    cursor : psycopg2.extensions.cursor
+        Cursor of the database connection
+    integer_columns : list of str, optional
+        Columns of `data` that are integer columns in `table`
+    """
+    columns = ", ".join('"{}"'.format(column) for column in data.columns)
+    buffer = copy_csv_buffer(data, integer_columns)
+    cursor.copy_expert(
+        f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+        buffer,
+    )
 
 
 def table_to_db_orm(mapper, data, chunksize=10000):
@@ -144,9 +191,33 @@ def table_to_db_orm(mapper, data, chunksize=10000):
             session.commit()
 
 
-def import_boundary_data_csv(schema, table, index_col="id", srid=4326):
+def boundary_cache_dir():
+    """Directory of the boundary data cached by :func:`cache_boundary_data`"""
+    return os.path.join(get_output_dir(), DATA_BASE_PATH, "boundaries")
+
+
+def _boundary_csv_to_parquet(csv_file, parquet_file, index_col="id", srid=4326):
+    """Convert boundary data from CSV with hex WKB geometries to GeoParquet"""
+    # Read CSV file and parse hex WKB geometries at once
+    csv_data = pd.read_csv(csv_file, index_col=index_col)
+    gdf = gpd.GeoDataFrame(
+        csv_data.drop(columns=["geom"]),
+        geometry=shapely.from_wkb(csv_data["geom"].to_numpy()),
+        crs="EPSG:{}".format(srid),
+    ).rename_geometry("geom")
+    gdf.to_parquet(parquet_file)
+
+
+def cache_boundary_data(schema, table, index_col="id", srid=4326, mirror_dir=None):
     """
-    Import additional data for post-processing
+    Store boundary data as GeoParquet file in :func:`boundary_cache_dir`
+
+    The data is taken from `mirror_dir`, if given, as `<schema>_<table>.parquet`
+    or `<schema>_<table>.csv`. Otherwise a CSV file in the working directory is
+    used or the table is downloaded from the OEP into the cache directory. The
+    cached file is created again whenever the content of this source file
+    changes, see :func:`update_cache`. Downloaded tables are kept, delete them
+    from the cache directory to download them again.
 
     Parameters
     ----------
@@ -156,59 +227,120 @@ def import_boundary_data_csv(schema, table, index_col="id", srid=4326):
         Table name
     index_col : str
         Column used as index (defaults to 'id')
+    srid : int
+        Spatial reference system of the geometries
+    mirror_dir : str, optional
+        Local directory with boundary data files, no download is done then
+
+    Returns
+    -------
+    str
+        Path to the GeoParquet file
     """
+    name = "{schema}_{table}".format(schema=schema, table=table)
+    cache_dir = boundary_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    parquet_file = os.path.join(cache_dir, name + ".parquet")
+
+    if mirror_dir:
+        mirror_file = os.path.join(mirror_dir, name + ".parquet")
+        if os.path.isfile(mirror_file):
+            update_cache(parquet_file, mirror_file, shutil.copyfile)
+            return parquet_file
+        csv_file = os.path.join(mirror_dir, name + ".csv")
+        if not os.path.isfile(csv_file):
+            raise FileNotFoundError(f"{name} is not available in {mirror_dir}")
+    else:
+        csv_file = name + ".csv"
+        if not os.path.isfile(csv_file):
+            csv_file = os.path.join(cache_dir, name + ".csv")
+
+    # Download CSV file if it does not exist
+    if not os.path.isfile(csv_file):
+        log.info(
+            "Downloading table {schema}.{table} from OEP".format(
+                schema=schema, table=table
+            )
+        )
+        urlretrieve(
+            OEP_QUERY_PATTERN.format(schema=schema, table=table), csv_file + ".tmp"
+        )
+        os.replace(csv_file + ".tmp", csv_file)
+    else:
+        log.info("Found {} locally.".format(csv_file))
+
+    update_cache(
+        parquet_file,
+        csv_file,
+        partial(_boundary_csv_to_parquet, index_col=index_col, srid=srid),
+    )
+    return parquet_file
 
-    csv_file = "{schema}_{table}.csv".format(schema=schema, table=table)
 
-    # Check if file is locally available
-    csv_file_exists = os.path.isfile(csv_file)
+def import_boundary_data_csv(schema, table, index_col="id", srid=4326, mirror_dir=None):
+    """
+    Import additional data for post-processing
 
-    with db_engine().connect() as con:
+    The data is cached as GeoParquet file, see :func:`cache_boundary_data`. The
+    hash of this file is stored as comment of the table, so the import is
+    skipped if the table already contains the same data.
 
-        # Check if table already exists
-        table_query = "SELECT to_regclass('{schema}.{table}');".format(
-            schema=schema, table=table
-        )
-        table_name = "{schema}.{table}".format(schema=schema, table=table)
-        table_exists = table_name in con.execute(table_query).first().values()
-
-        if not table_exists:
-            # Download CSV file if it does not exist
-            if not csv_file_exists:
-                log.info(
-                    "Downloading table {schema}.{table} from OEP".format(
-                        schema=schema, table=table
-                    )
-                )
-                urlretrieve(
-                    OEP_QUERY_PATTERN.format(schema=schema, table=table), csv_file
-                )
-            else:
-                log.info("Found {} locally.".format(csv_file))
+    Parameters
+    ----------
+    schema : str
+        Schema of `table`
+    table : str
+        Table name
+    index_col : str
+        Column used as index (defaults to 'id')
+    mirror_dir : str, optional
+        Local directory with boundary data files, see :func:`cache_boundary_data`
+    """
 
-            # Read CSV file
-            csv_data = pd.read_csv(csv_file, index_col=index_col)
+    parquet_file = cache_boundary_data(
+        schema, table, index_col=index_col, srid=srid, mirror_dir=mirror_dir
+    )
+    content_hash = file_hash(parquet_file)
+    table_name = "{schema}.{table}".format(schema=schema, table=table)
 
-            # Prepare geom data for DB upload
-            csv_data["geom"] = csv_data["geom"].apply(
-                lambda x: WKTElement(wkb_loads(x, hex=True).wkt, srid=srid)
-            )
+    engine = db_engine()
 
-            # Insert to db
-            table_to_db(csv_data, table, schema, con, srid=srid)
-            log.info("Data from {} successfully imported to database.".format(csv_file))
-        else:
-            log.info(
-                "Table '{schema}.{table}' already exists in local database".format(
-                    schema=schema, table=table
-                )
-            )
+    # Check if table already exists with the same data
+    with engine.connect() as con:
+        imported_hash = con.execute(
+            text("SELECT obj_description(to_regclass(:table_name), 'pg_class');"),
+            {"table_name": table_name},
+        ).scalar()
+    if imported_hash == content_hash:
+        log.info("Table '{}' already exists in local database".format(table_name))
+        return
+
+    # Prepare geom data for DB upload
+    gdf = gpd.read_parquet(parquet_file)
+    csv_data = pd.DataFrame(gdf.drop(columns=["geom"]))
+    csv_data["geom"] = shapely.to_wkb(
+        shapely.set_srid(gdf["geom"].to_numpy(), srid),
+        hex=True,
+        include_srid=True,
+    )
+
+    # Insert to db, the hash is set last, so failed imports are repeated
+    with engine.begin() as con:
+        table_to_db(csv_data, table, schema, con, srid=srid)
+        con.execute(
+            text("COMMENT ON TABLE {} IS :hash".format(table_name)),
+            {"hash": content_hash},
+        )
+    log.info("Data from {} successfully imported to database.".format(parquet_file))
 
 
 def add_geom_col(df, lat_col="Breitengrad", lon_col="Laengengrad", srid=4326):
     """
     Creates a geometry column based on lat/long
 
+    The points are created vectorized and encoded as hex EWKB, which PostGIS
+    reads directly, e.g. via `COPY`. Rows without valid coordinates keep `None`.
+
     Parameters
     ----------
     df : pandas.DataFrame
@@ -222,35 +354,67 @@ def add_geom_col(df, lat_col="Breitengrad", lon_col="Laengengrad", srid=4326):
 
     Returns
     -------
-    GeoDataFrame
+    pandas.DataFrame
         Read MaStR raw data with added geom column
     """
 
-    # Split data into with and without coordinates
-    df_with_coords = df.loc[~(df["Breitengrad"].isna() | df["Laengengrad"].isna())]
-
     # Just select data with lat/lon in range [(-90,90), (-180,180)]
-    df_with_coords = df_with_coords[
-        ~(
-            (df_with_coords["Breitengrad"] < -90)
-            | (df_with_coords["Breitengrad"] > 90)
-            | (df_with_coords["Laengengrad"] < -180)
-            | (df_with_coords["Laengengrad"] > 180)
-        )
-    ]
-    df_no_coords = df.loc[~df.index.isin(df_with_coords.index)]
+    has_coords = df[lat_col].between(-90, 90) & df[lon_col].between(-180, 180)
 
-    gdf = gpd.GeoDataFrame(
-        df_with_coords,
-        geometry=gpd.points_from_xy(df_with_coords[lon_col], df_with_coords[lat_col]),
-        crs="EPSG:{}".format(srid),
+    points = shapely.points(
+        df.loc[has_coords, lon_col].to_numpy(dtype=float),
+        df.loc[has_coords, lat_col].to_numpy(dtype=float),
     )
-    gdf["geom"] = gdf["geometry"].apply(lambda x: WKTElement(x.wkt, srid=srid))
-    gdf.drop(columns=["geometry"], inplace=True)
+    points = shapely.set_srid(points, srid)
 
-    gdf = gdf.append(df_no_coords)
+    df = df.copy()
+    df["geom"] = None
+    df.loc[has_coords, "geom"] = shapely.to_wkb(points, hex=True, include_srid=True)
 
-    return gdf
+    return df
+
+
+def table_to_db_copy(mapper, data, chunksize=100000):
+    """
+    Import data table into PostgreSQL database using COPY
+
+    Much faster than :func:`table_to_db_orm` for large tables. Geometries are
+    expected as hex (E)WKB, see :func:`add_geom_col`.
+
+    Parameters
+    ----------
+    mapper: SQLAlchemy decarative mapping
+        Table ORM
+    data: pandas.DataFrame
+        Tabular data for one technology
+    chunksize: int, optional
+        Size of data chunks for database insertation. Data gets inserted in chunks of size `chunksize`.
+    """
+    engine = db_engine()
+    table = engine.dialect.identifier_preparer.format_table(mapper.__table__)
+
+    data = data.reset_index()
+    data = data[[column for column in data.columns if column in mapper.__table__.c]]
+    integer_columns = [
+        column
+        for column in data.columns
+        if isinstance(mapper.__table__.c[column].type, Integer)
+    ]
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            for start in range(0, len(data), chunksize):
+                copy_to_db(
+                    data.iloc[start : start + chunksize],
+                    table,
+                    cursor,
+                    integer_columns=integer_columns,
+                )
+                # Commit each chunk separately
+                connection.commit()
+    finally:
+        connection.close()
 
 
 def import_bnetz_mastr_csv(mastr_cleaned):
@@ -266,42 +430,113 @@ def import_bnetz_mastr_csv(mastr_cleaned):
     for k, d in mastr_cleaned.items():
 
         # Create 'geom' column from lat/lon
-        gdf = add_geom_col(d)
+        df = add_geom_col(d)
 
         # Import to local database
         log.info(f"Import data to database for {k}")
         mapper = getattr(orm, orm_map[k]["cleaned"])
-        table_to_db_orm(mapper, gdf.replace({np.nan: None}), chunksize=100000)
+        table_to_db_copy(mapper, df, chunksize=100000)
         log.info(f"Data for {k} successfully imported to database.")
 
 
-def run_sql_postprocessing():
+def run_sql_script(file, engine):
+    """
+    Execute the statements of a SQL script one after another
+
+    Parameters
+    ----------
+    file : str
+        Path to the SQL script
+    engine : sqlalchemy.engine.Engine
+        Database engine
+
+    Returns
+    -------
+    list of dict
+        Script, number, first line and duration in seconds of each statement
+    """
+    with open(file) as f:
+        statements = split_sql_statements(f.read())
+
+    timings = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as con:
+        for number, statement in enumerate(statements):
+            start = time.perf_counter()
+            con.execute(text(statement))
+            timings.append(
+                {
+                    "script": os.path.basename(file),
+                    "statement": number,
+                    "sql": statement.splitlines()[0],
+                    "seconds": time.perf_counter() - start,
+                }
+            )
+    log.info(
+        f"Executed {os.path.basename(file)} in "
+        f"{sum(timing['seconds'] for timing in timings):.1f} s"
+    )
+
+    return timings
+
+
+def sql_postprocessing_tasks(engine, dependencies=()):
     """
-    Execute SQL scripts ins `db-cleansing/`
+    Tasks executing the SQL scripts in `db-cleansing/`, see :func:`run_tasks`
+
+    The scripts of different technologies change separate tables and don't
+    depend on each other.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.engine.Engine
+        Database engine
+    dependencies : list of str, optional
+        Tasks that need to be finished before any script, e.g. data imports.
+
+    Returns
+    -------
+    dict
+        Tasks keyed by technology
     """
+    return {
+        tech_name: (
+            partial(
+                run_sql_script,
+                os.path.join(
+                    SQL_POSTPROCESSING_DIR,
+                    "rli-mastr-{tech_name}-cleansing.sql".format(tech_name=tech_name),
+                ),
+                engine,
+            ),
+            list(dependencies),
+        )
+        for tech_name in TECHNOLOGIES
+        if tech_name not in ["gsgk", "storage", "nuclear"]
+    }
 
-    with db_engine().connect().execution_options(autocommit=True) as con:
 
-        for tech_name in TECHNOLOGIES:
-            if tech_name not in ["gsgk", "storage", "nuclear"]:
-                log.info(f"Run post-processing on {tech_name} data")
-                # Read SQL query from file
-                with open(
-                    os.path.join(
-                        os.path.dirname(__file__),
-                        "db-cleansing",
-                        "rli-mastr-{tech_name}-cleansing.sql".format(
-                            tech_name=tech_name
-                        ),
-                    )
-                ) as file:
-                    escaped_sql = text(file.read())
+def run_sql_postprocessing(max_workers=None):
+    """
+    Execute SQL scripts in `db-cleansing/`
 
-                # Execute query
-                con.execute(escaped_sql)
+    The scripts of the technologies run concurrently, each on its own connection.
 
+    Parameters
+    ----------
+    max_workers : int, optional
+        Maximum number of scripts running at the same time. Defaults to all.
 
-def postprocess(mastr_cleaned):
+    Returns
+    -------
+    pandas.DataFrame
+        Duration of each statement in seconds, see :func:`run_sql_script`
+    """
+    results = run_tasks(sql_postprocessing_tasks(db_engine()), max_workers)
+
+    return pd.DataFrame([timing for timings in results.values() for timing in timings])
+
+
+def postprocess(mastr_cleaned, boundary_mirror_dir=None):
     """
     Run post-processing
 
@@ -312,6 +547,9 @@ def postprocess(mastr_cleaned):
     ----------
     mastr_cleaned: dict of pandas.DataFrame
         Cleaned MaStR data in a dictionary of dataframes keyed by technology.
+    boundary_mirror_dir: str, optional
+        Local directory with boundary data files, which are used instead of
+        downloading them, see :func:`cache_boundary_data`.
     """
     # Create cleaned tables
     engine = db_engine()
@@ -320,17 +558,37 @@ def postprocess(mastr_cleaned):
         con.execute(f"CREATE SCHEMA {orm.Base.metadata.schema};")
     orm.Base.metadata.create_all(engine)
 
-    # Import external data (most boundaries)
-    import_boundary_data_csv(BKG_VG250["schema"], BKG_VG250["table"], srid=3035)
-    import_boundary_data_csv(OSM_PLZ["schema"], OSM_PLZ["table"])
-    import_boundary_data_csv(OFFSHORE["schema"], OFFSHORE["table"])
-    import_boundary_data_csv(OSM_WINDPOWER["schema"], OSM_WINDPOWER["table"])
+    def import_boundaries():
+        # Import external data (most boundaries)
+        for boundaries, srid in [
+            (BKG_VG250, 3035),
+            (OSM_PLZ, 4326),
+            (OFFSHORE, 4326),
+            (OSM_WINDPOWER, 4326),
+        ]:
+            import_boundary_data_csv(
+                boundaries["schema"],
+                boundaries["table"],
+                srid=srid,
+                mirror_dir=boundary_mirror_dir,
+            )
 
-    # Import MaStR raw data in o database
-    import_bnetz_mastr_csv(mastr_cleaned)
+    # Import boundaries and MaStR raw data concurrently, then process data
+    sql_tasks = sql_postprocessing_tasks(engine, dependencies=["boundaries", "mastr"])
+    results = run_tasks(
+        {
+            "boundaries": (import_boundaries, []),
+            "mastr": (partial(import_bnetz_mastr_csv, mastr_cleaned), []),
+            **sql_tasks,
+        }
+    )
 
-    # Process data
-    run_sql_postprocessing()
+    timings = pd.DataFrame([timing for name in sql_tasks for timing in results[name]])
+    log.info(
+        "Slowest post-processing statements:\n{}".format(
+            timings.nlargest(10, "seconds").to_string(index=False)
+        )
+    )
 
 
 def to_csv(limit=None):
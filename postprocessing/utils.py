@@ -0,0 +1,226 @@
+import hashlib
+import io
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+from open_mastr.utils.config import setup_logger
+
+log = setup_logger()
+
+# Opening tag of a dollar-quoted string, e.g. `$$` or `$body$`
+DOLLAR_QUOTE_TAG = re.compile(r"\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$")
+
+# Marks NULL values in CSV data for COPY. Unquoted empty fields, the default NULL
+# of COPY in CSV format, are then read as empty strings.
+COPY_NULL = "\\N"
+
+
+def copy_csv_buffer(data, integer_columns=()):
+    """
+    Serialize tabular data as CSV for PostgreSQL `COPY ... WITH (FORMAT csv)`
+
+    Integer columns holding missing values are float in pandas and would be
+    written like `1.0`, which COPY rejects for integer columns. They are
+    converted to the nullable `Int64` type first. Missing values are written as
+    `COPY_NULL`.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Tabular data, the index is ignored
+    integer_columns : list of str, optional
+        Columns of `data` that are stored as integers in the database
+
+    Returns
+    -------
+    io.StringIO
+        CSV data without header
+    """
+    data = data.astype({column: "Int64" for column in integer_columns})
+    buffer = io.StringIO()
+    data.to_csv(buffer, index=False, header=False, na_rep=COPY_NULL)
+    buffer.seek(0)
+    return buffer
+
+
+def file_hash(file):
+    """
+    SHA-256 hash of the content of a file
+
+    Parameters
+    ----------
+    file : str
+        Path to the file
+
+    Returns
+    -------
+    str
+        Hex digest
+    """
+    sha256 = hashlib.sha256()
+    with open(file, "rb") as f:
+        for block in iter(partial(f.read, 2**20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def update_cache(cache_file, source_file, create):
+    """
+    Create a file derived from `source_file` unless it is up to date
+
+    The hash of `source_file` is stored next to the cached file as
+    `<cache_file>.source`. The cached file is kept as long as the source has
+    the same content and created again otherwise.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the cached file
+    source_file : str
+        Path to the file the cached file is created from
+    create : callable
+        Called as `create(source_file, file)` to write the cached data to `file`
+
+    Returns
+    -------
+    bool
+        True if `cache_file` was (re)created
+    """
+    fingerprint_file = cache_file + ".source"
+    fingerprint = file_hash(source_file)
+    if os.path.isfile(cache_file) and os.path.isfile(fingerprint_file):
+        with open(fingerprint_file) as f:
+            if f.read() == fingerprint:
+                return False
+
+    # Write to a temporary file first, so an interrupted run leaves no cache
+    create(source_file, cache_file + ".tmp")
+    os.replace(cache_file + ".tmp", cache_file)
+    with open(fingerprint_file, "w") as f:
+        f.write(fingerprint)
+    return True
+
+
+def _skip_block_comment(sql, i):
+    """Index after the (possibly nested) block comment starting at `i`"""
+    depth = 0
+    while i < len(sql):
+        if sql.startswith("/*", i):
+            depth += 1
+            i += 2
+        elif sql.startswith("*/", i):
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    return len(sql)
+
+
+def split_sql_statements(sql):
+    """
+    Split a SQL script into single statements
+
+    Comments are removed, block comments may be nested like in PostgreSQL.
+    Semicolons inside of comments, quotes or dollar-quoted strings like
+    `$$ ... $$` or `$body$ ... $body$` do not end a statement.
+
+    Parameters
+    ----------
+    sql : str
+        SQL script
+
+    Returns
+    -------
+    list of str
+        Statements without the trailing semicolon
+    """
+    statements = []
+    statement = []
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if sql.startswith("--", i):
+            i = sql.find("\n", i)
+            i = len(sql) if i == -1 else i
+            continue
+        if sql.startswith("/*", i):
+            i = _skip_block_comment(sql, i)
+            # A comment separates tokens like whitespace
+            statement.append(" ")
+            continue
+
+        end = None
+        if char in "'\"":
+            end = sql.find(char, i + 1)
+            end = len(sql) if end == -1 else end + 1
+        elif char == "$" and not (i and (sql[i - 1].isalnum() or sql[i - 1] in "_$")):
+            tag = DOLLAR_QUOTE_TAG.match(sql, i)
+            if tag:
+                end = sql.find(tag.group(), tag.end())
+                end = len(sql) if end == -1 else end + len(tag.group())
+        if end is not None:
+            statement.append(sql[i:end])
+            i = end
+            continue
+
+        if char == ";":
+            statements.append("".join(statement).strip())
+            statement = []
+        else:
+            statement.append(char)
+        i += 1
+    statements.append("".join(statement).strip())
+
+    return [statement for statement in statements if statement]
+
+
+def run_tasks(tasks, max_workers=None):
+    """
+    Run tasks concurrently as soon as their dependencies are finished
+
+    Parameters
+    ----------
+    tasks : dict
+        Tuples `(function, dependencies)` keyed by task name. `function` is
+        called without arguments and `dependencies` is a list of task names.
+    max_workers : int, optional
+        Maximum number of tasks running at the same time. Defaults to the
+        number of tasks.
+
+    Returns
+    -------
+    dict
+        Return values of the functions keyed by task name
+    """
+    for name, (_, dependencies) in tasks.items():
+        unknown = set(dependencies) - set(tasks)
+        if unknown:
+            raise ValueError(f"Task '{name}' depends on unknown tasks {unknown}")
+
+    results = {}
+    pending = dict(tasks)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks) or 1) as executor:
+        while pending or running:
+            for name, (function, dependencies) in list(pending.items()):
+                if set(dependencies) <= set(results):
+                    running[executor.submit(function)] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Tasks {list(pending)} have cyclic dependencies")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                # Stop scheduling further tasks if one fails
+                if future.exception():
+                    pending.clear()
+                    raise future.exception()
+                results[name] = future.result()
+                log.info(f"Finished task '{name}'")
+
+    return results
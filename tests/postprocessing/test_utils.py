@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from postprocessing.utils import (
+    COPY_NULL,
+    copy_csv_buffer,
+    file_hash,
+    run_tasks,
+    split_sql_statements,
+    update_cache,
+)
+
+
+def test_copy_csv_buffer():
+    data = pd.DataFrame(
+        {
+            "AnzahlModule": [12, np.nan],
+            "Bruttoleistung": [9.5, np.nan],
+            "Hausnummer": ["", None],
+        }
+    )
+    assert data["AnzahlModule"].dtype == float
+
+    buffer = copy_csv_buffer(data, integer_columns=["AnzahlModule"])
+
+    # Integers are written without decimals and empty strings stay empty strings
+    assert buffer.read().splitlines() == [
+        "12,9.5,",
+        f"{COPY_NULL},{COPY_NULL},{COPY_NULL}",
+    ]
+
+
+def test_split_sql_statements():
+    sql = """
+    -- drop the old table; it is replaced
+    DROP TABLE IF EXISTS t;
+    /* create ; /* nested; */ the table */
+    CREATE TABLE t (name text DEFAULT 'a;b', "col;umn" int);
+    INSERT INTO t VALUES ('it''s; fine', 1);
+    CREATE FUNCTION f() RETURNS int AS $body$
+        SELECT 1; -- $$ is no end here
+    $body$ LANGUAGE sql;
+    DO $$ BEGIN PERFORM f(); END $$;
+    SELECT 1/*comment*/FROM t
+    """
+    assert split_sql_statements(sql) == [
+        "DROP TABLE IF EXISTS t",
+        "CREATE TABLE t (name text DEFAULT 'a;b', \"col;umn\" int)",
+        "INSERT INTO t VALUES ('it''s; fine', 1)",
+        "CREATE FUNCTION f() RETURNS int AS $body$\n"
+        "        SELECT 1; -- $$ is no end here\n"
+        "    $body$ LANGUAGE sql",
+        "DO $$ BEGIN PERFORM f(); END $$",
+        "SELECT 1 FROM t",
+    ]
+
+
+def test_run_tasks():
+    finished = []
+    lock = threading.Lock()
+
+    def task(name, result):
+        def run():
+            time.sleep(0.01)
+            with lock:
+                finished.append(name)
+            return result
+
+        return run
+
+    results = run_tasks(
+        {
+            "sql": (task("sql", 3), ["boundaries", "mastr"]),
+            "boundaries": (task("boundaries", 1), []),
+            "mastr": (task("mastr", 2), []),
+        }
+    )
+
+    assert results == {"boundaries": 1, "mastr": 2, "sql": 3}
+    assert finished[-1] == "sql"
+
+
+def test_run_tasks_stops_after_failure():
+    def fail():
+        raise RuntimeError("import failed")
+
+    started = []
+    with pytest.raises(RuntimeError):
+        run_tasks(
+            {"import": (fail, []), "sql": (lambda: started.append(1), ["import"])}
+        )
+    assert started == []
+
+
+def test_run_tasks_invalid_dependencies():
+    with pytest.raises(ValueError, match="unknown"):
+        run_tasks({"sql": (lambda: None, ["import"])})
+    with pytest.raises(ValueError, match="cyclic"):
+        run_tasks({"a": (lambda: None, ["b"]), "b": (lambda: None, ["a"])})
+
+
+def test_file_hash(tmp_path):
+    file = tmp_path / "data.csv"
+    content = b"id,geom\n" * 200000
+    file.write_bytes(content)
+
+    assert file_hash(file) == hashlib.sha256(content).hexdigest()
+
+
+def test_update_cache_recreates_file_only_if_source_changes(tmp_path):
+    source_file = tmp_path / "source.csv"
+    cache_file = str(tmp_path / "cache.parquet")
+    created = []
+
+    def create(source, file):
+        created.append(source)
+        with open(source) as src, open(file, "w") as f:
+            f.write(src.read().upper())
+
+    source_file.write_text("a")
+    assert update_cache(cache_file, source_file, create)
+    assert not update_cache(cache_file, source_file, create)
+    assert len(created) == 1
+
+    source_file.write_text("b")
+    assert update_cache(cache_file, source_file, create)
+    with open(cache_file) as f:
+        assert f.read() == "B"
+    assert len(created) == 2
+
+
+def test_update_cache_keeps_no_file_after_failure(tmp_path):
+    source_file = tmp_path / "source.csv"
+    source_file.write_text("a")
+    cache_file = str(tmp_path / "cache.parquet")
+
+    def create(source, file):
+        with open(file, "w") as f:
+            f.write("partial")
+        raise OSError("Disk full")
+
+    with pytest.raises(OSError):
+        update_cache(cache_file, source_file, create)
+    assert not (tmp_path / "cache.parquet").exists()
+    assert not (tmp_path / "cache.parquet.source").exists()
@@ -1,5 +1,22 @@
-from open_mastr.soap_api.download import MaStRAPI, MaStRDownload, flatten_dict
+from open_mastr.soap_api import download
+from open_mastr.soap_api.download import (
+    MASTR_SERVICE_NAME,
+    WSDL_URL,
+    MaStRAPI,
+    MaStRDownload,
+    _list_response_type,
+    _mastr_bindings,
+    _raw_xml_list_function,
+    _xml_response_schema,
+    basic_data_download,
+    flatten_dict,
+    parse_list_response,
+    resolve_wsdl,
+    update_local_wsdl,
+)
+import os
 import pytest
+from zeep.exceptions import Fault
 import datetime
 
 
@@ -215,3 +232,334 @@ def test_flatten_dict():
         },
     ]
     assert flatten_dict(data_before_flatten) == data_after_flatten
+
+
+MINIMAL_WSDL = """<?xml version="1.0" encoding="utf-8"?>
+<wsdl:definitions xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/"
+    xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+    xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:tns="http://test.mastr" targetNamespace="http://test.mastr">
+  <wsdl:types>
+    <xs:schema targetNamespace="http://test.mastr" elementFormDefault="qualified">
+      <xs:element name="GetLokaleUhrzeit"><xs:complexType/></xs:element>
+      <xs:element name="GetLokaleUhrzeitAntwort">
+        <xs:complexType><xs:sequence>
+          <xs:element name="Ergebniscode" type="xs:string"/>
+        </xs:sequence></xs:complexType>
+      </xs:element>
+    </xs:schema>
+  </wsdl:types>
+  <wsdl:message name="GetLokaleUhrzeitRequest">
+    <wsdl:part name="parameters" element="tns:GetLokaleUhrzeit"/>
+  </wsdl:message>
+  <wsdl:message name="GetLokaleUhrzeitResponse">
+    <wsdl:part name="parameters" element="tns:GetLokaleUhrzeitAntwort"/>
+  </wsdl:message>
+  <wsdl:portType name="Anlage">
+    <wsdl:operation name="GetLokaleUhrzeit">
+      <wsdl:input message="tns:GetLokaleUhrzeitRequest"/>
+      <wsdl:output message="tns:GetLokaleUhrzeitResponse"/>
+    </wsdl:operation>
+  </wsdl:portType>
+  <wsdl:binding name="AnlageBinding" type="tns:Anlage">
+    <soap:binding transport="http://schemas.xmlsoap.org/soap/http"/>
+    <wsdl:operation name="GetLokaleUhrzeit">
+      <soap:operation soapAction="GetLokaleUhrzeit"/>
+      <wsdl:input><soap:body use="literal"/></wsdl:input>
+      <wsdl:output><soap:body use="literal"/></wsdl:output>
+    </wsdl:operation>
+  </wsdl:binding>
+  <wsdl:service name="Marktstammdatenregister">
+    <wsdl:port name="Anlage" binding="tns:AnlageBinding">
+      <soap:address location="http://localhost/MaStRAPI"/>
+    </wsdl:port>
+  </wsdl:service>
+</wsdl:definitions>
+"""
+
+
+def test_mastr_client_is_reused(tmp_path):
+    wsdl = tmp_path / "mastr.wsdl"
+    wsdl.write_text(MINIMAL_WSDL)
+
+    mastr_api_1 = MaStRAPI(user="testuser", key="testpassword", wsdl=str(wsdl))
+    mastr_api_2 = MaStRAPI(user="testuser", key="testpassword", wsdl=str(wsdl))
+    client_1, _ = _mastr_bindings("Anlage", wsdl=str(wsdl))
+    client_2, _ = _mastr_bindings("Anlage", wsdl=str(wsdl))
+
+    assert client_1 is client_2
+    assert hasattr(mastr_api_1, "GetLokaleUhrzeit")
+    assert hasattr(mastr_api_2, "GetLokaleUhrzeit")
+
+
+def test_update_local_wsdl(tmp_path, monkeypatch):
+    documents = {
+        "https://mastr.example/wsdl/mastr.wsdl": (
+            b'<wsdl:definitions xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/" '
+            b'xmlns:xs="http://www.w3.org/2001/XMLSchema"><wsdl:types><xs:schema>'
+            b'<xs:import schemaLocation="../xsd/types.xsd"/>'
+            b"</xs:schema></wsdl:types></wsdl:definitions>"
+        ),
+        "https://mastr.example/xsd/types.xsd": (
+            b'<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"/>'
+        ),
+    }
+    monkeypatch.setattr(download, "get_project_home_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(
+        download.requests, "get", lambda url, **kwargs: FakeResponse(documents[url])
+    )
+    assert resolve_wsdl("my.wsdl") == "my.wsdl"
+    assert resolve_wsdl() == WSDL_URL
+
+    update_local_wsdl("https://mastr.example/wsdl/mastr.wsdl")
+
+    wsdl_dir = tmp_path / "wsdl"
+    assert sorted(os.listdir(wsdl_dir)) == ["VERSION", "mastr.wsdl", "types.xsd"]
+    assert b'schemaLocation="types.xsd"' in (wsdl_dir / "mastr.wsdl").read_bytes()
+    assert resolve_wsdl() == str(wsdl_dir / "mastr.wsdl")
+
+    # A failed update keeps the previous copy
+    del documents["https://mastr.example/xsd/types.xsd"]
+    with pytest.raises(KeyError):
+        update_local_wsdl("https://mastr.example/wsdl/mastr.wsdl")
+    assert sorted(os.listdir(tmp_path)) == ["wsdl"]
+    assert sorted(os.listdir(wsdl_dir)) == ["VERSION", "mastr.wsdl", "types.xsd"]
+
+
+class FakeListApi:
+    def __init__(self, total, failing_starts=()):
+        self.total = total
+        self.failing_starts = failing_starts
+        self.requested = []
+
+    def GetListeAlleEinheiten(self, startAb, limit, datumAb):
+        self.requested.append(startAb)
+        if startAb in self.failing_starts:
+            raise Fault("Service unavailable")
+        stop = min(startAb + limit, self.total + 1)
+        return {
+            "Ergebniscode": "OkWeitereDatenVorhanden" if stop <= self.total else "Ok",
+            "Einheiten": list(range(startAb, stop)),
+        }
+
+
+def test_basic_data_download_in_order():
+    api = FakeListApi(total=95)
+    chunks_start = list(range(1, 1001, 10))
+    pages = list(
+        basic_data_download(
+            api,
+            "GetListeAlleEinheiten",
+            "Einheiten",
+            chunks_start,
+            [10] * len(chunks_start),
+            None,
+            0,
+            concurrency=4,
+        )
+    )
+
+    assert [unit for page in pages for unit in page] == list(range(1, 96))
+    assert len(api.requested) < len(chunks_start)
+
+
+def test_basic_data_download_stops_on_failing_chunks():
+    chunks_start = list(range(1, 1001, 10))
+    api = FakeListApi(total=1000, failing_starts=chunks_start[2:])
+    pages = list(
+        basic_data_download(
+            api,
+            "GetListeAlleEinheiten",
+            "Einheiten",
+            chunks_start,
+            [10] * len(chunks_start),
+            None,
+            0,
+            concurrency=2,
+            max_failed_windows=3,
+        )
+    )
+
+    assert [unit for page in pages for unit in page] == list(range(1, 21))
+    assert len(api.requested) < 10
+
+
+def test_basic_data_download_reports_failed_chunks():
+    chunks_start = list(range(1, 101, 10))
+    api = FakeListApi(total=100, failing_starts=[21])
+    pages = list(
+        basic_data_download(
+            api,
+            "GetListeAlleEinheiten",
+            "Einheiten",
+            chunks_start,
+            [10] * len(chunks_start),
+            None,
+            0,
+            concurrency=2,
+            with_position=True,
+        )
+    )
+
+    assert [start for start, units in pages if units is None] == [21]
+    assert [start for start, _ in pages] == chunks_start
+
+
+LIST_WSDL = """<?xml version="1.0" encoding="utf-8"?>
+<wsdl:definitions xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/"
+    xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+    xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:tns="http://test.mastr" targetNamespace="http://test.mastr">
+  <wsdl:types>
+    <xs:schema targetNamespace="http://test.mastr" elementFormDefault="qualified">
+      <xs:complexType name="Wert"><xs:sequence>
+        <xs:element name="Wert" type="xs:string" nillable="true"/>
+        <xs:element name="NichtVorhanden" type="xs:boolean"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="Hersteller"><xs:sequence>
+        <xs:element name="Id" type="xs:int" nillable="true"/>
+        <xs:element name="Wert" type="xs:string" nillable="true"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="Brennstoffe"><xs:sequence>
+        <xs:element name="Wert" type="xs:string" minOccurs="0" maxOccurs="unbounded"/>
+        <xs:element name="NichtVorhanden" type="xs:boolean"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="VerknuepfteEinheit"><xs:sequence>
+        <xs:element name="MaStRNummer" type="xs:string"/>
+      </xs:sequence></xs:complexType>
+      <xs:complexType name="Einheit"><xs:sequence>
+        <xs:element name="EinheitMastrNummer" type="xs:string"/>
+        <xs:element name="DatumLetzteAktualisierung" type="xs:dateTime"/>
+        <xs:element name="Bruttoleistung" type="xs:decimal" nillable="true"/>
+        <xs:element name="Hausnummer" type="tns:Wert"/>
+        <xs:element name="Hersteller" type="tns:Hersteller"/>
+        <xs:element name="WeitereBrennstoffe" type="tns:Brennstoffe"/>
+        <xs:element name="VerknuepfteEinheiten" type="tns:VerknuepfteEinheit"
+            minOccurs="0" maxOccurs="unbounded"/>
+      </xs:sequence></xs:complexType>
+      <xs:element name="GetListeAlleEinheiten"><xs:complexType/></xs:element>
+      <xs:element name="GetListeAlleEinheitenAntwort">
+        <xs:complexType><xs:sequence>
+          <xs:element name="Ergebniscode" type="xs:string"/>
+          <xs:element name="Einheiten" type="tns:Einheit"
+              minOccurs="0" maxOccurs="unbounded"/>
+        </xs:sequence></xs:complexType>
+      </xs:element>
+    </xs:schema>
+  </wsdl:types>
+  <wsdl:message name="GetListeAlleEinheitenRequest">
+    <wsdl:part name="parameters" element="tns:GetListeAlleEinheiten"/>
+  </wsdl:message>
+  <wsdl:message name="GetListeAlleEinheitenResponse">
+    <wsdl:part name="parameters" element="tns:GetListeAlleEinheitenAntwort"/>
+  </wsdl:message>
+  <wsdl:portType name="Anlage">
+    <wsdl:operation name="GetListeAlleEinheiten">
+      <wsdl:input message="tns:GetListeAlleEinheitenRequest"/>
+      <wsdl:output message="tns:GetListeAlleEinheitenResponse"/>
+    </wsdl:operation>
+  </wsdl:portType>
+  <wsdl:binding name="AnlageBinding" type="tns:Anlage">
+    <soap:binding transport="http://schemas.xmlsoap.org/soap/http"/>
+    <wsdl:operation name="GetListeAlleEinheiten">
+      <soap:operation soapAction="GetListeAlleEinheiten"/>
+      <wsdl:input><soap:body use="literal"/></wsdl:input>
+      <wsdl:output><soap:body use="literal"/></wsdl:output>
+    </wsdl:operation>
+  </wsdl:binding>
+  <wsdl:service name="Marktstammdatenregister">
+    <wsdl:port name="Anlage" binding="tns:AnlageBinding">
+      <soap:address location="http://localhost/MaStRAPI"/>
+    </wsdl:port>
+  </wsdl:service>
+</wsdl:definitions>
+"""
+
+LIST_RESPONSE = b"""<?xml version="1.0" encoding="utf-8"?>
+<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"
+    xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+  <s:Body>
+    <GetListeAlleEinheitenAntwort xmlns="http://test.mastr">
+      <Ergebniscode>OkWeitereDatenVorhanden</Ergebniscode>
+      <Einheiten>
+        <EinheitMastrNummer>SEE900000000001</EinheitMastrNummer>
+        <DatumLetzteAktualisierung>2022-02-01T10:11:12.1234567</DatumLetzteAktualisierung>
+        <Bruttoleistung>9.96</Bruttoleistung>
+        <Hausnummer><Wert>12a</Wert><NichtVorhanden>false</NichtVorhanden></Hausnummer>
+        <Hersteller><Id>1234</Id><Wert>Enercon</Wert></Hersteller>
+        <WeitereBrennstoffe>
+          <Wert>Erdgas</Wert><Wert>Heizoel</Wert><NichtVorhanden>false</NichtVorhanden>
+        </WeitereBrennstoffe>
+        <VerknuepfteEinheiten><MaStRNummer>SEE1</MaStRNummer></VerknuepfteEinheiten>
+        <VerknuepfteEinheiten><MaStRNummer>SEE2</MaStRNummer></VerknuepfteEinheiten>
+      </Einheiten>
+      <Einheiten>
+        <EinheitMastrNummer>SEE900000000002</EinheitMastrNummer>
+        <DatumLetzteAktualisierung>2022-02-02T00:00:00</DatumLetzteAktualisierung>
+        <Bruttoleistung xsi:nil="true"/>
+        <Hausnummer><Wert xsi:nil="true"/><NichtVorhanden>true</NichtVorhanden></Hausnummer>
+        <Hersteller><Id xsi:nil="true"/><Wert xsi:nil="true"/></Hersteller>
+        <WeitereBrennstoffe><NichtVorhanden>true</NichtVorhanden></WeitereBrennstoffe>
+      </Einheiten>
+    </GetListeAlleEinheitenAntwort>
+  </s:Body>
+</s:Envelope>
+"""
+
+
+def test_parse_list_response_equals_zeep(tmp_path):
+    wsdl = tmp_path / "mastr.wsdl"
+    wsdl.write_text(LIST_WSDL)
+    client, _ = _mastr_bindings("Anlage", wsdl=str(wsdl))
+    response_type = _list_response_type(client, "Anlage", "GetListeAlleEinheiten")
+    operation = client.wsdl.services[MASTR_SERVICE_NAME].ports["Anlage"].binding.get(
+        "GetListeAlleEinheiten"
+    )
+
+    from lxml import etree
+    from zeep.helpers import serialize_object
+
+    expected = serialize_object(
+        operation.process_reply(etree.fromstring(LIST_RESPONSE)), target_cls=dict
+    )
+    expected["Einheiten"] = flatten_dict(expected["Einheiten"])
+    schema = _xml_response_schema(response_type)
+
+    assert parse_list_response(LIST_RESPONSE, "Einheiten", schema) == expected
+    assert expected["Einheiten"][0]["VerknuepfteEinheiten"] == "SEE1, SEE2"
+    assert expected["Einheiten"][0]["HerstellerId"] == 1234
+    assert expected["Einheiten"][0]["WeitereBrennstoffe"] == "Erdgas,Heizoel"
+    assert expected["Einheiten"][1]["Hausnummer"] is None
+    assert expected["Einheiten"][1]["WeitereBrennstoffe"] is None
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {"Content-Type": "text/xml; charset=utf-8"}
+    encoding = "utf-8"
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def test_raw_xml_list_function_falls_back_to_zeep(tmp_path, monkeypatch):
+    wsdl = tmp_path / "mastr.wsdl"
+    wsdl.write_text(LIST_WSDL)
+    client, client_bind = _mastr_bindings("Anlage", wsdl=str(wsdl))
+    monkeypatch.setattr(
+        client.transport, "post_xml", lambda *args: FakeResponse(LIST_RESPONSE)
+    )
+
+    assert _list_response_type(client, "Anlage", "GetUnbekannt") is None
+    raw_xml_func = _raw_xml_list_function(
+        client, client_bind, "Anlage", "GetListeAlleEinheiten"
+    )
+    monkeypatch.setattr(download, "_list_response_type", lambda *args: None)
+    zeep_func = _raw_xml_list_function(
+        client, client_bind, "Anlage", "GetListeAlleEinheiten"
+    )
+
+    assert raw_xml_func() == zeep_func()
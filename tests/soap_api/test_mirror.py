@@ -0,0 +1,192 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from open_mastr.soap_api import mirror
+from open_mastr.soap_api.download import BASIC_DATA_CHUNKSIZE
+from open_mastr.soap_api.mirror import MaStRMirror
+from open_mastr.utils import orm
+from open_mastr.utils.helpers import session_scope
+
+DATE = datetime.datetime(2024, 1, 1)
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FakeMaStRDownload:
+    """Yields three chunks per energietraeger, starting at the requested index.
+
+    Chunks in `failing_starts` are reported as failed, the download is
+    interrupted before the chunk `interrupt_at`."""
+
+    _unit_data_specs = {"wind": {"energietraeger": ["Wind"]}}
+
+    def __init__(self, parallel_processes=None):
+        self.failing_starts = ()
+        self.interrupt_at = None
+        self.requested_start = []
+
+    def _chunks(self, start):
+        self.requested_start.append(start)
+        for chunk_start in range(start, 3 * BASIC_DATA_CHUNKSIZE, BASIC_DATA_CHUNKSIZE):
+            if chunk_start == self.interrupt_at:
+                raise Interrupted()
+            if chunk_start in self.failing_starts:
+                yield chunk_start, None
+            else:
+                yield chunk_start, [chunk_start, chunk_start + 1]
+
+    def basic_unit_data(self, data, limit, date_from, start, with_position):
+        for et in self._unit_data_specs[data]["energietraeger"]:
+            for chunk_start, chunk in self._chunks(start[et]):
+                units = chunk and [
+                    {
+                        "EinheitMastrNummer": f"SEE{i}",
+                        "DatumLetzteAktualisierung": DATE,
+                        "Einheittyp": "Windeinheit",
+                        "EegMastrNummer": None,
+                        "KwkMastrNummer": None,
+                        "GenMastrNummer": None,
+                    }
+                    for i in chunk
+                ]
+                yield et, chunk_start, units
+
+    def basic_location_data(self, limit, date_from, start, with_position):
+        for chunk_start, chunk in self._chunks(start):
+            yield chunk_start, chunk and [
+                {
+                    "LokationMastrNummer": f"SEL{i}",
+                    "Lokationtyp": "Stromerzeugungslokation",
+                }
+                for i in chunk
+            ]
+
+
+@pytest.fixture
+def mastr_mirror(monkeypatch):
+    monkeypatch.setattr(mirror, "MaStRDownload", FakeMaStRDownload)
+    engine = create_engine("sqlite://")
+    orm.Base.metadata.create_all(engine)
+    return MaStRMirror(engine=engine)
+
+
+def get_checkpoint(mastr_mirror, data_type, energietraeger):
+    with session_scope(engine=mastr_mirror._engine) as session:
+        checkpoint = session.get(
+            orm.BackfillCheckpoint,
+            mastr_mirror._checkpoint_key(data_type, energietraeger, DATE),
+        )
+        return checkpoint.last_chunk_start, checkpoint.completed
+
+
+def test_backfill_basic_resumes_after_interruption(mastr_mirror):
+    mastr_mirror.mastr_dl.interrupt_at = 1 + 2 * BASIC_DATA_CHUNKSIZE
+    with pytest.raises(Interrupted):
+        mastr_mirror.backfill_basic(["wind"], date=DATE, limit=10**6)
+
+    assert get_checkpoint(mastr_mirror, "wind", "Wind") == (
+        1 + BASIC_DATA_CHUNKSIZE,
+        False,
+    )
+    assert mastr_mirror._get_unfinished_checkpoint_date("wind", None) == DATE
+
+    mastr_mirror.mastr_dl.interrupt_at = None
+    mastr_mirror.backfill_basic(["wind"], date=DATE, limit=10**6)
+
+    assert mastr_mirror.mastr_dl.requested_start == [1, 1 + 2 * BASIC_DATA_CHUNKSIZE]
+    assert get_checkpoint(mastr_mirror, "wind", "Wind") == (
+        1 + 2 * BASIC_DATA_CHUNKSIZE,
+        True,
+    )
+
+
+def test_backfill_basic_keeps_checkpoint_before_failed_chunk(mastr_mirror):
+    mastr_mirror.mastr_dl.failing_starts = [1 + BASIC_DATA_CHUNKSIZE]
+    mastr_mirror.backfill_basic(["wind"], date=DATE, limit=10**6)
+
+    assert get_checkpoint(mastr_mirror, "wind", "Wind") == (1, False)
+    with session_scope(engine=mastr_mirror._engine) as session:
+        # Chunks after the failed one are stored nevertheless
+        assert session.get(orm.BasicUnit, f"SEE{1 + 2 * BASIC_DATA_CHUNKSIZE}")
+
+    mastr_mirror.mastr_dl.failing_starts = ()
+    mastr_mirror.backfill_basic(["wind"], date=DATE, limit=10**6)
+
+    assert mastr_mirror.mastr_dl.requested_start == [1, 1 + BASIC_DATA_CHUNKSIZE]
+    assert get_checkpoint(mastr_mirror, "wind", "Wind")[1]
+
+
+def test_backfill_locations_basic_keeps_checkpoint_before_failed_chunk(
+    mastr_mirror,
+):
+    mastr_mirror.mastr_dl.failing_starts = [1 + BASIC_DATA_CHUNKSIZE]
+    mastr_mirror.backfill_locations_basic(date=DATE)
+
+    assert get_checkpoint(mastr_mirror, "locations", None) == (1, False)
+    assert mastr_mirror._get_unfinished_checkpoint_date("locations", None) == DATE
+
+    mastr_mirror.mastr_dl.failing_starts = ()
+    mastr_mirror.backfill_locations_basic(date=DATE)
+
+    assert mastr_mirror.mastr_dl.requested_start == [1, 1 + BASIC_DATA_CHUNKSIZE]
+    assert get_checkpoint(mastr_mirror, "locations", None) == (
+        1 + 2 * BASIC_DATA_CHUNKSIZE,
+        True,
+    )
+
+
+def test_create_additional_data_requests(mastr_mirror):
+    with session_scope(engine=mastr_mirror._engine) as session:
+        session.add_all(
+            [
+                orm.BasicUnit(
+                    EinheitMastrNummer="SEE1",
+                    Einheittyp="Windeinheit",
+                    EegMastrNummer="EEG1",
+                    GenMastrNummer="GEN1",
+                ),
+                orm.BasicUnit(
+                    EinheitMastrNummer="SEE2",
+                    Einheittyp="Windeinheit",
+                    GenMastrNummer="GEN2",
+                ),
+                orm.BasicUnit(
+                    EinheitMastrNummer="SEE3",
+                    Einheittyp="Solareinheit",
+                    EegMastrNummer="EEG3",
+                ),
+                orm.WindExtended(EinheitMastrNummer="SEE2"),
+                orm.Permit(GenMastrNummer="GEN1"),
+                orm.AdditionalDataRequested(
+                    EinheitMastrNummer="SEE0",
+                    additional_data_id="SEE0",
+                    technology="wind",
+                    data_type="unit_data",
+                ),
+                orm.AdditionalDataRequested(
+                    EinheitMastrNummer="SEE3",
+                    additional_data_id="SEE3",
+                    technology="solar",
+                    data_type="unit_data",
+                ),
+            ]
+        )
+
+    mastr_mirror.create_additional_data_requests("wind")
+
+    with session_scope(engine=mastr_mirror._engine) as session:
+        requests = session.query(orm.AdditionalDataRequested).all()
+        assert sorted(
+            (r.EinheitMastrNummer, r.additional_data_id, r.technology, r.data_type)
+            for r in requests
+        ) == [
+            ("SEE1", "EEG1", "wind", "eeg_data"),
+            ("SEE1", "SEE1", "wind", "unit_data"),
+            ("SEE2", "GEN2", "wind", "permit_data"),
+            ("SEE3", "SEE3", "solar", "unit_data"),
+        ]
+        assert all(r.request_date is not None for r in requests)
@@ -0,0 +1,40 @@
+import os
+
+from open_mastr.utils.config import ConfigService, column_renaming
+
+
+def test_config_service_load_yaml(tmp_path):
+    config_file = tmp_path / "config.yml"
+    config_file.write_text("a: 1\n")
+    config_service = ConfigService()
+
+    config = config_service.load_yaml(str(config_file))
+    assert config == {"a": 1}
+
+    # Returned values are copies of the cache
+    config["a"] = 2
+    assert config_service.load_yaml(str(config_file)) == {"a": 1}
+
+    # The file is read again after it changed
+    config_file.write_text("a: 3\n")
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert config_service.load_yaml(str(config_file)) == {"a": 3}
+
+
+def test_config_service_get():
+    config_service = ConfigService()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return {"b": [1]}
+
+    assert config_service.get("b", factory) == {"b": [1]}
+    assert config_service.get("b", factory) == {"b": [1]}
+    assert len(calls) == 1
+
+
+def test_column_renaming_returns_copies():
+    column_renaming()["eeg_data"]["suffix"] = "changed"
+    assert column_renaming()["eeg_data"]["suffix"] == "eeg"
@@ -25,7 +25,18 @@ from open_mastr.utils.helpers import (
     create_db_query,
     db_query_to_csv,
     reverse_unit_type_map,
+    reverse_fill_basic_units,
+    create_secondary_indexes,
+    create_select_query,
+    refresh_capacity_statistics,
+    query_capacity_statistics,
+    create_spatial_indexes,
+    create_bbox_query,
+    spatial_index_is_current,
+    mark_spatial_index_outdated,
+    haversine_distance,
 )
+from sqlalchemy import create_engine, text
 
 
 # Check if db is empty
@@ -401,3 +412,211 @@ def test_db_query_to_csv(tmpdir, engine):
 def test_save_metadata():
     # FIXME: implement in #386
     pass
+
+
+def test_reverse_fill_basic_units_incremental(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'open-mastr.db'}")
+    orm.Base.metadata.create_all(engine)
+    with session_scope(engine=engine) as session:
+        session.add_all(
+            [
+                orm.SolarExtended(
+                    EinheitMastrNummer=f"SEE{i}",
+                    DatumLetzteAktualisierung=datetime(2024, 1, i + 1),
+                )
+                for i in range(3)
+            ]
+        )
+
+    reverse_fill_basic_units(technology=["solar", "wind"], engine=engine)
+    with session_scope(engine=engine) as session:
+        assert session.query(orm.BasicUnit).count() == 3
+        assert session.query(orm.BasicUnitsWatermark).count() == 2
+        # Modify basic_units to see whether they are rebuilt
+        session.query(orm.BasicUnit).update({"Name": "unchanged"})
+
+    # Nothing changed, basic units are not rebuilt
+    reverse_fill_basic_units(technology=["solar", "wind"], engine=engine)
+    with session_scope(engine=engine) as session:
+        assert session.query(orm.BasicUnit).filter_by(Name="unchanged").count() == 3
+        session.add(
+            orm.SolarExtended(
+                EinheitMastrNummer="SEE3",
+                DatumLetzteAktualisierung=datetime(2024, 2, 1),
+            )
+        )
+
+    # Only technologies with changed extended tables are rebuilt
+    reverse_fill_basic_units(technology=["solar", "wind"], engine=engine)
+    with session_scope(engine=engine) as session:
+        assert session.query(orm.BasicUnit).count() == 4
+        assert session.query(orm.BasicUnit).filter_by(Name="unchanged").count() == 0
+
+
+def test_create_secondary_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'open-mastr.db'}")
+    orm.Base.metadata.create_all(engine)
+
+    created_indexes = create_secondary_indexes(engine)
+    assert "ix_basic_units_Einheittyp" in created_indexes
+    assert "ix_solar_extended_EegMastrNummer" in created_indexes
+    # Primary keys are not indexed again
+    assert "ix_solar_eeg_EegMastrNummer" not in created_indexes
+
+    assert create_secondary_indexes(engine) == []
+
+
+def test_create_select_query(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'open-mastr.db'}")
+    orm.Base.metadata.create_all(engine)
+    with session_scope(engine=engine) as session:
+        session.add_all(
+            [
+                orm.SolarExtended(
+                    EinheitMastrNummer="SEE1",
+                    Bundesland="Bayern",
+                    Bruttoleistung=50,
+                    EegMastrNummer="EEG1",
+                ),
+                orm.SolarExtended(
+                    EinheitMastrNummer="SEE2",
+                    Bundesland="Bayern",
+                    Bruttoleistung=150,
+                    EegMastrNummer="EEG2",
+                ),
+                orm.SolarExtended(
+                    EinheitMastrNummer="SEE3",
+                    Bundesland="Hessen",
+                    Bruttoleistung=300,
+                ),
+                orm.SolarEeg(EegMastrNummer="EEG2", AnlagenschluesselEeg="E2"),
+            ]
+        )
+
+    # Additional data is only joined if requested
+    query = create_select_query("solar", columns=["EinheitMastrNummer"])
+    assert "solar_eeg" not in str(query)
+
+    query = create_select_query(
+        "solar",
+        columns=["EinheitMastrNummer", "AnlagenschluesselEeg", "Meldedatum_eeg"],
+        where={"Bundesland": "Bayern", "Bruttoleistung": (">", 100)},
+    )
+    df = pd.read_sql(query, con=engine)
+    assert df["EinheitMastrNummer"].tolist() == ["SEE2"]
+    assert df["AnlagenschluesselEeg"].tolist() == ["E2"]
+
+    with pytest.raises(ValueError):
+        create_select_query("solar", columns=["NotAColumn"])
+
+
+def test_capacity_statistics(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'open-mastr.db'}")
+    orm.Base.metadata.create_all(engine)
+    pd.DataFrame(
+        {
+            "EinheitMastrNummer": ["SEE1", "SEE2", "SEE3", "SEE4"],
+            "Bundesland": ["Bayern", "Bayern", "Bayern", "Hessen"],
+            "Landkreis": ["Passau", "Passau", "Regen", "Fulda"],
+            "Gemeindeschluessel": ["09275001", "09275002", "09276001", "06631001"],
+            "Lage": ["Dach", "Frei", "Dach", "Dach"],
+            "Inbetriebnahmedatum": ["2020-01-01", "2020-06-01", "2021-01-01", None],
+            "Bruttoleistung": [10.0, 20.0, 30.0, 40.0],
+            "Nettonennleistung": [9.0, 18.0, 27.0, 36.0],
+        }
+    ).to_sql("solar_extended", con=engine, if_exists="append", index=False)
+    refresh_capacity_statistics(technology=["solar"], engine=engine)
+
+    df = query_capacity_statistics(["solar"], by=["Bundesland"], engine=engine)
+    assert df.set_index("Bundesland")["Bruttoleistung"].to_dict() == {
+        "Bayern": 60.0,
+        "Hessen": 40.0,
+    }
+
+    # Drill down from state to district
+    df = query_capacity_statistics(
+        ["solar"], by=["Landkreis"], engine=engine, where={"Bundesland": "Bayern"}
+    )
+    assert df.set_index("Landkreis")["Anzahl"].to_dict() == {"Passau": 2, "Regen": 1}
+
+    df = query_capacity_statistics(
+        ["solar"], by=["Inbetriebnahmejahr"], engine=engine
+    ).dropna()
+    assert df.set_index("Inbetriebnahmejahr")["Anzahl"].to_dict() == {2020: 2, 2021: 1}
+
+    # Dimensions that are not pre-aggregated are queried from the units
+    df = query_capacity_statistics(["solar"], by=["Lage"], engine=engine)
+    assert df.set_index("Lage")["Nettonennleistung"].to_dict() == {
+        "Dach": 72.0,
+        "Frei": 18.0,
+    }
+
+    # Conditions on the technology select from the technologies
+    pd.DataFrame(
+        {
+            "EinheitMastrNummer": ["SEE5"],
+            "Bruttoleistung": [50.0],
+            "Nettonennleistung": [45.0],
+        }
+    ).to_sql("wind_extended", con=engine, if_exists="append", index=False)
+    df = query_capacity_statistics(
+        ["solar", "wind"],
+        by=["technology"],
+        engine=engine,
+        where={"technology": ("!=", "solar")},
+    )
+    assert df.set_index("technology")["Bruttoleistung"].to_dict() == {"wind": 50.0}
+    df = query_capacity_statistics(
+        ["solar", "wind"], by=["Lage"], engine=engine, where={"technology": "solar"}
+    )
+    assert df.set_index("Lage")["Anzahl"].to_dict() == {"Dach": 3, "Frei": 1}
+
+
+def test_create_spatial_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'open-mastr.db'}")
+    orm.Base.metadata.create_all(engine)
+    pd.DataFrame(
+        {
+            "EinheitMastrNummer": ["SEE1", "SEE2", "SEE3"],
+            "Breitengrad": [52.52, 52.60, None],
+            "Laengengrad": [13.40, 13.50, 13.40],
+        }
+    ).to_sql("solar_extended", con=engine, if_exists="append", index=False)
+
+    assert create_spatial_indexes(engine, technology=["solar"]) == [
+        "solar_extended_rtree"
+    ]
+    query = create_bbox_query("solar", (52.5, 13.3, 52.55, 13.45), engine)
+    assert "solar_extended_rtree" in str(query)
+    df = pd.read_sql(query, con=engine)
+    assert df["EinheitMastrNummer"].tolist() == ["SEE1"]
+
+    # Coordinates are checked even if the index is outdated
+    with engine.begin() as connection:
+        connection.execute(
+            text('UPDATE solar_extended SET "Breitengrad" = 48.0 WHERE rowid = 1')
+        )
+    assert pd.read_sql(query, con=engine).empty
+
+    # Units added after the index was built are found without the index
+    pd.DataFrame(
+        {"EinheitMastrNummer": ["SEE4"], "Breitengrad": [52.51], "Laengengrad": [13.41]}
+    ).to_sql("solar_extended", con=engine, if_exists="append", index=False)
+    assert not spatial_index_is_current(engine, "solar_extended")
+    query = create_bbox_query("solar", (52.5, 13.3, 52.55, 13.45), engine)
+    assert "solar_extended_rtree" not in str(query)
+    assert pd.read_sql(query, con=engine)["EinheitMastrNummer"].tolist() == ["SEE4"]
+
+    create_spatial_indexes(engine, technology=["solar"])
+    assert spatial_index_is_current(engine, "solar_extended")
+
+    # Writes of open-mastr mark the index as outdated
+    with engine.begin() as connection:
+        mark_spatial_index_outdated(connection, "solar_extended")
+    assert not spatial_index_is_current(engine, "solar_extended")
+
+
+def test_haversine_distance():
+    # Berlin to Munich
+    distance = haversine_distance(52.52, 13.405, [48.137], [11.575])
+    assert distance[0] == pytest.approx(504, abs=1)
@@ -1,9 +1,12 @@
 from open_mastr.mastr import Mastr
 import os
+import subprocess
+import sys
 import sqlalchemy
 import pytest
 import pandas as pd
 from open_mastr.utils.constants import TRANSLATIONS
+from open_mastr.utils.helpers import drop_translated_views
 
 
 @pytest.fixture
@@ -60,3 +63,147 @@ def test_Mastr_translate(db_translated, db_path):
 
     for table in table_names:
         assert pd.read_sql(sql=table, con=db_empty.engine).shape[0] == 0
+
+
+def test_Mastr_translate_copy(tmp_path):
+    db_path = str(tmp_path / "mastr-test.db")
+    db_copy = Mastr(engine=sqlalchemy.create_engine(f"sqlite:///{db_path}"))
+    db_copy.translate(copy=True)
+
+    # the original database is kept untouched
+    assert os.path.exists(db_path)
+    columns = sqlalchemy.inspect(
+        sqlalchemy.create_engine(f"sqlite:///{db_path}")
+    ).get_columns("basic_units")
+    assert "EinheitMastrNummer" in [column["name"] for column in columns]
+
+    # the copy is translated
+    assert db_copy.is_translated
+    columns = sqlalchemy.inspect(db_copy.engine).get_columns("basic_units")
+    assert TRANSLATIONS["EinheitMastrNummer"] in [column["name"] for column in columns]
+
+
+def test_Mastr_translate_views(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'mastr-test.db'}")
+    db = Mastr(engine=engine)
+    db.translate(views=True)
+
+    assert not db.is_translated
+    inspector = sqlalchemy.inspect(db.engine)
+    assert "en_wind_extended" in inspector.get_view_names()
+    columns = [column["name"] for column in inspector.get_columns("en_basic_units")]
+    assert TRANSLATIONS["EinheitMastrNummer"] in columns
+    columns = [column["name"] for column in inspector.get_columns("basic_units")]
+    assert "EinheitMastrNummer" in columns
+    # bookkeeping tables of open-mastr get no view
+    assert "en_backfill_checkpoints" not in inspector.get_view_names()
+    assert "en_capacity_statistics" not in inspector.get_view_names()
+
+
+def test_drop_translated_views_keeps_other_views(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'mastr-test.db'}")
+    db = Mastr(engine=engine)
+    db.translate(views=True)
+    with engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.text("CREATE VIEW en_my_report AS SELECT 1 AS one")
+        )
+
+    dropped_views = drop_translated_views(engine)
+
+    assert "en_wind_extended" in dropped_views
+    assert sqlalchemy.inspect(engine).get_view_names() == ["en_my_report"]
+
+
+def test_Mastr_download_keeps_translated_views_on_error(tmp_path, monkeypatch):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'mastr-test.db'}")
+    db = Mastr(engine=engine)
+    db.translate(views=True)
+
+    def failing_download(*args, **kwargs):
+        raise ConnectionError("MaStR not reachable")
+
+    monkeypatch.setattr("open_mastr.mastr.download_xml_Mastr", failing_download)
+    with pytest.raises(ConnectionError):
+        db.download(method="bulk", data="wind", date="20240101")
+
+    assert "en_wind_extended" in sqlalchemy.inspect(db.engine).get_view_names()
+
+
+def test_Mastr_query(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'mastr-test.db'}")
+    db = Mastr(engine=engine)
+    pd.DataFrame(
+        {
+            "EinheitMastrNummer": ["SEE1", "SEE2", "SEE3"],
+            "Bundesland": ["Bayern", "Bayern", "Hessen"],
+            "Inbetriebnahmedatum": ["2020-01-01", "2021-02-03", None],
+        }
+    ).to_sql("solar_extended", con=engine, if_exists="append", index=False)
+
+    df = db.query(
+        "solar",
+        columns=["EinheitMastrNummer", "Inbetriebnahmedatum", "Bruttoleistung"],
+        where={"Bundesland": "Bayern"},
+    )
+    assert df.shape == (2, 3)
+    # dtypes follow the table definition, also for columns without values
+    assert pd.api.types.is_datetime64_any_dtype(df["Inbetriebnahmedatum"])
+    assert str(df["Bruttoleistung"].dtype) == "Float64"
+
+    chunks = list(db.query("solar", columns=["EinheitMastrNummer"], chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+
+
+def test_Mastr_stats(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'mastr-test.db'}")
+    db = Mastr(engine=engine)
+    pd.DataFrame(
+        {
+            "EinheitMastrNummer": ["SEE1", "SEE2"],
+            "Bundesland": ["Bayern", "Hessen"],
+            "Bruttoleistung": [10.0, 20.0],
+        }
+    ).to_sql("solar_extended", con=engine, if_exists="append", index=False)
+
+    df = db.stats(data="solar", by="technology", refresh=True)
+    assert df.loc[0, "technology"] == "solar"
+    assert df.loc[0, "Anzahl"] == 2
+    assert df.loc[0, "Bruttoleistung"] == 30.0
+
+    with pytest.raises(ValueError):
+        db.stats(data="permit")
+
+
+def test_Mastr_nearby(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'mastr-test.db'}")
+    db = Mastr(engine=engine)
+    pd.DataFrame(
+        {
+            "EinheitMastrNummer": ["SEE1", "SEE2", "SEE3"],
+            "Breitengrad": [52.52, 52.55, 52.52],
+            "Laengengrad": [13.40, 13.40, 13.60],
+        }
+    ).to_sql("solar_extended", con=engine, if_exists="append", index=False)
+
+    df = db.nearby(lat=52.52, lon=13.40, radius_km=5, data="solar")
+    assert df["EinheitMastrNummer"].tolist() == ["SEE1", "SEE2"]
+    assert df["distance_km"].tolist() == pytest.approx([0, 3.34], abs=0.01)
+
+    df = db.within_bbox(52.5, 13.3, 52.6, 13.7, data=["solar", "wind"])
+    assert sorted(df["EinheitMastrNummer"]) == ["SEE1", "SEE2", "SEE3"]
+
+    with pytest.raises(ValueError, match="Allowed values"):
+        db.within_bbox(52.5, 13.3, 52.6, 13.7, data=[])
+
+
+def test_import_is_lazy(tmp_path):
+    # Importing the package neither loads heavy dependencies nor creates files
+    script = (
+        "import sys, open_mastr; "
+        "assert 'pandas' not in sys.modules; "
+        "assert 'sqlalchemy' not in sys.modules"
+    )
+    env = dict(os.environ, HOME=str(tmp_path), USERPROFILE=str(tmp_path))
+    subprocess.run([sys.executable, "-c", script], check=True, env=env)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from open_mastr.utils.metrics import (
+    MetricsCollector,
+    NullMetricsCollector,
+    get_metrics,
+    use_metrics,
+)
+from open_mastr.xml_download.utils_write_to_database import (
+    cast_date_columns_to_datetime,
+)
+
+
+def test_metrics_collector_summary():
+    collector = MetricsCollector()
+    with collector.timer("parse", table="wind_extended"):
+        pass
+    with collector.timer("write", table="wind_extended"):
+        pass
+    collector.increment("rows", 10, table="wind_extended")
+    collector.increment("retries", table="wind_extended")
+    collector.increment("rows", 5, table="solar_extended")
+    collector.observe("chunk_rows", 10)
+    collector.observe("chunk_rows", 20)
+
+    summary = collector.summary()
+    assert summary.stages.shape[0] == 2
+    assert summary.stages["calls"].tolist() == [1, 1]
+    assert summary.tables.loc["wind_extended", "rows"] == 10
+    assert summary.tables.loc["wind_extended", "retries"] == 1
+    assert summary.tables.loc["wind_extended", "rows_per_second"] > 0
+    # tables without timings have no throughput
+    assert summary.tables.loc["solar_extended", "rows_per_second"] == 0
+    assert summary.histograms.loc[0, "mean"] == 15
+
+
+def test_use_metrics():
+    assert isinstance(get_metrics(), NullMetricsCollector)
+    with use_metrics(MetricsCollector()) as collector:
+        assert get_metrics() is collector
+        df = pd.DataFrame({"Registrierungsdatum": ["2022-03-22", "2022-03-35", None]})
+        cast_date_columns_to_datetime("anlageneegwasser", df)
+    assert isinstance(get_metrics(), NullMetricsCollector)
+
+    summary = collector.summary()
+    assert summary.counters[("coerced_values", "hydro_eeg")] == 1
+    assert summary.stages.empty
+
+
+def test_timer_records_failed_blocks():
+    collector = MetricsCollector()
+    with pytest.raises(ValueError):
+        with collector.timer("write", table="wind_extended"):
+            raise ValueError
+    assert collector.summary().stages.loc[0, "calls"] == 1
+
+
+def test_timers_are_kept_per_operation():
+    collector = MetricsCollector()
+    for operation in ["GetListeAlleEinheiten", "GetEinheitWind", "GetEinheitWind"]:
+        with collector.timer("soap_call", operation=operation):
+            pass
+
+    summary = collector.summary()
+    stages = summary.stages.set_index("operation")
+    assert stages["calls"].to_dict() == {
+        "GetListeAlleEinheiten": 1,
+        "GetEinheitWind": 2,
+    }
+    assert (stages["p95_seconds"] <= stages["max_seconds"]).all()
+    assert summary.histograms.empty
@@ -0,0 +1,65 @@
+import os
+import pstats
+
+from open_mastr.utils.metrics import MetricsCollector, use_metrics
+from open_mastr.utils.profiling import get_profile_dir, profile_stages
+
+
+def _parse_table():
+    return sorted(str(number) for number in range(10000))
+
+
+def test_profile_stages(tmp_path):
+    with use_metrics(MetricsCollector()) as collector:
+        with profile_stages(str(tmp_path), top=5) as profiler:
+            with profiler.timer("parse", table="wind_extended"):
+                _parse_table()
+                # Nested stages are part of the outer profile
+                with profiler.timer("write", table="wind_extended"):
+                    _parse_table()
+            with profiler.timer("download"):
+                pass
+            profiler.increment("rows", 10, table="wind_extended")
+
+    assert sorted(os.listdir(tmp_path)) == ["download.prof", "wind_extended.prof"]
+    stats = pstats.Stats(str(tmp_path / "wind_extended.prof"))
+    assert any(function == "_parse_table" for _, _, function in stats.stats)
+
+    hotspots = profiler.hotspots()
+    assert len(hotspots) <= 5
+    assert hotspots["internal_seconds"].is_monotonic_decreasing
+
+    # Metrics are passed on to the active collector
+    summary = collector.summary()
+    assert summary.tables.loc["wind_extended", "rows"] == 10
+    assert summary.stages.shape[0] == 3
+
+
+def test_profile_stages_passes_on_operations(tmp_path):
+    with use_metrics(MetricsCollector()) as collector:
+        with profile_stages(str(tmp_path)) as profiler:
+            # Like the SOAP API calls of the download
+            with profiler.timer("soap_call", operation="GetEinheitWind"):
+                pass
+            profiler.observe("response_units", 2, operation="GetEinheitWind")
+
+    summary = collector.summary()
+    assert summary.stages.loc[0, "operation"] == "GetEinheitWind"
+    assert summary.histograms.loc[0, "operation"] == "GetEinheitWind"
+
+
+def test_get_profile_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPEN_MASTR_PROFILE", raising=False)
+    assert get_profile_dir(None, str(tmp_path)) is None
+    assert get_profile_dir(False, str(tmp_path)) is None
+    assert get_profile_dir("profiles", str(tmp_path)) == "profiles"
+    assert get_profile_dir(True, str(tmp_path)).startswith(
+        os.path.join(str(tmp_path), "profiles")
+    )
+
+    monkeypatch.setenv("OPEN_MASTR_PROFILE", "1")
+    assert get_profile_dir(None, str(tmp_path)).startswith(
+        os.path.join(str(tmp_path), "profiles")
+    )
+    monkeypatch.setenv("OPEN_MASTR_PROFILE", "0")
+    assert get_profile_dir(None, str(tmp_path)) is None
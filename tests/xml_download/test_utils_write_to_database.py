@@ -1,3 +1,4 @@
+import pickle
 import sys
 from zipfile import ZipFile
 
@@ -10,11 +11,17 @@ from open_mastr.xml_download.utils_write_to_database import (
     preprocess_table_for_writing_to_database,
     add_table_to_database,
     add_zero_as_first_character_for_too_short_string,
-    correct_ordering_of_filelist,
+    write_mastr_xml_to_database,
+    build_member_index,
+    create_database_table,
+    parsed_member_cache_path,
+    write_parsed_member,
 )
+from open_mastr.utils.metrics import MetricsCollector, use_metrics
 import os
 from os.path import expanduser
 import sqlite3
+import sqlalchemy
 from sqlalchemy import create_engine
 import pandas as pd
 import pytest
@@ -169,49 +176,61 @@ def test_add_zero_as_first_character_for_too_short_string():
     pd.testing.assert_frame_equal(df_edited, df_correct)
 
 
-def test_correct_ordering_of_filelist():
-    filelist = [
-        "Solar_1.xml",
-        "Solar_10.xml",
-        "Solar_11.xml",
-        "Solar_2.xml",
-        "Solar_3.xml",
-        "Solar_4.xml",
-        "Solar_5.xml",
-        "Solar_6.xml",
-        "Solar_7.xml",
-        "Solar_8.xml",
-        "Solar_9.xml",
-        "Wind_1.xml",
-        "Wind_2.xml",
-        "Wind_3.xml",
-    ]
-    filelist_2 = ["Solar_01.xml", "Solar_02.xml", "Solar_10.xml", "Wind_01.xml"]
-
-    filelist_corrected = correct_ordering_of_filelist(filelist)
-    filelist_2_corrected = correct_ordering_of_filelist(filelist_2)
-
-    assert filelist_corrected == [
-        "Solar_1.xml",
-        "Solar_2.xml",
-        "Solar_3.xml",
-        "Solar_4.xml",
-        "Solar_5.xml",
-        "Solar_6.xml",
-        "Solar_7.xml",
-        "Solar_8.xml",
-        "Solar_9.xml",
-        "Solar_10.xml",
-        "Solar_11.xml",
-        "Wind_1.xml",
-        "Wind_2.xml",
-        "Wind_3.xml",
+def test_preprocess_keeps_leading_zeros(tmp_path):
+    units = "".join(
+        f"<EinheitWind><EinheitMastrNummer>SEE{number}</EinheitMastrNummer>"
+        f"<Postleitzahl>{postcode}</Postleitzahl>"
+        f"<Gemeindeschluessel>{municipality_key}</Gemeindeschluessel></EinheitWind>"
+        for number, (postcode, municipality_key) in enumerate(
+            [("01234", "09162000"), ("DK-9999", "9162000"), ("1234", "")]
+        )
+    )
+    xml = (
+        f'<?xml version="1.0" encoding="UTF-16"?><EinheitenWind>{units}</EinheitenWind>'
+    )
+    zip_file_path = tmp_path / "Gesamtdatenexport_20240101.zip"
+    with ZipFile(zip_file_path, "w") as f:
+        f.writestr("EinheitenWind.xml", xml.encode("utf-16"))
+
+    with ZipFile(zip_file_path, "r") as f:
+        df = preprocess_table_for_writing_to_database(
+            f=f,
+            file_name="EinheitenWind.xml",
+            xml_tablename="einheitenwind",
+            bulk_download_date="20240101",
+        )
+
+    assert df["Postleitzahl"].tolist() == ["01234", "DK-9999", "01234"]
+    assert df["Gemeindeschluessel"].tolist()[:2] == ["09162000", "09162000"]
+    assert pd.isna(df["Gemeindeschluessel"].iloc[2])
+
+
+def test_build_member_index(tmp_path):
+    zip_file_path = tmp_path / "Gesamtdatenexport_20240101.zip"
+    with ZipFile(zip_file_path, "w") as f:
+        for file_name in [
+            "EinheitenSolar_10.xml",
+            "EinheitenSolar_2.xml",
+            "EinheitenSolar_1.xml",
+            "EinheitenWind.xml",
+            "Katalogwerte.xml",
+            "Readme.txt",
+        ]:
+            f.writestr(file_name, "")
+
+    with ZipFile(zip_file_path, "r") as f:
+        index = build_member_index(f, ["einheitensolar", "einheitenwind"])
+
+    assert [(member.xml_tablename, member.part) for member in index] == [
+        ("einheitensolar", 1),
+        ("einheitensolar", 2),
+        ("einheitensolar", 10),
+        ("einheitenwind", 1),
     ]
-    assert filelist_2_corrected == [
-        "Solar_01.xml",
-        "Solar_02.xml",
-        "Solar_10.xml",
-        "Wind_01.xml",
+    assert index[2].info.filename == "EinheitenSolar_10.xml"
+    # The index can be sent to worker processes
+    assert [member.info.filename for member in pickle.loads(pickle.dumps(index))] == [
+        member.info.filename for member in index
     ]
 
 
@@ -236,3 +255,218 @@ def test_cast_date_columns_to_datetime():
     pd.testing.assert_frame_equal(
         df_replaced, cast_date_columns_to_datetime("anlageneegwasser", df_raw)
     )
+
+
+def _write_wind_zip(zip_file_path, number_of_units):
+    units = "".join(
+        f"<EinheitWind><EinheitMastrNummer>SEE{number}</EinheitMastrNummer>"
+        "<Registrierungsdatum>2020-01-01</Registrierungsdatum></EinheitWind>"
+        for number in range(number_of_units)
+    )
+    xml = (
+        f'<?xml version="1.0" encoding="UTF-16"?><EinheitenWind>{units}</EinheitenWind>'
+    )
+    with ZipFile(zip_file_path, "w") as f:
+        f.writestr("EinheitenWind.xml", xml.encode("utf-16"))
+
+
+def test_write_mastr_xml_to_database_with_cache(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'mastr.db'}")
+    cache_dir = str(tmp_path / "xml_cache")
+    zip_file_path = str(tmp_path / "Gesamtdatenexport_20240101.zip")
+    _write_wind_zip(zip_file_path, 3)
+
+    def write(bulk_download_date):
+        with use_metrics(MetricsCollector()) as collector:
+            write_mastr_xml_to_database(
+                engine=engine,
+                zipped_xml_file_path=zip_file_path,
+                data=["wind"],
+                bulk_cleansing=False,
+                bulk_download_date=bulk_download_date,
+                cache_dir=cache_dir,
+            )
+        df = pd.read_sql_table("wind_extended", con=engine)
+        return collector.summary().counters.get(("cache_hits", "wind_extended")), df
+
+    cache_hits, df_parsed = write("20240101")
+    assert cache_hits is None
+    assert len(os.listdir(cache_dir)) == 1
+
+    # The identical file is read from the cache, only the download date changes
+    cache_hits, df_cached = write("20240102")
+    assert cache_hits == 1
+    assert (df_cached["DatumDownload"] == datetime(2024, 1, 2)).all()
+    pd.testing.assert_frame_equal(
+        df_parsed.drop(columns="DatumDownload"),
+        df_cached.drop(columns="DatumDownload"),
+    )
+
+    # A changed file is parsed again and replaces the outdated cache entry
+    _write_wind_zip(zip_file_path, 4)
+    cache_hits, df_changed = write("20240103")
+    assert cache_hits is None
+    assert len(df_changed) == 4
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_write_mastr_xml_to_database_marks_spatial_index_outdated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'mastr.db'}")
+    orm.Base.metadata.create_all(engine)
+    state = orm.SpatialIndexState.__table__
+    with engine.begin() as connection:
+        connection.execute(state.insert().values(table_name="wind_extended"))
+    zip_file_path = str(tmp_path / "Gesamtdatenexport_20240101.zip")
+    _write_wind_zip(zip_file_path, 3)
+
+    write_mastr_xml_to_database(
+        engine=engine,
+        zipped_xml_file_path=zip_file_path,
+        data=["wind"],
+        bulk_cleansing=False,
+        bulk_download_date="20240101",
+    )
+
+    with engine.connect() as connection:
+        assert connection.execute(state.select()).first() is None
+
+
+def test_write_parsed_member_keeps_other_variants(tmp_path):
+    cache_dir = str(tmp_path / "xml_cache")
+    zip_file_path = str(tmp_path / "Gesamtdatenexport_20240101.zip")
+    df = pd.DataFrame({"EinheitMastrNummer": ["SEE1"]})
+
+    def cache_path(bulk_cleansing):
+        with ZipFile(zip_file_path, "r") as f:
+            return parsed_member_cache_path(
+                cache_dir, f, "EinheitenWind.xml", bulk_cleansing
+            )
+
+    with ZipFile(zip_file_path, "w") as f:
+        f.writestr("EinheitenWind.xml", "1")
+        f.writestr("Katalogwerte.xml", "")
+    write_parsed_member(df, cache_path(True))
+    write_parsed_member(df, cache_path(False))
+    cleansed_path = cache_path(True)
+    # A concurrent run is still writing this file
+    temporary_path = f"{cleansed_path}.1234.tmp"
+    open(temporary_path, "w").close()
+
+    # A changed file replaces only the cache entry of the same variant
+    with ZipFile(zip_file_path, "w") as f:
+        f.writestr("EinheitenWind.xml", "2")
+        f.writestr("Katalogwerte.xml", "")
+    write_parsed_member(df, cache_path(False))
+
+    assert os.path.exists(temporary_path)
+    cached = [
+        os.path.join(cache_dir, os.path.splitext(file)[0])
+        for file in os.listdir(cache_dir)
+        if not file.endswith(".tmp")
+    ]
+    assert sorted(cached) == sorted([cleansed_path, cache_path(False)])
+
+
+def test_add_table_to_database_in_batches(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'mastr.db'}")
+    create_database_table(engine=engine, xml_tablename="einheitenwind")
+    existing = pd.DataFrame({"EinheitMastrNummer": ["SEE1", "SEE3"]})
+    existing.to_sql("wind_extended", con=engine, if_exists="append", index=False)
+
+    df = pd.DataFrame(
+        {"EinheitMastrNummer": ["SEE0", "SEE1", "SEE2", "SEE3", None, "SEE5", "SEE6"]}
+    )
+    with use_metrics(MetricsCollector()) as collector:
+        add_table_to_database(
+            df=df,
+            xml_tablename="einheitenwind",
+            sql_tablename="wind_extended",
+            if_exists="append",
+            engine=engine,
+            batch_size=3,
+        )
+
+    # Existing rows and the row without primary key are skipped batch by batch
+    df_written = pd.read_sql_table("wind_extended", con=engine)
+    assert sorted(df_written["EinheitMastrNummer"]) == [
+        "SEE0",
+        "SEE1",
+        "SEE2",
+        "SEE3",
+        "SEE5",
+        "SEE6",
+    ]
+    summary = collector.summary()
+    assert summary.counters[("skipped_duplicates", "wind_extended")] == 2
+    assert summary.counters[("skipped_rows", "wind_extended")] == 1
+    histograms = summary.histograms.set_index("name")
+    # Every successfully written batch is recorded
+    assert (
+        histograms.loc["batch_rows", "count"]
+        == histograms.loc["batch_seconds", "count"]
+    )
+    assert histograms.loc["batch_rows", "max"] <= 3
+
+
+def test_add_table_to_database_appends_second_half_of_split_batch(
+    tmp_path, monkeypatch
+):
+    engine = create_engine(f"sqlite:///{tmp_path / 'mastr.db'}")
+    create_database_table(engine=engine, xml_tablename="einheitenwind")
+    pd.DataFrame({"EinheitMastrNummer": ["SEE0"]}).to_sql(
+        "wind_extended", con=engine, if_exists="append", index=False
+    )
+    to_sql = pd.DataFrame.to_sql
+
+    def to_sql_rejecting_batches(df, *args, **kwargs):
+        # The failing value cannot be read from the error, so the batch is split
+        if len(df) > 1:
+            raise sqlalchemy.exc.DataError("INSERT", {}, ValueError("value too long"))
+        return to_sql(df, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_sql", to_sql_rejecting_batches)
+    add_table_to_database(
+        df=pd.DataFrame({"EinheitMastrNummer": ["SEE1", "SEE2", "SEE3"]}),
+        xml_tablename="einheitenwind",
+        sql_tablename="wind_extended",
+        if_exists="replace",
+        engine=engine,
+    )
+
+    df_written = pd.read_sql_table("wind_extended", con=engine)
+    assert sorted(df_written["EinheitMastrNummer"]) == ["SEE1", "SEE2", "SEE3"]
+
+
+def test_add_table_to_database_deletes_values_with_wrong_type(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'mastr.db'}")
+    create_database_table(engine=engine, xml_tablename="einheitenwind")
+    to_sql = pd.DataFrame.to_sql
+
+    def to_sql_rejecting_wrong_type(df, *args, **kwargs):
+        if (df == "wrong").any().any():
+            raise sqlalchemy.exc.DataError(
+                "INSERT", {}, ValueError("invalid input syntax: »wrong«")
+            )
+        return to_sql(df, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_sql", to_sql_rejecting_wrong_type)
+    df = pd.DataFrame(
+        {
+            "EinheitMastrNummer": ["SEE1", "SEE2"],
+            "Nabenhoehe": ["wrong", "wrong"],
+        }
+    )
+    with use_metrics(MetricsCollector()) as collector:
+        add_table_to_database(
+            df=df,
+            xml_tablename="einheitenwind",
+            sql_tablename="wind_extended",
+            if_exists="append",
+            engine=engine,
+        )
+
+    df_written = pd.read_sql_table("wind_extended", con=engine)
+    assert df_written["Nabenhoehe"].isna().all()
+    counters = collector.summary().counters
+    assert counters[("deleted_values", "wind_extended")] == 2
+    assert ("coerced_values", "wind_extended") not in counters
@@ -0,0 +1,141 @@
+import codecs
+import multiprocessing
+import pickle
+from zipfile import ZIP_DEFLATED, ZIP_STORED, BadZipFile, ZipFile
+
+import pytest
+
+from open_mastr.xml_download.utils_zip_access import (
+    MappedZip,
+    iter_utf8_chunks,
+    read_utf8_member,
+)
+
+_DEFLATED_CONTENT = "<EinheitWind>SEE1</EinheitWind>".encode("utf-16") * 10000
+_STORED_CONTENT = b"<Katalogwerte/>" * 100
+_XML = (
+    '<?xml version="1.0" encoding="UTF-16"?>'
+    "<EinheitenWind><EinheitWind><Name>Windpark Düne \U0001d518</Name></EinheitWind>"
+    "</EinheitenWind>"
+)
+
+
+@pytest.fixture
+def zip_file_path(tmp_path):
+    zip_file_path = str(tmp_path / "Gesamtdatenexport_20240101.zip")
+    with ZipFile(zip_file_path, "w") as f:
+        f.writestr("EinheitenWind_1.xml", _DEFLATED_CONTENT, ZIP_DEFLATED)
+        f.writestr("Katalogwerte.xml", _STORED_CONTENT, ZIP_STORED)
+    return zip_file_path
+
+
+def test_mapped_zip_read(zip_file_path):
+    with MappedZip(zip_file_path) as f:
+        assert f.namelist() == ["EinheitenWind_1.xml", "Katalogwerte.xml"]
+        assert f.read("EinheitenWind_1.xml") == _DEFLATED_CONTENT
+        assert f.read(f.getinfo("Katalogwerte.xml")) == _STORED_CONTENT
+
+        # Chunks are limited in size and add up to the content
+        chunks = list(f.iter_chunks("EinheitenWind_1.xml", chunk_size=1000))
+        assert max(len(chunk) for chunk in chunks) <= 1000
+        assert b"".join(chunks) == _DEFLATED_CONTENT
+        assert b"".join(f.iter_chunks("Katalogwerte.xml", 100)) == _STORED_CONTENT
+
+        # The buffer is reused for smaller members
+        buffer = bytearray()
+        assert f.readinto("EinheitenWind_1.xml", buffer) == _DEFLATED_CONTENT
+        size = len(buffer)
+        assert f.readinto("Katalogwerte.xml", buffer) == _STORED_CONTENT
+        assert len(buffer) == size
+
+        info = f.getinfo("Katalogwerte.xml")
+        offset = f.data_offset(info)
+    with open(zip_file_path, "rb") as file:
+        file.seek(offset)
+        assert file.read(info.compress_size) == _STORED_CONTENT
+
+
+def test_mapped_zip_checks_crc(zip_file_path):
+    with MappedZip(zip_file_path) as f:
+        info = f.getinfo("Katalogwerte.xml")
+        info.CRC += 1
+        with pytest.raises(BadZipFile):
+            f.read(info)
+
+
+def test_mapped_zip_closes_with_unfinished_readers(zip_file_path):
+    # The error of the consumer is not hidden by views of the suspended reader
+    with pytest.raises(ValueError):
+        with MappedZip(zip_file_path) as f:
+            chunks = f.iter_chunks("EinheitenWind_1.xml", chunk_size=1000)
+            next(chunks)
+            raise ValueError
+
+    # Readers release their view of the archive when they are closed early
+    with MappedZip(zip_file_path) as f:
+        mapped = f._mmap
+        chunks = iter_utf8_chunks(f, "EinheitenWind_1.xml", chunk_size=1000)
+        next(chunks)
+        chunks.close()
+    assert mapped.closed
+
+
+@pytest.mark.parametrize("encoding", ["utf-16", "utf-16-be", "utf-16-le"])
+def test_iter_utf8_chunks(tmp_path, encoding):
+    zip_file_path = str(tmp_path / "Gesamtdatenexport_20240101.zip")
+    content = _XML.encode(encoding)
+    if encoding == "utf-16-be":
+        content = codecs.BOM_UTF16_BE + content
+    # Without BOM, the content is read as little endian
+    with ZipFile(zip_file_path, "w") as f:
+        f.writestr("EinheitenWind.xml", content, ZIP_DEFLATED)
+    expected = _XML.replace("UTF-16", "UTF-8").encode("utf-8")
+
+    with MappedZip(zip_file_path) as f:
+        # Odd block sizes split characters and surrogate pairs between blocks
+        for chunk_size in [1, 3, 7, 2**20]:
+            chunks = iter_utf8_chunks(f, "EinheitenWind.xml", chunk_size=chunk_size)
+            assert b"".join(chunks) == expected
+    with ZipFile(zip_file_path, "r") as f:
+        assert read_utf8_member(f, "EinheitenWind.xml") == expected
+
+        cache_dir = tmp_path / "utf8_cache"
+        assert read_utf8_member(f, "EinheitenWind.xml", cache_dir=cache_dir) == expected
+        assert [path.read_bytes() for path in cache_dir.iterdir()] == [expected]
+
+
+@pytest.mark.parametrize("content", [b"", b"<", b"\xff\xfe"])
+def test_iter_utf8_chunks_of_short_files(tmp_path, content):
+    zip_file_path = str(tmp_path / "Gesamtdatenexport_20240101.zip")
+    with ZipFile(zip_file_path, "w") as f:
+        f.writestr("EinheitenWind.xml", content, ZIP_DEFLATED)
+
+    with MappedZip(zip_file_path) as f:
+        text = b"".join(iter_utf8_chunks(f, "EinheitenWind.xml", chunk_size=1))
+    # An incomplete character is replaced
+    assert text == ("\ufffd" if content == b"<" else "").encode("utf-8")
+
+
+_shared_zip = None
+
+
+def _read_length(file_name):
+    # Forked workers use the mapped archive of the parent process
+    return len(_shared_zip.read(file_name))
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="Forked workers are not available on this platform.",
+)
+def test_mapped_zip_in_workers(zip_file_path):
+    global _shared_zip
+    with MappedZip(zip_file_path) as _shared_zip:
+        assert pickle.loads(pickle.dumps(_shared_zip)).read("Katalogwerte.xml") == (
+            _STORED_CONTENT
+        )
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            lengths = pool.map(
+                _read_length, ["EinheitenWind_1.xml", "Katalogwerte.xml"]
+            )
+    assert lengths == [len(_DEFLATED_CONTENT), len(_STORED_CONTENT)]